@@ -1,19 +1,93 @@
 # backend/ai_client.py
-import requests
 import json
 import time
 import re
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import os
-from dotenv import load_dotenv
+import threading
+from collections import OrderedDict
 
-load_dotenv()
+# Сколько задач извлекать из одного текста
+MAX_TASKS_PER_TEXT = 10
+
+# Разделители задач в одном тексте: сильные (запятая, точка с запятой,
+# перевод строки, "потом") и слабый "и" - он часто соединяет части одной
+# задачи ("купить хлеб и молоко")
+_CLAUSE_SPLIT = re.compile(
+    r'(\s*,?\s+(?:а также|а потом|потом|затем)\s+|\s*[;\n]+\s*|\s*,\s*|\s+и\s+)', re.IGNORECASE
+)
+
+# Признаки отдельной задачи: глагол в неопределенной форме или срок в начале части
+_INFINITIVE = re.compile(r'^\w+(?:ть|ться|ти|чь)$', re.IGNORECASE)
+_DATE_START = re.compile(
+    r'^(?:сегодня|завтра|послезавтра|через|кажд|ежедн|еженед|ежемес|по будням|по выходным'
+    r'|(?:в|во|к) (?:понедельник|вторник|сред|четверг|пятниц|суббот|воскресен|\d))',
+    re.IGNORECASE
+)
+
+# Слова срока, времени и приоритета: часть только из них - не задача, а
+# уточнение соседней ("в пятницу вечером, подготовить отчет", "срочно")
+_MODIFIER_WORD = re.compile(
+    r'^(?:\d{1,2}(?:[:.]\d{2})?|в|во|к|на|по|и|не|очень|через|сегодня|завтра|послезавтра'
+    r'|понедельник\w*|вторник\w*|сред\w|четверг\w*|пятниц\w|суббот\w|воскресень\w'
+    r'|янв\w*|фев\w*|мар\w*|апр\w*|ма[яй]|июн\w*|июл\w*|авг\w*|сен\w*|окт\w*|ноя\w*|дек\w*'
+    r'|дн\w*|день|недел\w|месяц\w*|час\w*|утр\w*|вечер\w*|обед|ночью|числ\w'
+    r'|кажд\w+|ежедневно|еженедельно|ежемесячно|будням|выходным'
+    r'|срочно|важно|критично|когда|будет|время|возможности)$',
+    re.IGNORECASE
+)
+
+def _is_modifier(fragment: str) -> bool:
+    return all(_MODIFIER_WORD.match(word) for word in fragment.split())
+
+def _has_infinitive(fragment: str) -> bool:
+    # "по возможности" похоже на глагол, но это приоритет
+    return any(_INFINITIVE.match(word) and not _MODIFIER_WORD.match(word) for word in fragment.split())
+
+def split_clauses(text: str) -> List[str]:
+    """
+    Делит текст на части с отдельными задачами.
+    
+    Часть после "потом", точки с запятой или перевода строки - отдельная
+    задача; после запятой - если в ней хотя бы два слова или глагол в
+    неопределенной форме; после "и" - только если есть глагол или она
+    начинается со срока. Остальные части, а также части только из срока и
+    приоритета, присоединяются к соседней задаче ("купить хлеб, молоко и
+    яйца", "в пятницу вечером, срочно подготовить отчет" - одна задача).
+    """
+    parts = _CLAUSE_SPLIT.split(text.strip())
+    clauses: List[str] = []
+    for i in range(0, len(parts), 2):
+        fragment = parts[i].strip()
+        if not fragment:
+            continue
+        separator = parts[i - 1] if i > 0 else ''
+        connective = separator.strip(' ,').lower()
+        if connective == 'и':
+            standalone = _has_infinitive(fragment) or bool(_DATE_START.match(fragment))
+        else:
+            standalone = _has_infinitive(fragment) or len(fragment.split()) >= 2 or connective not in ('', ',')
+        if _is_modifier(fragment) or (clauses and _is_modifier(clauses[-1])):
+            standalone = False
+        if clauses and not standalone:
+            clauses[-1] += separator + fragment
+        else:
+            clauses.append(fragment)
+    return clauses[:MAX_TASKS_PER_TEXT]
 
 class YandexGPTClient:
     """Клиент для работы с Yandex GPT API"""
     
     def __init__(self):
+        # requests и dotenv импортируются здесь, а не при импорте модуля:
+        # клиент создается лениво, при первом AI запросе (см. get_ai_client)
+        import requests
+        from requests.adapters import HTTPAdapter
+        from dotenv import load_dotenv
+        
+        load_dotenv()
+        
         self.api_key = os.getenv('YANDEX_API_KEY')
         self.folder_id = os.getenv('YANDEX_FOLDER_ID')
         self.model = os.getenv('AI_MODEL', 'yandexgpt-lite')
@@ -26,8 +100,167 @@ class YandexGPTClient:
             print("✅ Режим реального AI (Yandex GPT)")
         
         self.url = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
+        
+        # Одна сессия на процесс: keep-alive соединения к API переиспользуются
+        self.session = requests.Session()
+        pool_size = int(os.getenv('AI_POOL_SIZE', '10'))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        
+        # LRU-кэш результатов извлечения. Ключ включает сегодняшнюю дату,
+        # так как относительные даты ("завтра") зависят от текущего дня
+        self.cache_size = int(os.getenv('AI_CACHE_SIZE', '256'))
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def extract_task_with_ai(self, user_text: str) -> Dict[str, Any]:
+        """Извлечение задачи с кэшированием повторяющихся запросов"""
+        
+        key = (user_text.strip().lower(), datetime.now().strftime('%Y-%m-%d'))
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return dict(cached)
+        
+        result = self._extract_task(user_text)
+        self._apply_recurrence(result, user_text)
+        
+        with self._cache_lock:
+            self._cache[key] = dict(result)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
+        return result
+    
+    def extract_tasks_with_ai(self, user_text: str) -> List[Dict[str, Any]]:
+        """Извлечение всех задач из текста одним запросом к модели (с кэшированием)"""
+        
+        key = ('tasks', user_text.strip().lower(), datetime.now().strftime('%Y-%m-%d'))
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return [dict(task) for task in cached]
+        
+        tasks = self._extract_tasks(user_text)
+        
+        with self._cache_lock:
+            self._cache[key] = [dict(task) for task in tasks]
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
+        return tasks
+    
+    def _extract_tasks(self, user_text: str) -> List[Dict[str, Any]]:
+        """Массив задач от модели; если он пустой или неверный - разбор правилами"""
+        
+        if self.is_demo:
+            return self._manual_extract_tasks(user_text)
+        
+        from prompts import TaskPrompts
+        
+        response = self._call_yandex_gpt(TaskPrompts.extract_tasks_prompt(user_text), max_tokens=1500)
+        if response['success']:
+            tasks = self._validate_tasks(self._parse_json_list(response['text']))
+            if tasks:
+                return tasks
+        return self._manual_extract_tasks(user_text)
+    
+    @staticmethod
+    def _parse_json_list(text: str) -> List[Any]:
+        """JSON массив из ответа модели (ответ может быть в блоке ```json или одним объектом)"""
+        
+        stripped = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip())
+        candidates = [stripped]
+        match = re.search(r'\[.*\]', stripped, re.DOTALL)
+        if match:
+            candidates.append(match.group(0))
+        for candidate in candidates:
+            try:
+                data = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                data = data.get('tasks', [data])
+            if isinstance(data, list):
+                return data
+        return []
+    
+    def _validate_tasks(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """Проверка задач от модели по схеме TaskCreate; неверные задачи отбрасываются"""
+        
+        from pydantic import ValidationError
+        from app.schemas import TaskCreate
+        
+        tasks = []
+        for item in items[:MAX_TASKS_PER_TEXT]:
+            if not isinstance(item, dict):
+                continue
+            due_date = item.get('due_date')
+            tags = item.get('tags') if isinstance(item.get('tags'), list) else []
+            try:
+                task = TaskCreate(
+                    title=item.get('title') or '',
+                    description=item.get('description') or None,
+                    due_date=None if due_date in ('', 'null') else due_date,
+                    priority=item.get('priority') or 'medium',
+                    tags=[tag for tag in tags if isinstance(tag, str)][:3]
+                )
+            except (ValidationError, TypeError):
+                continue
+            
+            task_data = {
+                "title": task.title.strip(),
+                "description": task.description,
+                "due_date": task.due_date.strftime('%Y-%m-%d %H:%M:%S') if task.due_date else None,
+                "priority": task.priority,
+                "tags": task.tags
+            }
+            # Повторение распознается по части текста, из которой взята задача
+            source = item.get('text') if isinstance(item.get('text'), str) else task_data['title']
+            self._apply_recurrence(task_data, source)
+            tasks.append(task_data)
+        return tasks
+    
+    def _manual_extract_tasks(self, user_text: str) -> List[Dict[str, Any]]:
+        """Несколько задач без AI: части текста разбираются по отдельности"""
+        
+        tasks = []
+        for clause in split_clauses(user_text) or [user_text]:
+            task_data = self._manual_parse(clause)
+            self._apply_recurrence(task_data, clause)
+            tasks.append(task_data)
+        return tasks
+    
+    @staticmethod
+    def _apply_recurrence(task_data: Dict[str, Any], user_text: str) -> None:
+        """
+        Повторение ("каждый понедельник в 10 утра") распознается правилами, а не моделью.
+        
+        Срок, найденный при извлечении задачи, - начало серии: первым
+        повторением становится ближайшее с этого дня (recurrence.first_from),
+        а не с текущего момента. Срок по правилу ставится, только если
+        срока не было.
+        """
+        
+        from app.recurrence import first_from, parse_phrase
+        
+        found = parse_phrase(user_text)
+        if not found:
+            task_data['recurrence'] = None
+            return
+        
+        rule, first = found
+        task_data['recurrence'] = rule
+        try:
+            start = datetime.strptime(task_data.get('due_date') or '', '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            start = None
+        if start is not None:
+            first = first_from(rule, user_text, start)
+        task_data['due_date'] = first.strftime('%Y-%m-%d %H:%M:%S')
+    
+    def _extract_task(self, user_text: str) -> Dict[str, Any]:
         """Извлечение задачи с правильным парсингом дат"""
         
         now = datetime.now()
@@ -245,7 +478,7 @@ class YandexGPTClient:
             "tags": tags[:3]
         }
     
-    def _call_yandex_gpt(self, prompt: str) -> Dict[str, Any]:
+    def _call_yandex_gpt(self, prompt: str, max_tokens: int = 500) -> Dict[str, Any]:
         """Вызов Yandex GPT API"""
         
         if self.is_demo:
@@ -256,7 +489,7 @@ class YandexGPTClient:
             "completionOptions": {
                 "stream": False,
                 "temperature": 0.1,
-                "maxTokens": 500
+                "maxTokens": max_tokens
             },
             "messages": [{"role": "user", "text": prompt}]
         }
@@ -267,7 +500,7 @@ class YandexGPTClient:
         }
         
         try:
-            response = requests.post(self.url, headers=headers, json=request_body, timeout=30)
+            response = self.session.post(self.url, headers=headers, json=request_body, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -288,9 +521,100 @@ class YandexGPTClient:
         
         return {"success": True, "text": '{"title": "Задача", "due_date": null, "priority": "medium", "tags": ["общее"]}'}
     
+    def analyze_productivity(self, summary: Dict[str, Any]) -> str:
+        """Анализ продуктивности по сводке из app.analytics"""
+        
+        if self.is_demo:
+            return self._manual_productivity(summary)
+        
+        from prompts import TaskPrompts
+        
+        response = self._call_yandex_gpt(TaskPrompts.analyze_productivity_prompt(summary))
+        if response['success']:
+            return response['text']
+        return self._manual_productivity(summary)
+    
+    def _manual_productivity(self, summary: Dict[str, Any]) -> str:
+        """Анализ продуктивности в демо-режиме"""
+        
+        rate = summary['completion_rate']
+        score = max(1, min(10, round(rate / 10)))
+        tips = []
+        if summary['overdue_open']:
+            tips.append(f"Разберите просроченные задачи ({summary['overdue_open']}) - перенесите или закройте их")
+        if summary['completed_late'] > summary['completed_on_time']:
+            tips.append("Чаще задачи выполняются с опозданием - ставьте сроки с запасом")
+        if summary['current_streak_days'] == 0:
+            tips.append("Выполните хотя бы одну задачу сегодня, чтобы начать новую серию")
+        if not tips:
+            tips.append("Продолжайте в том же духе и планируйте важные задачи на утро")
+        
+        lines = [f"📊 Оценка продуктивности: {score}/10 (выполнено {rate:.1f}%)"]
+        lines += [f"• {tip}" for tip in tips[:3]]
+        lines.append("💪 Каждая выполненная задача - шаг вперед!")
+        return "\n".join(lines)
+    
+    @staticmethod
+    def format_due_date_display(due_date: Optional[str]) -> str:
+        """Человекочитаемый срок: "Сегодня в 15:00", "Завтра в 10:00" или дата"""
+        
+        if not due_date:
+            return "Без срока"
+        
+        try:
+            date = datetime.strptime(due_date, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return "Без срока"
+        
+        today = datetime.now().date()
+        if date.date() == today:
+            return f"Сегодня в {date.strftime('%H:%M')}"
+        if date.date() == today + timedelta(days=1):
+            return f"Завтра в {date.strftime('%H:%M')}"
+        return date.strftime('%d.%m.%Y в %H:%M')
+    
+    def _manual_chat(self, message: str) -> str:
+        """Ответ чата в демо-режиме"""
+        message_lower = message.lower()
+        
+        if 'привет' in message_lower:
+            return "Привет! 👋 Я AI ассистент. Я помогаю создавать задачи из текста. Просто опишите, что нужно сделать!"
+        elif 'задача' in message_lower or 'создай' in message_lower:
+            return "Чтобы создать задачу, просто напишите её в главном поле ввода. Например: 'Завтра в 15:00 важное совещание'"
+        elif 'помощ' in message_lower:
+            return "Я могу:\n• Создавать задачи из текста\n• Определять даты и время\n• Ставить приоритеты\n• Категоризировать задачи"
+        elif 'спасиб' in message_lower:
+            return "Всегда рад помочь! 😊 Удачи с задачами!"
+        else:
+            return f"Понял! Я помогу с задачей: '{message[:50]}...' Напишите её в главное поле ввода, и я создам структурированную задачу."
+    
+    def summarize_chat(self, summary: str, turns: list) -> str:
+        """Сворачивание старых сообщений чата в краткое содержание"""
+        
+        if self.is_demo:
+            return self._manual_summary(summary, turns)
+        
+        from prompts import TaskPrompts
+        
+        response = self._call_yandex_gpt(TaskPrompts.summarize_chat_prompt(summary, turns))
+        if response['success']:
+            return response['text'].strip()
+        return self._manual_summary(summary, turns)
+    
+    def _manual_summary(self, summary: str, turns: list) -> str:
+        """Краткое содержание в демо-режиме: темы вопросов пользователя"""
+        
+        topics = "; ".join(user_message[:80] for user_message, _ in turns)
+        if summary:
+            return f"{summary.rstrip('.')}; {topics}."
+        return f"Пользователь спрашивал: {topics}."
+    
     def chat_with_ai(self, user_message: str, context: str = "") -> str:
         """Чат с AI ассистентом"""
         
+        if self.is_demo:
+            return self._manual_chat(user_message)
+        
         prompt = f"""Ты - дружелюбный AI ассистент в приложении для планирования задач.
 
 {context}
@@ -307,5 +631,22 @@ class YandexGPTClient:
             return "Извините, произошла ошибка. Попробуйте еще раз."
 
 
-# Создаем глобальный экземпляр
-ai_client = YandexGPTClient()
\ No newline at end of file
+# Глобальный экземпляр создается при первом обращении, а не при импорте:
+# импорт модуля не читает .env и не создает HTTP сессию
+_ai_client: Optional[YandexGPTClient] = None
+_ai_client_lock = threading.Lock()
+
+def get_ai_client() -> YandexGPTClient:
+    """Возвращает общий для процесса экземпляр клиента"""
+    global _ai_client
+    if _ai_client is None:
+        with _ai_client_lock:
+            if _ai_client is None:
+                _ai_client = YandexGPTClient()
+    return _ai_client
+
+def __getattr__(name: str):
+    # Совместимость со старым импортом: from ai_client import ai_client
+    if name == 'ai_client':
+        return get_ai_client()
+    raise AttributeError(f"module 'ai_client' has no attribute {name!r}")
@@ -0,0 +1,366 @@
+"""
+Модуль ai.py содержит AI эндпоинты (/api/ai/*) и аутентификацию (/api/auth/*).
+
+Раньше эти эндпоинты обслуживались отдельными процессами (Flask app.py и
+http.server server.py). Теперь это роутер внутри FastAPI приложения:
+все запросы используют один экземпляр YandexGPTClient, а значит
+один пул HTTP соединений и один кэш результатов.
+
+Форматы ответов сохранены, чтобы фронтенд (script.js) работал без изменений.
+"""
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ai_client import get_ai_client
+from app import analytics, chat_context, duplicates, jobs, models
+from app.auth import (
+    create_stream_token, create_token, get_current_user_id, get_stream_user_id,
+    hash_password, verify_password,
+)
+from app.config import get_settings
+from app.database import get_db
+from app.partitioning import USER_KEY, get_user_db
+from app.rate_limit import ai_admission, get_controller
+
+router = APIRouter(prefix="/api")
+
+# ============================================================================
+# PYDANTIC МОДЕЛИ ДЛЯ ВАЛИДАЦИИ ДАННЫХ
+# ============================================================================
+
+class AIProcessRequest(BaseModel):
+    """Текст, из которого нужно извлечь задачу."""
+    text: str = ""
+
+class AIChatRequest(BaseModel):
+    """Сообщение пользователя для чата с ассистентом."""
+    message: str = ""
+    # ID сессии чата из предыдущего ответа (None - начать новый разговор)
+    session_id: Optional[str] = None
+
+class AuthRequest(BaseModel):
+    """Данные для регистрации и входа."""
+    username: str = ""
+    email: str = ""
+    password: str = ""
+
+# ============================================================================
+# AI ЭНДПОИНТЫ
+# ============================================================================
+
+@router.get("/ai/status")
+def ai_status():
+    """
+    Статус AI сервиса.
+
+    Returns:
+        dict: режим работы (Yandex GPT или встроенный парсер), текущее время
+              и состояние очереди AI запросов (app/rate_limit.py)
+    """
+    ai_client = get_ai_client()
+    now = datetime.now()
+    return {
+        "status": "active",
+        "ai_provider": "Built-in Parser" if ai_client.is_demo else "Yandex GPT",
+        "is_real_ai": not ai_client.is_demo,
+        "time": now.strftime('%H:%M:%S'),
+        "timestamp": now.isoformat(),
+        "admission": get_controller().snapshot()
+    }
+
+@jobs.handler("process")
+def process_text(payload: dict) -> dict:
+    """
+    Извлекает задачи из текста: ответ /api/ai/process и результат
+    фонового задания process.
+
+    В одном тексте может быть несколько задач ("завтра купить хлеб, в
+    пятницу отчет и позвонить маме") - все они извлекаются одним запросом
+    к модели (ai_client.extract_tasks_with_ai).
+
+    Args:
+        payload (dict): {"text": текст задачи, "user_id": пользователь}
+
+    Returns:
+        dict: все задачи в поле "tasks" (у каждой свои похожие задачи
+              пользователя в поле "duplicates", app/duplicates.py). Первая
+              задача также в полях "task" (формат Flask сервера) и "result"
+              (формат http.server), ее похожие задачи - в "duplicates".
+              Для повторяющейся задачи recurrence - правило RRULE,
+              due_date - ближайшее повторение
+    """
+    user_text = payload["text"]
+    ai_client = get_ai_client()
+    print(f"📝 Получен текст: {user_text[:100]}")
+    results = ai_client.extract_tasks_with_ai(user_text)
+
+    base_id = int(datetime.now().timestamp() * 1000)
+    tasks = []
+    for index, result in enumerate(results):
+        due_date = result.get('due_date')
+        tasks.append({
+            "id": base_id + index,
+            "title": result.get('title') or user_text[:50],
+            "description": result.get('description'),
+            "due_date": due_date,
+            "due_date_display": ai_client.format_due_date_display(due_date),
+            "priority": result.get('priority', 'medium'),
+            "tags": result.get('tags') or ['задача'],
+            "recurrence": result.get('recurrence'),
+            "completed": False
+        })
+    if len(tasks) > 1:
+        print(f"✂️ Извлечено задач: {len(tasks)}")
+
+    # В заданиях, поставленных в очередь до появления поиска дубликатов,
+    # пользователя нет - для них поиск не выполняется
+    if "user_id" in payload:
+        for task in tasks:
+            task["duplicates"] = duplicates.find_for_user(payload["user_id"], task["title"], task["description"])
+
+    first = {key: value for key, value in tasks[0].items() if key != "duplicates"}
+    response = {
+        "success": True,
+        "task": first,
+        "result": first,
+        "tasks": tasks,
+        "is_real_ai": not ai_client.is_demo
+    }
+    if "user_id" in payload:
+        response["duplicates"] = tasks[0]["duplicates"]
+    return response
+
+# Эндпоинты объявлены синхронными: вызов внешнего API блокирующий,
+# FastAPI выполняет их в пуле потоков и не блокирует event loop.
+# Dependency ai_admission ограничивает число таких потоков и частоту
+# запросов; при перегрузке возвращается 429 с заголовком Retry-After
+@router.post("/ai/process", dependencies=[Depends(ai_admission)])
+def ai_process(
+    payload: AIProcessRequest,
+    mode: Literal["sync", "async"] = Query("sync", description="async - вернуть ID фонового задания сразу"),
+    priority: Literal["high", "normal", "low"] = Query("normal", description="Приоритет фонового задания"),
+    user_id: Optional[int] = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Извлекает структурированные задачи из текста пользователя (все задачи
+    текста - в поле "tasks", первая - в "task").
+
+    В режиме mode=async задача извлекается в фоне (app/jobs.py): ответ 202
+    с ID задания приходит сразу, результат - в GET /api/ai/jobs/{id}
+    или в потоке событий GET /api/ai/jobs/{id}/events.
+
+    Args:
+        payload (AIProcessRequest): текст задачи
+        mode (str): sync - дождаться результата, async - фоновое задание
+        priority (str): приоритет фонового задания
+        user_id (Optional[int]): пользователь из токена
+        db (Session): сессия основной базы данных (очередь заданий)
+
+    Returns:
+        dict: задачи (sync) или ID задания и ссылки для получения результата (async)
+    """
+    user_text = payload.text.strip()
+    if not user_text:
+        return JSONResponse(status_code=400, content={"error": "Текст не может быть пустым"})
+
+    if mode == "sync":
+        return process_text({"text": user_text, "user_id": user_id})
+
+    try:
+        job = jobs.enqueue(db, "process", {"text": user_text, "user_id": user_id}, user_id, priority)
+    except jobs.QueueFull:
+        raise HTTPException(
+            status_code=429,
+            detail="Очередь AI заданий переполнена, попробуйте позже",
+            headers={"Retry-After": "5"}
+        )
+
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/ai/jobs/{job.id}",
+        "events_url": f"/api/ai/jobs/{job.id}/events"
+    })
+
+@router.get("/ai/jobs/{job_id}")
+def ai_job(
+    job_id: str,
+    user_id: Optional[int] = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Статус и результат фонового AI задания.
+
+    Returns:
+        dict: задание; status - queued, running, done или failed,
+              result - ответ /api/ai/process (когда status = done)
+
+    Raises:
+        HTTPException: 404 если задания нет (или оно создано другим пользователем)
+    """
+    job = jobs.get_job(db, job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задание не найдено")
+    return jobs.job_to_dict(job)
+
+@router.get("/ai/jobs/{job_id}/events")
+async def ai_job_events(
+    job_id: str,
+    request: Request,
+    user_id: Optional[int] = Depends(get_stream_user_id)
+):
+    """
+    Server-Sent Events о фоновом AI задании: событие status при каждом
+    изменении статуса, поток закрывается после done или failed.
+    Токен передается в параметре ?token= (GET /api/auth/stream-token),
+    так как EventSource не отправляет заголовки.
+
+    Raises:
+        HTTPException: 404 если задания нет
+    """
+    events = await jobs.stream_events(job_id, user_id, request.is_disconnected)
+    if events is None:
+        raise HTTPException(status_code=404, detail="Задание не найдено")
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/ai/chat", dependencies=[Depends(ai_admission)])
+def ai_chat(payload: AIChatRequest, db: Session = Depends(get_user_db)):
+    """
+    Чат с AI ассистентом.
+
+    В запрос к модели добавляется контекст (app/chat_context.py): краткое
+    содержание и последние сообщения разговора и самые важные для
+    сообщения открытые задачи пользователя, в пределах
+    APP_CHAT_CONTEXT_TOKENS токенов.
+
+    Args:
+        payload (AIChatRequest): сообщение пользователя и ID сессии чата
+
+    Returns:
+        dict: ответ ассистента и session_id для следующего сообщения
+    """
+    message = payload.message.strip()
+    if not message:
+        return JSONResponse(status_code=400, content={"error": "Сообщение не может быть пустым"})
+
+    ai_client = get_ai_client()
+    session_id, session = chat_context.get_session(db.info.get(USER_KEY), payload.session_id)
+    # Сообщения одной сессии обрабатываются по очереди, чтобы история не перепуталась
+    with session.lock:
+        context = chat_context.build_context(db, message, session)
+        response = ai_client.chat_with_ai(message, context)
+        session.add_turn(message, response, ai_client.summarize_chat)
+    return {
+        "success": True,
+        "response": response,
+        "session_id": session_id,
+        "is_real_ai": not ai_client.is_demo
+    }
+
+@router.get("/ai/productivity", dependencies=[Depends(ai_admission)])
+def ai_productivity(db: Session = Depends(get_user_db)):
+    """
+    Анализ продуктивности пользователя.
+
+    Сводка считается агрегатами и потоковым проходом по задачам
+    (app/analytics.py) и передается в AI. Результат кэшируется
+    для пользователя до конца дня.
+
+    Returns:
+        dict: сводка показателей и текстовый анализ
+    """
+    # Анонимные запросы относятся к общему ключу кэша
+    user_id = db.info.get(USER_KEY)
+    user_key = "default" if user_id is None else str(user_id)
+    today = datetime.now().date()
+
+    cached = analytics.get_cached(user_key, today)
+    if cached is not None:
+        return cached
+
+    ai_client = get_ai_client()
+    summary = analytics.productivity_summary(db)
+    result = {
+        "success": True,
+        "summary": summary,
+        "analysis": ai_client.analyze_productivity(summary),
+        "is_real_ai": not ai_client.is_demo
+    }
+    analytics.store_cached(user_key, today, result)
+    return result
+
+# ============================================================================
+# АУТЕНТИФИКАЦИЯ
+# ============================================================================
+# Пользователи хранятся в основной базе данных (get_db), даже если задачи
+# разнесены по шардам. Токен передается в заголовке Authorization: Bearer <токен>,
+# а для потоков событий - короткоживущий токен в параметре ?token=.
+
+def _auth_response(user: models.User, message: str) -> dict:
+    """Ответ регистрации и входа: пользователь и токен."""
+    return {
+        "success": True,
+        "message": message,
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email
+        },
+        "token": create_token(user.id)
+    }
+
+@router.post("/auth/register")
+def auth_register(payload: AuthRequest, db: Session = Depends(get_db)):
+    """Регистрация: создает пользователя и возвращает токен."""
+    email = payload.email.strip().lower()
+    if not email or not payload.password:
+        raise HTTPException(status_code=400, detail="Email и пароль обязательны")
+    if db.query(models.User).filter(models.User.email == email).first():
+        raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
+
+    user = models.User(
+        username=payload.username.strip() or email.split('@')[0],
+        email=email,
+        password_hash=hash_password(payload.password)
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return _auth_response(user, "Регистрация успешна")
+
+@router.post("/auth/login")
+def auth_login(payload: AuthRequest, db: Session = Depends(get_db)):
+    """Вход по email и паролю."""
+    email = payload.email.strip().lower()
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user is None or not verify_password(payload.password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Неверный email или пароль")
+    return _auth_response(user, "Вход выполнен")
+
+@router.get("/auth/stream-token")
+def auth_stream_token(user_id: Optional[int] = Depends(get_current_user_id)):
+    """
+    Короткоживущий токен для подключения к потокам событий
+    (/tasks/reminders/events, /api/ai/jobs/{id}/events) через ?token=.
+
+    Raises:
+        HTTPException: 401 для запроса без токена авторизации
+    """
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Требуется авторизация")
+    return {
+        "token": create_stream_token(user_id),
+        "expires_in": get_settings().stream_token_ttl_seconds
+    }
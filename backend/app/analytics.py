@@ -0,0 +1,137 @@
+"""
+Модуль analytics.py считает показатели продуктивности пользователя.
+
+Задачи не загружаются в память целиком:
+- счетчики (всего, выполнено, просрочено) считаются агрегатами в SQL;
+- показатели, которые зависят от дат (опоздания, выполнения по дням
+  недели, серии дней подряд), считаются за один проход генератором по
+  выполненным задачам, упорядоченным по completed_at. Строки читаются
+  порциями (yield_per), поэтому память не зависит от числа задач.
+
+Результат - компактная сводка, которая передается в промпт
+TaskPrompts.analyze_productivity_prompt вместо списка задач.
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+
+WEEKDAYS = ("пн", "вт", "ср", "чт", "пт", "сб", "вс")
+
+# Сколько открытых задач показывать в сводке
+RECENT_OPEN_TASKS = 5
+
+# Размер порции строк при потоковом чтении
+STREAM_BATCH_SIZE = 1000
+
+def _completions(db: Session) -> Iterator[Tuple[datetime, Optional[datetime]]]:
+    """Генератор (completed_at, due_date) выполненных задач по возрастанию completed_at."""
+    query = db.query(models.Task.completed_at, models.Task.due_date).filter(
+        models.Task.completed_at.isnot(None)
+    ).order_by(models.Task.completed_at).yield_per(STREAM_BATCH_SIZE)
+    for completed_at, due_date in query:
+        yield completed_at, due_date
+
+def _stream_metrics(rows: Iterator[Tuple[datetime, Optional[datetime]]], today: date) -> Dict:
+    """Опоздания, выполнения по дням недели и серии за один проход."""
+    per_weekday = [0] * 7
+    late = 0
+    on_time = 0
+    late_hours_total = 0.0
+
+    longest_streak = 0
+    streak = 0
+    last_day = None
+
+    for completed_at, due_date in rows:
+        per_weekday[completed_at.weekday()] += 1
+
+        if due_date is not None:
+            if completed_at > due_date:
+                late += 1
+                late_hours_total += (completed_at - due_date).total_seconds() / 3600
+            else:
+                on_time += 1
+
+        day = completed_at.date()
+        if day != last_day:
+            streak = streak + 1 if last_day is not None and day - last_day == timedelta(days=1) else 1
+            longest_streak = max(longest_streak, streak)
+            last_day = day
+
+    # Текущая серия продолжается, если последнее выполнение было сегодня или вчера
+    current_streak = streak if last_day is not None and today - last_day <= timedelta(days=1) else 0
+
+    return {
+        "completed_on_time": on_time,
+        "completed_late": late,
+        "average_lateness_hours": round(late_hours_total / late, 1) if late else 0.0,
+        "completed_per_weekday": dict(zip(WEEKDAYS, per_weekday)),
+        "current_streak_days": current_streak,
+        "longest_streak_days": longest_streak
+    }
+
+def productivity_summary(db: Session, now: Optional[datetime] = None) -> Dict:
+    """
+    Строит сводку продуктивности.
+
+    Args:
+        db: сессия базы данных
+        now: текущее время (для тестов и бенчмарков)
+
+    Returns:
+        dict: всего задач, выполнено, процент выполнения, просроченные,
+              опоздания, выполнения по дням недели, серии и несколько открытых задач
+    """
+    now = now or datetime.now()
+    Task = models.Task
+
+    total, completed = db.query(
+        func.count(Task.id),
+        func.count(Task.id).filter(Task.is_completed == True)
+    ).one()
+    overdue = db.query(func.count(Task.id)).filter(
+        Task.is_completed == False, Task.due_date < now
+    ).scalar()
+
+    recent_open = db.query(Task.title, Task.due_date, Task.priority).filter(
+        Task.is_completed == False
+    ).order_by(Task.created_at.desc()).limit(RECENT_OPEN_TASKS).all()
+
+    summary = {
+        "total": total,
+        "completed": completed,
+        "completion_rate": round(completed / total * 100, 1) if total else 0.0,
+        "overdue_open": overdue
+    }
+    summary.update(_stream_metrics(_completions(db), now.date()))
+    summary["recent_open_tasks"] = [
+        {
+            "title": title,
+            "due_date": due_date.strftime('%Y-%m-%d %H:%M') if due_date else None,
+            "priority": priority
+        }
+        for title, due_date, priority in recent_open
+    ]
+    return summary
+
+# Кэш результата анализа: ключ - (пользователь, дата)
+_cache: Dict[Tuple[str, date], Dict] = {}
+_cache_lock = threading.Lock()
+
+def get_cached(user_key: str, day: date) -> Optional[Dict]:
+    """Результат анализа, уже посчитанный для пользователя сегодня."""
+    with _cache_lock:
+        return _cache.get((user_key, day))
+
+def store_cached(user_key: str, day: date, result: Dict) -> None:
+    """Сохраняет результат анализа; записи за прошлые дни удаляются."""
+    with _cache_lock:
+        for key in [key for key in _cache if key[1] != day]:
+            del _cache[key]
+        _cache[(user_key, day)] = result
@@ -0,0 +1,274 @@
+"""
+Модуль archive.py переносит старые выполненные задачи в холодное хранилище.
+
+Выполненные задачи раньше оставались в таблице tasks навсегда, и таблица
+вместе с индексами только росла. Теперь фоновая задача переносит задачи,
+выполненные больше APP_ARCHIVE_AFTER_DAYS дней назад, в таблицу
+archived_tasks той же базы данных:
+- перенос идет порциями по APP_ARCHIVE_BATCH_SIZE задач, каждая порция -
+  отдельная короткая транзакция, между порциями - пауза, поэтому блокировка
+  записи SQLite не удерживается долго;
+- задачи удаляются через ORM, поэтому счетчики task_stats, счетчики тегов
+  и кэш календаря обновляются так же, как при обычном удалении;
+- после каждой порции SQLite возвращает освободившиеся страницы
+  (PRAGMA incremental_vacuum), а не делает полный VACUUM.
+
+Архив доступен в GET /tasks?include_archived=true: страница собирается
+слиянием двух упорядоченных запросов (tasks и archived_tasks).
+
+Та же фоновая задача удаляет старые отметки об удаленных задачах
+(sync.compact_tombstones).
+
+Если сервер запущен в нескольких процессах, переносить задачи лучше одним
+процессом: APP_ARCHIVE_INTERVAL_SECONDS=0 для сервера и запуск по расписанию:
+    python -m app.archive           # перенести все подходящие задачи
+    python -m app.archive --vacuum  # включить auto_vacuum в существующей базе SQLite
+"""
+
+import argparse
+import asyncio
+import heapq
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import List, Optional, Union
+
+import anyio.to_thread
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from app import crud, models, sync
+from app.config import get_settings
+from app.database import SessionLocal, init_db
+
+def archive_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Задачи, выполненные раньше этого момента, переносятся в архив."""
+    return (now or datetime.now()) - timedelta(days=get_settings().archive_after_days)
+
+def _to_archive(task: models.Task) -> dict:
+    """Строка archived_tasks для задачи."""
+    return {
+        "task_id": task.id,
+        "user_id": task.user_id,
+        "title": task.title,
+        "description": task.description,
+        "created_at": task.created_at,
+        "updated_at": task.updated_at,
+        "due_date": task.due_date,
+        "priority": task.priority,
+        "completed_at": task.completed_at,
+        "tags": "," + "".join(tag.name + "," for tag in task.tags)
+    }
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """
+    Переносит в архив одну порцию задач и сохраняет изменения.
+
+    Args:
+        db: сессия базы данных (без ограничения пользователем)
+        cutoff: граница времени выполнения
+        batch_size: максимальное число задач в порции
+
+    Returns:
+        int: сколько задач перенесено
+    """
+    Task = models.Task
+    # Задачи, выполненные до появления completed_at, определяются по updated_at
+    tasks = db.query(Task).filter(
+        Task.is_completed == True,
+        or_(
+            Task.completed_at < cutoff,
+            and_(Task.completed_at.is_(None), Task.updated_at < cutoff)
+        )
+    ).order_by(Task.id).limit(batch_size).all()
+    if not tasks:
+        return 0
+
+    db.bulk_insert_mappings(models.ArchivedTask, [_to_archive(task) for task in tasks])
+
+    # Счетчики тегов уменьшаются одним UPDATE на каждое значение изменения
+    removed = Counter(tag for task in tasks for tag in task.tags)
+    by_delta = {}
+    for tag, count in removed.items():
+        by_delta.setdefault(count, []).append(tag)
+    for count, tags in by_delta.items():
+        crud._change_tag_counts(db, tags, -count)
+
+    # Связи task_tags удаляются вместе с задачами (relationship secondary)
+    for task in tasks:
+        db.delete(task)
+    db.commit()
+    return len(tasks)
+
+def _incremental_vacuum(bind: Engine) -> None:
+    """Возвращает файловой системе часть свободных страниц SQLite."""
+    if bind.dialect.name != "sqlite":
+        return
+    connection = bind.raw_connection()
+    try:
+        # execute в sqlite3 делает только один шаг прагмы (одна страница),
+        # executescript выполняет ее до конца
+        connection.driver_connection.executescript(
+            f"PRAGMA incremental_vacuum({get_settings().archive_vacuum_pages});"
+        )
+    finally:
+        connection.close()
+
+def archive_engine(bind: Engine, cutoff: Optional[datetime] = None) -> int:
+    """
+    Переносит в архив все подходящие задачи одной базы данных.
+
+    Returns:
+        int: сколько задач перенесено
+    """
+    settings = get_settings()
+    cutoff = cutoff or archive_cutoff()
+    moved = 0
+    while True:
+        db = SessionLocal(bind=bind)
+        try:
+            count = archive_batch(db, cutoff, settings.archive_batch_size)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        moved += count
+        if count:
+            _incremental_vacuum(bind)
+        if count < settings.archive_batch_size:
+            return moved
+        time.sleep(settings.archive_batch_pause_ms / 1000)
+
+def archive_all(cutoff: Optional[datetime] = None) -> int:
+    """
+    Переносит в архив задачи во всех базах (основной и шардах)
+    и удаляет старые отметки об удаленных задачах.
+    """
+    from app.partitioning import router
+
+    moved = 0
+    for bind in router.all_engines():
+        try:
+            if get_settings().archive_after_days > 0:
+                moved += archive_engine(bind, cutoff)
+            sync.compact_tombstones(bind)
+        except Exception as e:
+            # Например, ту же порцию одновременно перенес другой процесс
+            print(f"⚠️ Ошибка архивации ({bind.url.render_as_string(hide_password=True)}): {e}")
+    if moved:
+        print(f"🗄️ В архив перенесено задач: {moved}")
+    return moved
+
+async def archive_loop() -> None:
+    """Фоновая задача сервера: периодически переносит задачи в архив."""
+    settings = get_settings()
+    while True:
+        await anyio.to_thread.run_sync(archive_all)
+        await asyncio.sleep(settings.archive_interval_seconds)
+
+# --- Чтение вместе с архивом ---
+
+def _archived_query(db: Session, completed: Optional[bool], tag: Optional[str]) -> Optional[Query]:
+    """Запрос к архиву с теми же фильтрами, что и к tasks (None - архив не подходит)."""
+    if completed is False:
+        # В архиве только выполненные задачи
+        return None
+    query = db.query(models.ArchivedTask)
+    if tag is not None:
+        query = query.filter(models.ArchivedTask.tags.contains(f",{tag.strip().lower()},", autoescape=True))
+    return query
+
+def count_archived(db: Session, completed: Optional[bool] = None, tag: Optional[str] = None) -> int:
+    """Количество задач в архиве (с фильтрацией)."""
+    query = _archived_query(db, completed, tag)
+    if query is None:
+        return 0
+    return query.with_entities(func.count(models.ArchivedTask.id)).scalar()
+
+def merge_with_archived(
+    db: Session,
+    query: Query,
+    skip: int,
+    limit: int,
+    completed: Optional[bool] = None,
+    tag: Optional[str] = None
+) -> List[Union[models.Task, models.ArchivedTask]]:
+    """
+    Страница задач вместе с архивом, новые сначала.
+
+    Из каждого хранилища читается не больше skip + limit строк по индексам
+    (user_id, created_at), затем упорядоченные списки сливаются.
+
+    Args:
+        db: сессия базы данных
+        query: запрос к tasks с уже примененными фильтрами
+        skip: сколько задач пропустить
+        limit: максимальное количество задач
+        completed: фильтр по статусу выполнения
+        tag: фильтр по тегу
+
+    Returns:
+        list: объекты Task и ArchivedTask в порядке (created_at, id) по убыванию
+    """
+    window = skip + limit
+    hot = query.order_by(models.Task.created_at.desc(), models.Task.id.desc()).limit(window).all()
+
+    cold = []
+    archived_query = _archived_query(db, completed, tag)
+    if archived_query is not None:
+        cold = archived_query.order_by(
+            models.ArchivedTask.created_at.desc(), models.ArchivedTask.task_id.desc()
+        ).limit(window).all()
+
+    merged = heapq.merge(
+        hot, cold,
+        key=lambda task: (task.created_at, getattr(task, "task_id", task.id)),
+        reverse=True
+    )
+    return list(islice(merged, skip, window))
+
+def archived_to_dict(task: models.ArchivedTask) -> dict:
+    """Задача из архива в том же формате, что и task_to_dict в main.py."""
+    return {
+        "id": task.task_id,
+        "title": task.title,
+        "description": task.description,
+        "is_completed": True,
+        "created_at": task.created_at.isoformat() if task.created_at else None,
+        "updated_at": task.updated_at.isoformat() if task.updated_at else None,
+        "due_date": task.due_date.isoformat() if task.due_date else None,
+        "priority": task.priority,
+        "tags": task.tag_names,
+        "recurrence": None,
+        "archived": True
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Перенос старых выполненных задач в архив")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="выполнить VACUUM, чтобы включить auto_vacuum = INCREMENTAL")
+    args = parser.parse_args(argv)
+
+    # Создает таблицу archived_tasks в базе, созданной предыдущей версией
+    # (шарды инициализируются при первом обращении)
+    init_db()
+
+    if args.vacuum:
+        from app.partitioning import router
+
+        for bind in router.all_engines():
+            if bind.dialect.name == "sqlite":
+                with bind.connect() as connection:
+                    connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        print("✅ VACUUM выполнен")
+
+    archive_all()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
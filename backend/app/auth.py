@@ -0,0 +1,167 @@
+"""
+Модуль auth.py отвечает за пароли и токены авторизации.
+
+Пароли хранятся как PBKDF2-хэш с солью. Токен - это подписанная HMAC
+строка "<user_id>.<срок действия>.<подпись>": проверка не требует
+запроса к базе данных, поэтому определение пользователя для каждого
+запроса ничего не стоит.
+
+Браузерный EventSource не умеет отправлять заголовок Authorization, поэтому
+для потоков событий (Server-Sent Events) выдается отдельный короткоживущий
+токен, который передается в параметре ?token=. Он подписан с другой
+областью действия: токеном из URL (который может попасть в логи) нельзя
+авторизовать обычный запрос, и наоборот.
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Optional
+
+from fastapi import Header, HTTPException, Query
+
+from app.config import get_settings
+
+PBKDF2_ITERATIONS = 200_000
+
+# Область действия токенов для потоков событий (добавляется к подписываемой строке)
+STREAM_SCOPE = "stream"
+
+def hash_password(password: str) -> str:
+    """Возвращает строку "pbkdf2$<итерации>$<соль>$<хэш>"."""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS)
+    return "pbkdf2${}${}${}".format(
+        PBKDF2_ITERATIONS,
+        base64.b64encode(salt).decode(),
+        base64.b64encode(digest).decode()
+    )
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Проверяет пароль по хэшу из hash_password."""
+    try:
+        _, iterations, salt, digest = password_hash.split("$")
+        expected = hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), base64.b64decode(salt), int(iterations)
+        )
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(expected, base64.b64decode(digest))
+
+# Ключ на случай, если APP_SECRET_KEY не задан. Создается при импорте,
+# поэтому при APP_PRELOAD=true он общий для всех воркеров gunicorn, а без
+# preload у каждого воркера свой (см. check_workers_secret_key)
+_RANDOM_KEY = secrets.token_bytes(32)
+
+# Значение по умолчанию прежних версий: оно опубликовано, подписывать им нельзя
+_PUBLIC_KEYS = {"", "change-me"}
+
+def _secret_key() -> bytes:
+    key = get_settings().secret_key
+    return _RANDOM_KEY if key in _PUBLIC_KEYS else key.encode()
+
+def check_secret_key() -> None:
+    """
+    Проверяет ключ подписи токенов при старте приложения.
+    
+    Raises:
+        RuntimeError: если APP_REQUIRE_AUTH=true, а APP_SECRET_KEY не задан
+    """
+    settings = get_settings()
+    if settings.secret_key not in _PUBLIC_KEYS:
+        return
+    if settings.require_auth:
+        raise RuntimeError("APP_SECRET_KEY не задан: без него токены может подписать кто угодно")
+    print("⚠️ APP_SECRET_KEY не задан: токены подписываются случайным ключом и перестанут действовать после перезапуска")
+
+def check_workers_secret_key(workers: int, preload: bool) -> None:
+    """
+    Проверяет ключ подписи токенов перед запуском воркеров (serve.py).
+    
+    Без APP_SECRET_KEY каждый процесс создает свой случайный ключ, и если
+    приложение не загружено в мастер-процессе до fork, токен, выданный
+    одним воркером, остальные отклоняют.
+    
+    Args:
+        workers: число процессов-воркеров
+        preload: воркеры получают приложение (и ключ) из мастер-процесса
+    
+    Raises:
+        RuntimeError: если воркеров несколько, preload нет, а APP_SECRET_KEY не задан
+    """
+    if workers > 1 and not preload and get_settings().secret_key in _PUBLIC_KEYS:
+        raise RuntimeError(
+            "APP_SECRET_KEY не задан: у каждого из воркеров был бы свой случайный ключ, "
+            "и токены одного воркера не принимали бы другие"
+        )
+
+def _sign(payload: str) -> str:
+    return hmac.new(_secret_key(), payload.encode(), hashlib.sha256).hexdigest()
+
+def _create(user_id: int, ttl_seconds: int, scope: str = "") -> str:
+    expires = int(time.time()) + ttl_seconds
+    payload = f"{user_id}.{expires}"
+    return f"{payload}.{_sign(scope + payload)}"
+
+def create_token(user_id: int) -> str:
+    """Создает токен для пользователя."""
+    return _create(user_id, get_settings().token_ttl_hours * 3600)
+
+def create_stream_token(user_id: int) -> str:
+    """Создает короткоживущий токен для подключения к потоку событий."""
+    return _create(user_id, get_settings().stream_token_ttl_seconds, STREAM_SCOPE)
+
+def read_token(token: str, scope: str = "") -> Optional[int]:
+    """Возвращает user_id из токена или None, если токен неверный или просрочен."""
+    try:
+        user_id, expires, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(f"{scope}{user_id}.{expires}")):
+            return None
+        if int(expires) < time.time():
+            return None
+        return int(user_id)
+    except ValueError:
+        return None
+
+def get_current_user_id(authorization: Optional[str] = Header(None)) -> Optional[int]:
+    """
+    Dependency FastAPI: определяет пользователя по заголовку
+    Authorization: Bearer <токен>.
+
+    Returns:
+        Optional[int]: ID пользователя или None для анонимного запроса
+
+    Raises:
+        HTTPException: 401 если токен неверный или если токен обязателен
+    """
+    if not authorization:
+        if get_settings().require_auth:
+            raise HTTPException(status_code=401, detail="Требуется авторизация")
+        return None
+
+    scheme, _, token = authorization.partition(" ")
+    user_id = read_token(token) if scheme.lower() == "bearer" else None
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Неверный токен")
+    return user_id
+
+def get_stream_user_id(
+    token: Optional[str] = Query(None, description="Токен потока событий (GET /api/auth/stream-token)"),
+    authorization: Optional[str] = Header(None)
+) -> Optional[int]:
+    """
+    Dependency FastAPI для потоков событий: пользователь по параметру
+    ?token= (токен из create_stream_token) или, если его нет, по заголовку
+    Authorization, как в get_current_user_id.
+
+    Raises:
+        HTTPException: 401 если токен неверный или просрочен
+    """
+    if token is None:
+        return get_current_user_id(authorization)
+    user_id = read_token(token, STREAM_SCOPE)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Неверный токен")
+    return user_id
@@ -0,0 +1,183 @@
+"""
+Модуль calendar_view.py строит сводку задач по дням месяца для календаря.
+
+Раньше календарь на фронтенде фильтровал весь список задач для каждой
+ячейки дня (O(дней × задач)). Теперь сервер возвращает готовые счетчики:
+один GROUP BY по дню, приоритету и статусу по диапазону индекса
+ix_tasks_user_due_date_calendar и один запрос с оконной функцией для первых
+названий задач каждого дня.
+
+Повторяющиеся задачи в запросах не участвуют: их повторения за месяц
+вычисляются по правилу (app/recurrence.py) и добавляются к счетчикам.
+
+Результат кэшируется по месяцу. Кэш сбрасывается после commit, который
+затрагивает задачи этого месяца (см. app/events.py), а изменение
+повторяющейся задачи - все месяцы пользователя. Кэш живет в памяти
+процесса, поэтому записи, сделанные другими воркерами, он не видит -
+на этот случай у записей есть срок жизни CACHE_TTL_SECONDS.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models, recurrence
+from app.events import on_tasks_changed
+
+# Сколько названий задач возвращать для каждого дня
+TITLES_PER_DAY = 3
+
+# Срок жизни записи кэша (страховка от записей в других процессах)
+CACHE_TTL_SECONDS = 60
+
+PRIORITIES = ("high", "medium", "low")
+
+# Ключ кэша - (пользователь, год, месяц)
+_cache: Dict[Tuple[Optional[int], int, int], Tuple[float, dict]] = {}
+_cache_lock = threading.Lock()
+
+# Номер поколения кэша: увеличивается при каждом сбросе. Результат,
+# построенный до сброса, не сохраняется - иначе он вернул бы старые данные
+_generation = 0
+
+def month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    """Начало месяца и начало следующего месяца."""
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+def _empty_day(day: str) -> dict:
+    return {
+        "date": day,
+        "total": 0,
+        "completed": 0,
+        "priority": {priority: {"open": 0, "completed": 0} for priority in PRIORITIES},
+        "titles": []
+    }
+
+def build_month(db: Session, year: int, month: int) -> dict:
+    """
+    Строит сводку месяца запросами к базе данных (без кэша).
+
+    Args:
+        db: сессия базы данных
+        year: год
+        month: месяц (1-12)
+
+    Returns:
+        dict: {"month": "YYYY-MM", "days": [...]} - только дни, в которых есть задачи
+    """
+    start, end = month_bounds(year, month)
+    day = func.date(models.Task.due_date)
+    in_month = (models.Task.due_date >= start, models.Task.due_date < end, models.Task.recurrence.is_(None))
+
+    days: Dict[str, dict] = {}
+    # Кандидаты в titles каждого дня: (срок, ID, запись)
+    titles: Dict[str, list] = {}
+
+    # Счетчики по дню, приоритету и статусу
+    counts = db.query(
+        day, models.Task.priority, models.Task.is_completed, func.count()
+    ).filter(*in_month).group_by(day, models.Task.priority, models.Task.is_completed)
+
+    for day_value, priority, is_completed, count in counts:
+        key = str(day_value)
+        entry = days.setdefault(key, _empty_day(key))
+        entry["total"] += count
+        if is_completed:
+            entry["completed"] += count
+        bucket = entry["priority"].setdefault(priority, {"open": 0, "completed": 0})
+        bucket["completed" if is_completed else "open"] += count
+
+    # Первые TITLES_PER_DAY задач каждого дня (по времени срока)
+    position = func.row_number().over(
+        partition_by=day, order_by=(models.Task.due_date, models.Task.id)
+    ).label("position")
+    ranked = db.query(
+        day.label("day"), models.Task.id, models.Task.title, models.Task.due_date,
+        models.Task.priority, models.Task.is_completed, position
+    ).filter(*in_month).subquery()
+
+    first_titles = db.query(ranked).filter(ranked.c.position <= TITLES_PER_DAY).order_by(
+        ranked.c.day, ranked.c.position
+    )
+    for row in first_titles:
+        titles.setdefault(str(row.day), []).append((row.due_date, row.id, {
+            "id": row.id,
+            "title": row.title,
+            "priority": row.priority,
+            "is_completed": bool(row.is_completed)
+        }))
+
+    # Повторения повторяющихся задач за месяц (выполненные - из исключений)
+    tasks = recurrence.recurring_tasks(db, before=end)
+    completed = recurrence.completed_occurrences(db, (task.id for task in tasks), start, end)
+    for occurrence in recurrence.expand(tasks, start, end, completed, include_completed=True):
+        key = occurrence.due_date.strftime("%Y-%m-%d")
+        entry = days.setdefault(key, _empty_day(key))
+        entry["total"] += 1
+        if occurrence.is_completed:
+            entry["completed"] += 1
+        bucket = entry["priority"].setdefault(occurrence.priority, {"open": 0, "completed": 0})
+        bucket["completed" if occurrence.is_completed else "open"] += 1
+        titles.setdefault(key, []).append((occurrence.due_date, occurrence.id, {
+            "id": occurrence.id,
+            "title": occurrence.title,
+            "priority": occurrence.priority,
+            "is_completed": occurrence.is_completed,
+            "occurrence": occurrence.due_date.isoformat()
+        }))
+
+    for key, candidates in titles.items():
+        candidates.sort(key=lambda candidate: candidate[:2])
+        days[key]["titles"] = [item for _, _, item in candidates[:TITLES_PER_DAY]]
+
+    return {
+        "month": f"{year:04d}-{month:02d}",
+        "days": [days[key] for key in sorted(days)]
+    }
+
+def get_month(db: Session, year: int, month: int) -> dict:
+    """Сводка месяца пользователя сессии из кэша или из базы данных."""
+    key = (db.info.get("user_id"), year, month)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        generation = _generation
+
+    result = build_month(db, year, month)
+
+    with _cache_lock:
+        if generation == _generation:
+            _cache[key] = (now + CACHE_TTL_SECONDS, result)
+    return result
+
+@on_tasks_changed
+def _invalidate_months(changes):
+    """
+    Сбрасывает кэш месяцев, в которых был старый или новый срок задачи.
+    Повторения задачи могут быть в любом месяце, поэтому ее изменение
+    сбрасывает все месяцы пользователя.
+    """
+    global _generation
+    months = set()
+    users = set()
+    for change in changes:
+        for values in (change.old, change.new):
+            if values and values.get("recurrence"):
+                users.add(values["user_id"])
+            elif values and values.get("due_date"):
+                months.add((values["user_id"], values["due_date"].year, values["due_date"].month))
+    if months or users:
+        with _cache_lock:
+            _generation += 1
+            for key in months:
+                _cache.pop(key, None)
+            for key in [key for key in _cache if key[0] in users]:
+                del _cache[key]
@@ -0,0 +1,283 @@
+"""
+Модуль chat_context.py собирает контекст для чата с AI ассистентом
+(POST /api/ai/chat).
+
+Контекст ограничен бюджетом APP_CHAT_CONTEXT_TOKENS токенов (токены
+оцениваются по длине текста, с запасом) и состоит из двух частей:
+
+1. История разговора. Для каждой сессии чата (session_id) в памяти процесса
+   хранятся краткое содержание разговора и последние сообщения. Когда
+   последние сообщения превышают APP_CHAT_HISTORY_TOKENS, самые старые
+   сворачиваются в краткое содержание (ai_client.summarize_chat), поэтому
+   в модель не отправляется вся переписка.
+2. Открытые задачи пользователя, самые важные для сообщения: похожие на
+   текст сообщения (TF-IDF индекс app/similar.py), просроченные, со
+   сроком в ближайшие дни и с высоким приоритетом. Задачи добавляются по
+   убыванию оценки, пока помещаются в оставшийся бюджет.
+
+Срочные задачи (без учета сообщения) кэшируются для пользователя, пока его
+задачи не изменятся (app/events.py), но не дольше CANDIDATES_TTL_SECONDS -
+на случай записей из других процессов.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models, similar
+from app.config import get_settings
+from app.events import on_tasks_changed
+from app.partitioning import USER_KEY
+
+# Оценка числа токенов: в русском тексте токен - около 3-4 символов,
+# берем меньшее значение, чтобы бюджет не превышался
+CHARS_PER_TOKEN = 3
+
+# Сколько задач рассматривать: срочные из базы и похожие на сообщение
+URGENT_CANDIDATES = 50
+SIMILAR_CANDIDATES = 20
+
+# Вес сходства с сообщением (0-1) относительно срока и приоритета (до 4)
+RELEVANCE_WEIGHT = 6.0
+
+# Доля бюджета, которую может занять краткое содержание разговора
+SUMMARY_SHARE = 0.25
+
+# Срок жизни кэша срочных задач пользователя
+CANDIDATES_TTL_SECONDS = 300
+
+# Сессии чата: сколько хранить и сколько хранить без новых сообщений
+MAX_SESSIONS = 1000
+SESSION_TTL_SECONDS = 24 * 3600
+
+def estimate_tokens(text: str) -> int:
+    """Оценка числа токенов текста (с запасом)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def truncate_tokens(text: str, tokens: int, keep_end: bool = False) -> str:
+    """Обрезает текст до оценки в tokens токенов (keep_end - оставить конец)."""
+    limit = max(0, (tokens - 1) * CHARS_PER_TOKEN)
+    if len(text) <= limit:
+        return text
+    if limit <= 1:
+        return ""
+    return "…" + text[-(limit - 1):] if keep_end else text[:limit - 1] + "…"
+
+# --- Задачи ---
+
+def _task_line(task: models.Task, now: datetime) -> str:
+    """Строка задачи для контекста: название, срок, приоритет и теги."""
+    details = []
+    if task.due_date is not None:
+        if task.due_date < now:
+            details.append(f"просрочена с {task.due_date:%d.%m %H:%M}")
+        elif task.due_date.date() == now.date():
+            details.append(f"сегодня в {task.due_date:%H:%M}")
+        elif task.due_date.date() == now.date() + timedelta(days=1):
+            details.append(f"завтра в {task.due_date:%H:%M}")
+        else:
+            details.append(f"срок {task.due_date:%d.%m.%Y %H:%M}")
+    if task.priority == "high":
+        details.append("приоритет высокий")
+    if task.tags:
+        details.append("теги: " + ", ".join(tag.name for tag in task.tags))
+    suffix = f" ({'; '.join(details)})" if details else ""
+    return f"- {task.title}{suffix}"
+
+def _urgency(task: models.Task, now: datetime) -> float:
+    """Важность задачи без учета сообщения: срок и приоритет."""
+    score = {"high": 1.0, "medium": 0.3}.get(task.priority, 0.0)
+    if task.due_date is not None:
+        if task.due_date < now:
+            score += 3.0
+        elif task.due_date < now + timedelta(days=1):
+            score += 2.5
+        elif task.due_date < now + timedelta(days=7):
+            score += 1.5
+        else:
+            score += 0.5
+    return score
+
+# Кандидат: (оценка, ID задачи, строка, токены строки)
+Candidate = Tuple[float, int, str, int]
+
+def _candidate(task: models.Task, score: float, now: datetime) -> Candidate:
+    line = _task_line(task, now)
+    return score, task.id, line, estimate_tokens(line) + 1
+
+def _load_urgent(db: Session, now: datetime) -> List[Candidate]:
+    """Срочные открытые задачи: ближайшие сроки и высокий приоритет без срока."""
+    Task = models.Task
+    # Диапазон частичного индекса ix_tasks_user_open_due_date
+    with_due = (
+        db.query(Task)
+        .filter(Task.is_completed == False, Task.due_date.isnot(None), Task.recurrence.is_(None))
+        .order_by(Task.due_date)
+        .limit(URGENT_CANDIDATES)
+        .all()
+    )
+    important = (
+        db.query(Task)
+        .filter(Task.is_completed == False, Task.due_date.is_(None), Task.priority == "high")
+        .order_by(Task.created_at.desc())
+        .limit(URGENT_CANDIDATES // 2)
+        .all()
+    )
+    return [_candidate(task, _urgency(task, now), now) for task in with_due + important]
+
+_generations: Dict[Optional[int], int] = {}
+_candidates: Dict[Optional[int], Tuple[int, date, float, List[Candidate]]] = {}
+_candidates_lock = threading.Lock()
+
+def urgent_candidates(db: Session, now: datetime) -> List[Candidate]:
+    """Срочные задачи пользователя сессии (из кэша, пока задачи не изменились)."""
+    user_id = db.info.get(USER_KEY)
+    with _candidates_lock:
+        generation = _generations.get(user_id, 0)
+        cached = _candidates.get(user_id)
+        if (cached is not None and cached[0] == generation and cached[1] == now.date()
+                and cached[2] > time.monotonic()):
+            return cached[3]
+
+    candidates = _load_urgent(db, now)
+    with _candidates_lock:
+        # Если задачи изменились во время чтения, кэш не сохраняется
+        if _generations.get(user_id, 0) == generation:
+            _candidates[user_id] = (generation, now.date(), time.monotonic() + CANDIDATES_TTL_SECONDS, candidates)
+    return candidates
+
+def similar_candidates(db: Session, message: str, now: datetime) -> List[Candidate]:
+    """Открытые задачи, похожие на сообщение (оценка растет со сходством)."""
+    matches = dict(similar.find(db, message, SIMILAR_CANDIDATES))
+    if not matches:
+        return []
+    Task = models.Task
+    tasks = db.query(Task).filter(Task.id.in_(list(matches)), Task.is_completed == False).all()
+    return [_candidate(task, RELEVANCE_WEIGHT * matches[task.id] + _urgency(task, now), now) for task in tasks]
+
+def select_tasks(candidates: List[Candidate], budget: int) -> Tuple[List[str], int]:
+    """
+    Строки задач с наибольшей оценкой, которые помещаются в бюджет.
+
+    Returns:
+        Tuple[List[str], int]: строки (самые важные сначала) и их токены
+    """
+    best: Dict[int, Candidate] = {}
+    for candidate in candidates:
+        if candidate[1] not in best or candidate[0] > best[candidate[1]][0]:
+            best[candidate[1]] = candidate
+    lines, used = [], 0
+    for _, _, line, tokens in sorted(best.values(), key=lambda item: (-item[0], item[1])):
+        if used + tokens <= budget:
+            lines.append(line)
+            used += tokens
+    return lines, used
+
+@on_tasks_changed
+def _invalidate(changes) -> None:
+    """Сбрасывает кэш срочных задач пользователей, чьи задачи изменились."""
+    users = set()
+    for change in changes:
+        for values in (change.old, change.new):
+            if values is not None:
+                users.add(values["user_id"])
+    with _candidates_lock:
+        for user_id in users:
+            _generations[user_id] = _generations.get(user_id, 0) + 1
+            _candidates.pop(user_id, None)
+
+# --- История разговора ---
+
+class ChatSession:
+    """История одной сессии чата: краткое содержание и последние сообщения."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []
+        self.expires_at = time.monotonic() + SESSION_TTL_SECONDS
+
+    def history_text(self) -> str:
+        parts = []
+        if self.summary:
+            parts.append(f"Краткое содержание разговора: {self.summary}")
+        for user_message, reply in self.turns:
+            parts.append(f"Пользователь: {user_message}\nАссистент: {reply}")
+        return "\n".join(parts)
+
+    def add_turn(self, user_message: str, reply: str, summarize) -> None:
+        """
+        Добавляет обмен сообщениями. Если последние сообщения превышают
+        APP_CHAT_HISTORY_TOKENS, старые сворачиваются в краткое содержание
+        функцией summarize(summary, turns).
+        """
+        settings = get_settings()
+        self.turns.append((user_message, reply))
+        self.expires_at = time.monotonic() + SESSION_TTL_SECONDS
+        turn_tokens = [estimate_tokens(f"{u}\n{a}") for u, a in self.turns]
+        if sum(turn_tokens) <= settings.chat_history_tokens:
+            return
+
+        # Сворачиваем старые сообщения, пока оставшиеся не займут половину бюджета
+        folded = 0
+        remaining = sum(turn_tokens)
+        while folded < len(self.turns) - 1 and remaining > settings.chat_history_tokens // 2:
+            remaining -= turn_tokens[folded]
+            folded += 1
+        old_turns, self.turns = self.turns[:folded], self.turns[folded:]
+        summary_budget = int(settings.chat_context_tokens * SUMMARY_SHARE)
+        self.summary = truncate_tokens(summarize(self.summary, old_turns), summary_budget, keep_end=True)
+
+_sessions: "OrderedDict[Tuple[Optional[int], str], ChatSession]" = OrderedDict()
+_sessions_lock = threading.Lock()
+
+def get_session(user_id: Optional[int], session_id: Optional[str]) -> Tuple[str, ChatSession]:
+    """
+    Сессия чата пользователя (новая, если session_id не передан или устарел).
+
+    Returns:
+        Tuple[str, ChatSession]: ID сессии и ее история
+    """
+    now = time.monotonic()
+    with _sessions_lock:
+        if session_id:
+            session = _sessions.get((user_id, session_id))
+            if session is not None and session.expires_at > now:
+                _sessions.move_to_end((user_id, session_id))
+                return session_id, session
+        session_id = session_id or uuid.uuid4().hex
+        session = _sessions[(user_id, session_id)] = ChatSession()
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+        return session_id, session
+
+# --- Контекст ---
+
+def build_context(db: Session, message: str, session: ChatSession) -> str:
+    """
+    Контекст для ответа на сообщение: история разговора и важные открытые
+    задачи пользователя в пределах APP_CHAT_CONTEXT_TOKENS токенов.
+    """
+    budget = get_settings().chat_context_tokens
+    now = datetime.now()
+    parts = []
+
+    history = session.history_text()
+    if history:
+        # История ограничена сворачиванием, но бюджет не превышается в любом случае
+        history = truncate_tokens(history, budget // 2, keep_end=True)
+        parts.append(f"История разговора:\n{history}")
+        budget -= estimate_tokens(parts[-1])
+
+    header = f"Сейчас {now:%d.%m.%Y %H:%M}. Открытые задачи пользователя (самые важные):"
+    budget -= estimate_tokens(header)
+    if budget > 0:
+        lines, _ = select_tasks(urgent_candidates(db, now) + similar_candidates(db, message, now), budget)
+        if lines:
+            parts.insert(0, header + "\n" + "\n".join(lines))
+    return "\n\n".join(parts)
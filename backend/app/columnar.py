@@ -0,0 +1,131 @@
+"""
+Модуль columnar.py отдает списки задач в компактном бинарном формате.
+
+JSON из task_to_dict повторяет имена полей в каждой задаче и передает даты
+строками ISO (26 байт). Мобильные клиенты синхронизируют большие списки по
+медленной сети, поэтому эндпоинты списков задач поддерживают согласование
+формата: с заголовком Accept: application/msgpack ответ кодируется в
+MessagePack, а список задач - по колонкам:
+
+    {"tasks": {"columns": ["id", "title", ...],
+               "values": [[1, 2, ...], ["Купить", "Позвонить", ...], ...]},
+     "total": 2}
+
+values[i] - значения колонки columns[i] для всех задач по порядку. Даты -
+целые миллисекунды от 1970-01-01 00:00 (значения из базы хранятся без
+часового пояса и передаются как есть, как и в JSON, поэтому на клиенте
+их нужно читать в UTC: new Date(ms).getUTCHours() и т.д.). Отсутствующее
+значение - nil. Остальные поля ответа (total, cursor...) не меняются.
+
+Без заголовка Accept (или с application/json) ответ остается JSON.
+Сравнение размеров и времени кодирования: python -m benchmarks.bench_formats
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Union
+
+import msgpack
+from fastapi import Header, Response
+
+from app import models
+
+MEDIA_TYPE = "application/msgpack"
+
+# Варианты названия типа, которые встречаются у клиентов
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# Колонки в том же порядке и с теми же именами, что и поля task_to_dict
+COLUMNS = (
+    "id", "title", "description", "is_completed", "created_at",
+    "updated_at", "due_date", "priority", "tags", "recurrence"
+)
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+
+def epoch_ms(value: Optional[datetime]) -> Optional[int]:
+    """Дата без часового пояса в миллисекундах от 1970-01-01 00:00."""
+    if value is None:
+        return None
+    return (value - EPOCH) // MILLISECOND
+
+def _quality(params: List[str]) -> float:
+    for param in params:
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+def wants_msgpack(response: Response, accept: Optional[str] = Header(None)) -> bool:
+    """
+    Dependency FastAPI: нужен ли ответ в MessagePack.
+
+    MessagePack выбирается, если клиент указал его в Accept с весом не
+    меньше, чем у JSON. Ответ в любом случае помечается Vary: Accept,
+    чтобы кэши не отдавали JSON клиенту, который просил MessagePack,
+    и наоборот.
+    """
+    response.headers["Vary"] = "Accept"
+    if not accept:
+        return False
+
+    msgpack_quality = 0.0
+    json_quality = 0.0
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        media_type = media_type.strip().lower()
+        if media_type in MSGPACK_TYPES:
+            msgpack_quality = max(msgpack_quality, _quality(params))
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_quality = max(json_quality, _quality(params))
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+def task_columns(tasks: Iterable[Union[models.Task, models.ArchivedTask]], archived: bool = False) -> dict:
+    """
+    Список задач по колонкам.
+
+    Args:
+        tasks: задачи (в том числе из архива, если archived=True)
+        archived: добавить колонку archived (для GET /tasks?include_archived=true)
+
+    Returns:
+        dict: {"columns": [...], "values": [[...], ...]}
+    """
+    ids, titles, descriptions, statuses = [], [], [], []
+    created, updated, due, priorities, tags, rules, flags = [], [], [], [], [], [], []
+
+    for task in tasks:
+        is_archived = isinstance(task, models.ArchivedTask)
+        ids.append(task.task_id if is_archived else task.id)
+        titles.append(task.title)
+        descriptions.append(task.description)
+        statuses.append(True if is_archived else task.is_completed)
+        created.append(epoch_ms(task.created_at))
+        updated.append(epoch_ms(task.updated_at))
+        due.append(epoch_ms(task.due_date))
+        priorities.append(task.priority)
+        tags.append(task.tag_names if is_archived else [tag.name for tag in task.tags])
+        rules.append(None if is_archived else task.recurrence)
+        flags.append(is_archived)
+
+    columns = list(COLUMNS)
+    values = [ids, titles, descriptions, statuses, created, updated, due, priorities, tags, rules]
+    if archived:
+        columns.append("archived")
+        values.append(flags)
+    return {"columns": columns, "values": values}
+
+class MsgpackResponse(Response):
+    """Ответ в формате MessagePack."""
+
+    media_type = MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+def response(content: dict) -> MsgpackResponse:
+    """Ответ MessagePack с тем же заголовком Vary, что и у JSON."""
+    return MsgpackResponse(content, headers={"Vary": "Accept"})
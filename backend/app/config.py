@@ -0,0 +1,178 @@
+"""
+Модуль config.py содержит настройки приложения.
+
+Настройки читаются из переменных окружения (с префиксом APP_) и файла .env
+с помощью pydantic-settings. Например, APP_WORKERS=4 задает число процессов.
+"""
+
+import os
+from functools import lru_cache
+from typing import Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    """
+    Настройки сервера.
+
+    Attributes:
+        host, port: адрес, на котором слушает сервер
+        workers: число процессов-воркеров (0 - по числу ядер процессора)
+        loop: реализация event loop (uvloop или asyncio)
+        http: реализация HTTP парсера (httptools или h11)
+        preload: загружать приложение в мастер-процессе до fork воркеров
+        threadpool_size: размер пула потоков для синхронных эндпоинтов
+        graceful_timeout: сколько секунд ждать завершения активных запросов при остановке
+        max_requests: перезапуск воркера после N запросов (0 - не перезапускать)
+        max_requests_jitter: случайная добавка к max_requests, чтобы воркеры
+            не перезапускались одновременно
+        keepalive: таймаут keep-alive соединений в секундах
+        log_level: уровень логирования
+        init_db: создавать таблицы при старте приложения
+        database_url: URL базы данных SQLAlchemy (sqlite:///... или postgresql://...)
+        db_pool_size: число постоянных соединений в пуле (на воркер)
+        db_max_overflow: сколько соединений можно открыть сверх пула при пиках
+        db_pool_pre_ping: проверять соединение перед выдачей из пула
+        db_pool_recycle: пересоздавать соединения старше N секунд (-1 - никогда)
+        db_statement_timeout_ms: таймаут запроса в PostgreSQL; в SQLite -
+            время ожидания блокировки записи
+        secret_key: ключ для подписи токенов авторизации. Обязателен при
+            require_auth и при нескольких воркерах без preload (serve.py не
+            запустится); если не задан, при старте создается случайный
+            ключ, и токены перестают действовать после перезапуска
+        token_ttl_hours: срок действия токена
+        stream_token_ttl_seconds: срок действия токена для потоков событий
+            (передается в URL, так как EventSource не отправляет заголовки)
+        require_auth: запрещать запросы без токена (иначе они работают
+            с общими задачами без владельца)
+        shard_mode: off - все задачи в основной базе; user - отдельный файл
+            SQLite на пользователя; bucket - файл на группу пользователей
+            по хэшу user_id
+        shard_count: число групп в режиме bucket
+        shard_url_template: URL базы шарда, {shard} заменяется номером
+            пользователя или группы
+        shard_cache_size: сколько движков шардов держать открытыми
+        archive_after_days: через сколько дней после выполнения задача
+            переносится в архив (0 - не архивировать)
+        archive_interval_seconds: как часто запускать перенос в архив
+            (0 - не запускать в процессе сервера, только python -m app.archive)
+        archive_batch_size: сколько задач переносить в одной транзакции
+        archive_batch_pause_ms: пауза между порциями, чтобы не мешать
+            запросам пользователей
+        archive_vacuum_pages: сколько свободных страниц SQLite возвращать
+            после каждой порции (PRAGMA incremental_vacuum)
+        group_commit: объединять записи нескольких запросов в одну
+            транзакцию (см. app/group_commit.py)
+        group_commit_window_ms: сколько ждать другие записи после первой
+        group_commit_max_batch: максимальное число записей в транзакции
+        sync_tombstone_ttl_days: сколько дней хранить отметки об удаленных
+            задачах; клиенты, не синхронизировавшиеся дольше, получают
+            указание сделать полную синхронизацию
+        ai_max_concurrency: сколько запросов к AI выполняется одновременно
+            (остальные ждут в очереди, не занимая потоки)
+        ai_queue_size: сколько запросов к AI может ждать в очереди
+        ai_queue_timeout_seconds: сколько запрос может ждать в очереди
+            до ответа 429
+        ai_rate_per_second, ai_burst: общий лимит запросов к AI на процесс
+            (скорость пополнения и емкость token bucket, 0 - без лимита)
+        ai_client_rate_per_minute, ai_client_burst: лимит запросов к AI
+            для одного клиента (пользователя или IP адреса, 0 - без лимита)
+        ai_job_workers: число потоков, выполняющих фоновые AI задания
+            (0 - не запускать в этом процессе)
+        ai_job_max_queued: сколько заданий может ждать в очереди (больше - 429)
+        ai_job_lease_seconds: сколько задание закреплено за воркером; после
+            этого (например, процесс перезапущен) оно выполняется заново
+        ai_job_max_attempts: сколько раз начинать задание, прежде чем
+            считать его неудачным
+        ai_job_ttl_hours: сколько часов хранить завершенные задания
+        duplicate_threshold: с какой оценкой сходства (0-1, коэффициент
+            Жаккара по MinHash) задача считается возможным дубликатом
+        reminder_horizon_hours: на сколько часов вперед планировщик держит
+            напоминания в памяти (0 - не запускать планировщик)
+        reminder_lead_minutes: за сколько минут до срока напоминать
+        reminder_max_scheduled: сколько напоминаний можно держать в памяти;
+            если в окно попадает больше, оно сокращается
+        chat_context_tokens: бюджет контекста чата с AI (история разговора
+            и открытые задачи, токены оцениваются по длине текста)
+        chat_history_tokens: сколько токенов могут занимать последние
+            сообщения чата; более старые сворачиваются в краткое содержание
+    """
+    model_config = SettingsConfigDict(env_prefix="APP_", env_file=".env", extra="ignore")
+
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 0
+    loop: str = "uvloop"
+    http: str = "httptools"
+    preload: bool = True
+    threadpool_size: int = 40
+    graceful_timeout: int = 30
+    max_requests: int = 10000
+    max_requests_jitter: int = 1000
+    keepalive: int = 5
+    log_level: str = "info"
+    init_db: bool = True
+
+    database_url: str = "sqlite:///./database.db"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    db_statement_timeout_ms: int = 5000
+
+    secret_key: str = ""
+    token_ttl_hours: int = 24 * 30
+    stream_token_ttl_seconds: int = 60
+    require_auth: bool = False
+
+    shard_mode: Literal["off", "user", "bucket"] = "off"
+    shard_count: int = 16
+    shard_url_template: str = "sqlite:///./shards/tasks_{shard}.db"
+    shard_cache_size: int = 128
+
+    archive_after_days: int = 90
+    archive_interval_seconds: int = 3600
+    archive_batch_size: int = 500
+    archive_batch_pause_ms: int = 50
+    archive_vacuum_pages: int = 500
+
+    group_commit: bool = False
+    group_commit_window_ms: float = 2.0
+    group_commit_max_batch: int = 64
+
+    sync_tombstone_ttl_days: int = 30
+
+    ai_max_concurrency: int = 8
+    ai_queue_size: int = 32
+    ai_queue_timeout_seconds: float = 10.0
+    ai_rate_per_second: float = 5.0
+    ai_burst: int = 20
+    ai_client_rate_per_minute: float = 20.0
+    ai_client_burst: int = 5
+
+    ai_job_workers: int = 2
+    ai_job_max_queued: int = 1000
+    ai_job_lease_seconds: int = 120
+    ai_job_max_attempts: int = 3
+    ai_job_ttl_hours: int = 24
+
+    duplicate_threshold: float = 0.6
+
+    reminder_horizon_hours: int = 24
+    reminder_lead_minutes: int = 10
+    reminder_max_scheduled: int = 100000
+
+    chat_context_tokens: int = 1500
+    chat_history_tokens: int = 600
+
+    @property
+    def worker_count(self) -> int:
+        """Число воркеров с учетом значения 0 (по числу ядер)."""
+        if self.workers > 0:
+            return self.workers
+        return os.cpu_count() or 1
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Возвращает настройки (читаются один раз на процесс)."""
+    return Settings()
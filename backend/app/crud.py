@@ -6,9 +6,16 @@ CRUD = Create, Read, Update, Delete
 одну конкретную операцию.
 """
 
+from datetime import datetime
+from sqlalchemy import insert, select, delete
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from app import models, schemas
+from app.events import TagChange, record_tag_changes
+from app.partitioning import USER_KEY
+from app import stats  # Счетчики task_stats обновляются при каждой записи задач
+from app import sync  # Номера изменений для синхронизации клиентов
 
 # --- CREATE операции ---
 
@@ -29,7 +36,9 @@ def create_task(db: Session, task: schemas.TaskCreate) -> models.Task:
     # Создаем экземпляр модели Task из данных схемы
     db_task = models.Task(
         title=task.title,
-        description=task.description
+        description=task.description,
+        due_date=task.due_date,
+        priority=task.priority
         # is_completed по умолчанию False
         # created_at и updated_at установятся автоматически
     )
@@ -37,6 +46,9 @@ def create_task(db: Session, task: schemas.TaskCreate) -> models.Task:
     # Добавляем задачу в сессию
     db.add(db_task)
     
+    # Привязываем теги в той же транзакции
+    set_task_tags(db, db_task, task.tags)
+    
     # Сохраняем изменения в базе данных
     db.commit()
     
@@ -67,7 +79,8 @@ def get_tasks(
     db: Session, 
     skip: int = 0, 
     limit: int = 100,
-    completed: Optional[bool] = None
+    completed: Optional[bool] = None,
+    tag: Optional[str] = None
 ) -> List[models.Task]:
     """
     Получает список задач с пагинацией и фильтрацией.
@@ -77,6 +90,7 @@ def get_tasks(
         skip: сколько задач пропустить (для пагинации)
         limit: максимальное количество задач
         completed: фильтр по статусу выполнения (None - все задачи)
+        tag: фильтр по названию тега (None - все задачи)
     
     Returns:
         List[models.Task]: список задач
@@ -87,31 +101,84 @@ def get_tasks(
     # Применяем фильтр, если передан
     if completed is not None:
         query = query.filter_by(is_completed=completed)
+    if tag is not None:
+        query = filter_by_tag(query, tag)
     
     # Применяем пагинацию
-    # appointment_by сортирует по дате создания (новые сначала)
-    tasks = query.appointment_by(models.Task.created_at.desc()).offset(skip).limit(limit).all()
+    # order_by сортирует по дате создания (новые сначала);
+    # id - для однозначного порядка при одинаковой дате в любой СУБД
+    tasks = query.order_by(models.Task.created_at.desc(), models.Task.id.desc()).offset(skip).limit(limit).all()
     
     return tasks
 
-def get_tasks_count(db: Session, completed: Optional[bool] = None) -> int:
+def get_tasks_count(
+    db: Session,
+    completed: Optional[bool] = None,
+    tag: Optional[str] = None
+) -> int:
     """
     Получает общее количество задач (с фильтрацией).
     
     Args:
         db: сессия базы данных
         completed: фильтр по статусу выполнения
+        tag: фильтр по названию тега
     
     Returns:
         int: количество задач
     """
-    query = db.query(models.Task)
+    # Без фильтра по тегу количество берется из счетчиков task_stats
+    if tag is None:
+        counters = stats.get_stats(db)
+        if completed is None:
+            return counters["total"]
+        return counters["completed"] if completed else counters["open"]
+    
+    query = filter_by_tag(db.query(models.Task), tag)
     
     if completed is not None:
         query = query.filter_by(is_completed=completed)
     
     return query.count()
 
+def get_agenda(
+    db: Session,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 100
+) -> List[models.Task]:
+    """
+    Получает невыполненные задачи со сроком в интервале [date_from, date_to).
+    
+    Условие is_completed == False совпадает с условием частичного индекса
+    ix_tasks_open_due_date, поэтому запрос читает только диапазон индекса,
+    а не всю таблицу.
+    
+    Повторяющиеся задачи не возвращаются: их повторения вычисляет
+    app/recurrence.py (agenda_occurrences).
+    
+    Args:
+        db: сессия базы данных
+        date_from: начало интервала (None - без нижней границы)
+        date_to: конец интервала, не включительно (None - без верхней границы)
+        limit: максимальное количество задач
+    
+    Returns:
+        List[models.Task]: задачи, отсортированные по сроку
+    """
+    query = db.query(models.Task).filter(
+        models.Task.is_completed == False,
+        models.Task.due_date.isnot(None),
+        models.Task.recurrence.is_(None)
+    )
+    
+    if date_from is not None:
+        query = query.filter(models.Task.due_date >= date_from)
+    if date_to is not None:
+        query = query.filter(models.Task.due_date < date_to)
+    
+    return query.order_by(models.Task.due_date).limit(limit).all()
+
 # --- UPDATE операции ---
 
 def update_task(
@@ -140,6 +207,11 @@ def update_task(
     # Преобразуем данные обновления в словарь, исключая None значения
     update_data = task_update.model_dump(exclude_unset=True)
     
+    # Теги хранятся в отдельной таблице и обновляются отдельно
+    tags = update_data.pop('tags', None)
+    if tags is not None:
+        set_task_tags(db, db_task, tags)
+    
     # Обновляем поля задачи
     for field, value in update_data.items():
         setattr(db_task, field, value)
@@ -195,10 +267,212 @@ def delete_task(db: Session, task_id: int) -> bool:
     if not db_task:
         return False
     
-    # Удаляем задачу
+    # Уменьшаем счетчики тегов и удаляем задачу
+    set_task_tags(db, db_task, [])
     db.delete(db_task)
     
     # Сохраняем изменения
     db.commit()
     
-    return True
\ No newline at end of file
+    return True
+
+# --- Теги ---
+
+def normalize_tag_names(names: Iterable[str]) -> List[str]:
+    """
+    Приводит названия тегов к единому виду: без пробелов по краям,
+    в нижнем регистре, без пустых и повторяющихся (порядок сохраняется).
+    """
+    result = []
+    for name in names:
+        name = name.strip().lower()
+        if name and name not in result:
+            result.append(name)
+    return result
+
+def filter_by_tag(query, tag: str):
+    """
+    Добавляет к запросу задач фильтр по тегу.
+    Использует индекс tags.name и индекс (tag_id, task_id) в task_tags.
+    """
+    return query.join(
+        models.task_tags, models.task_tags.c.task_id == models.Task.id
+    ).join(
+        models.Tag, models.Tag.id == models.task_tags.c.tag_id
+    ).filter(models.Tag.name == tag.strip().lower())
+
+def _change_tag_counts(db: Session, tags: List[models.Tag], delta: int) -> None:
+    """
+    Изменяет счетчики задач у тегов одним UPDATE (без гонок чтение-запись)
+    и сообщает об изменении подписчикам on_tags_changed (подсказки тегов).
+    """
+    if tags:
+        db.query(models.Tag).filter(models.Tag.id.in_([tag.id for tag in tags])).update(
+            {models.Tag.task_count: models.Tag.task_count + delta},
+            synchronize_session=False
+        )
+        record_tag_changes(db, [TagChange(tag.user_id, tag.name, delta) for tag in tags])
+
+def get_or_create_tags(db: Session, names: Iterable[str]) -> Dict[str, models.Tag]:
+    """
+    Теги пользователя сессии по названиям; недостающие создаются.
+    
+    Параллельные запросы могут создавать один и тот же новый тег, поэтому
+    вставка не падает на уникальном индексе: в SQLite и PostgreSQL -
+    INSERT ... ON CONFLICT DO NOTHING, в остальных базах - вставка в
+    точке сохранения с повторным чтением при IntegrityError. После
+    вставки теги перечитываются по названию.
+    """
+    names = set(names)
+    if not names:
+        return {}
+    tags = {tag.name: tag for tag in db.query(models.Tag).filter(models.Tag.name.in_(names))}
+    missing = names - tags.keys()
+    if not missing:
+        return tags
+    
+    user_id = db.info.get(USER_KEY)
+    rows = [{"user_id": user_id, "name": name, "task_count": 0} for name in sorted(missing)]
+    table = models.Tag.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        db.execute(dialect_insert(table).values(rows).on_conflict_do_nothing())
+    else:
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(table).values(row))
+            except IntegrityError:
+                pass  # Тег уже создан параллельным запросом
+    
+    for tag in db.query(models.Tag).filter(models.Tag.name.in_(missing)):
+        tags[tag.name] = tag
+    return tags
+
+def set_task_tags(db: Session, db_task: models.Task, names: Iterable[str]) -> bool:
+    """
+    Устанавливает теги задачи и обновляет счетчики task_count.
+    Изменения не сохраняются (commit делает вызывающий код),
+    поэтому теги и счетчики меняются в одной транзакции с задачей.
+    
+    Args:
+        db: сессия базы данных
+        db_task: задача
+        names: новый список названий тегов
+    
+    Returns:
+        bool: True если теги изменились
+    """
+    names = normalize_tag_names(names)
+    current = {tag.name: tag for tag in db_task.tags}
+    
+    added = [name for name in names if name not in current]
+    removed = [tag for name, tag in current.items() if name not in names]
+    if not added and not removed:
+        return False
+    
+    # Находим существующие теги и создаем недостающие
+    by_name = dict(current)
+    by_name.update(get_or_create_tags(db, added))
+    
+    db_task.tags = [by_name[name] for name in names]
+    
+    _change_tag_counts(db, [by_name[name] for name in added], +1)
+    _change_tag_counts(db, removed, -1)
+    
+    return True
+
+def get_tags(db: Session) -> List[models.Tag]:
+    """
+    Получает все теги со счетчиками задач.
+    Счетчики хранятся в самой таблице tags, поэтому запрос не сканирует задачи.
+    """
+    return db.query(models.Tag).order_by(models.Tag.task_count.desc(), models.Tag.name).all()
+
+def rename_tag(db: Session, old_name: str, new_name: str) -> Optional[models.Tag]:
+    """
+    Переименовывает тег.
+    
+    Если тега new_name еще нет, меняется одна строка в tags - задачи не
+    переписываются. Если он уже есть, теги объединяются несколькими
+    запросами над task_tags, без обхода задач в Python.
+    
+    Args:
+        db: сессия базы данных
+        old_name: текущее название
+        new_name: новое название
+    
+    Returns:
+        Optional[models.Tag]: тег с новым названием или None, если old_name не найден
+    """
+    old_name = old_name.strip().lower()
+    new_name = new_name.strip().lower()
+    
+    old_tag = db.query(models.Tag).filter_by(name=old_name).first()
+    if not old_tag:
+        return None
+    if old_name == new_name:
+        return old_tag
+    
+    # Название тега входит в ответ по задаче, поэтому задачи с этим
+    # тегом отмечаются измененными для синхронизации (app/sync.py)
+    links = models.task_tags
+    sync.touch_tasks(db, db.scalars(select(links.c.task_id).where(links.c.tag_id == old_tag.id)))
+    
+    # Задачи со старым названием переходят к новому
+    record_tag_changes(db, [TagChange(old_tag.user_id, old_name, -old_tag.task_count)])
+    
+    target = db.query(models.Tag).filter_by(name=new_name).first()
+    if target is None:
+        record_tag_changes(db, [TagChange(old_tag.user_id, new_name, old_tag.task_count)])
+        old_tag.name = new_name
+        db.commit()
+        db.refresh(old_tag)
+        return old_tag
+    
+    # Переносим связи, которых у целевого тега еще нет
+    already_tagged = select(links.c.task_id).where(links.c.tag_id == target.id)
+    moved = db.execute(
+        insert(links).from_select(
+            ["task_id", "tag_id"],
+            select(links.c.task_id, target.id).where(
+                links.c.tag_id == old_tag.id,
+                links.c.task_id.not_in(already_tagged)
+            )
+        )
+    ).rowcount
+    db.execute(delete(links).where(links.c.tag_id == old_tag.id))
+    _change_tag_counts(db, [target], moved)
+    db.delete(old_tag)
+    db.commit()
+    
+    db.refresh(target)
+    return target
+
+def delete_tag(db: Session, name: str) -> bool:
+    """
+    Удаляет тег у всех задач двумя запросами (связи и сам тег).
+    
+    Args:
+        db: сессия базы данных
+        name: название тега
+    
+    Returns:
+        bool: True если тег удален, False если не найден
+    """
+    tag = db.query(models.Tag).filter_by(name=name.strip().lower()).first()
+    if not tag:
+        return False
+    
+    links = models.task_tags
+    sync.touch_tasks(db, db.scalars(select(links.c.task_id).where(links.c.tag_id == tag.id)))
+    db.execute(delete(links).where(links.c.tag_id == tag.id))
+    record_tag_changes(db, [TagChange(tag.user_id, tag.name, -tag.task_count)])
+    db.delete(tag)
+    db.commit()
+    
+    return True
@@ -1,28 +1,221 @@
 """
 Упрощенный модуль для работы с базой данных.
+
+URL базы данных и параметры пула соединений задаются в настройках
+(APP_DATABASE_URL, APP_DB_POOL_SIZE и т.д., см. app/config.py).
+Поддерживаются SQLite (по умолчанию) и PostgreSQL.
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.config import get_settings
 
-# URL для подключения к SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./database.db"
+def make_engine(database_url: str = None):
+    """
+    Создает движок SQLAlchemy с учетом диалекта базы данных.
+    
+    Args:
+        database_url: URL базы данных (по умолчанию - из настроек)
+    
+    Returns:
+        Engine: движок SQLAlchemy
+    """
+    settings = get_settings()
+    url = make_url(database_url or settings.database_url)
+    
+    if url.get_backend_name() == "sqlite":
+        # SQLite: соединение используется из разных потоков пула FastAPI.
+        # Таймаута на выполнение запроса в SQLite нет, поэтому statement
+        # timeout задает, сколько ждать освобождения блокировки записи
+        connect_args = {
+            "check_same_thread": False,
+            "timeout": settings.db_statement_timeout_ms / 1000,
+        }
+    elif url.get_backend_name() == "postgresql":
+        connect_args = {
+            "options": f"-c statement_timeout={settings.db_statement_timeout_ms}",
+        }
+    else:
+        connect_args = {}
+    
+    pool_args = {}
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        # Для SQLite в памяти используется отдельный пул без этих параметров
+        pool_args = {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_recycle": settings.db_pool_recycle,
+        }
+    
+    new_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        **pool_args
+    )
+    
+    if url.get_backend_name() == "sqlite":
+        @event.listens_for(new_engine, "connect")
+        def _set_auto_vacuum(dbapi_connection, connection_record):
+            # Новые базы создаются с auto_vacuum = INCREMENTAL: место,
+            # освобожденное архивацией, возвращается порциями через
+            # PRAGMA incremental_vacuum (см. app/archive.py). Для существующей
+            # базы настройка вступит в силу после python -m app.archive --vacuum
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.close()
+    
+    return new_engine
+
+# URL для подключения к базе данных (по умолчанию SQLite)
+SQLALCHEMY_DATABASE_URL = get_settings().database_url
 
 # Создаем движок
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Создаем базовый класс для моделей
+# Создаем базовый класс для моделей (единственный: models.py импортирует его отсюда)
 Base = declarative_base()
 
-def init_db():
-    """Инициализирует базу данных"""
-    from app import models
-    models.Base.metadata.create_all(bind=engine)
-    print("База данных инициализирована")
\ No newline at end of file
+def get_db():
+    """
+    Функция-генератор для получения сессии базы данных.
+    
+    Эта функция используется как dependency в эндпоинтах FastAPI.
+    Каждый запрос получает свою сессию базы данных, которая автоматически
+    закрывается после завершения обработки запроса.
+    
+    Yields:
+        Session: Сессия SQLAlchemy для работы с базой данных
+    """
+    # Создаем новую сессию базы данных
+    db = SessionLocal()
+    try:
+        # Возвращаем сессию для использования в эндпоинте
+        yield db
+    finally:
+        # Закрываем сессию после завершения работы (даже если произошла ошибка)
+        db.close()
+
+def init_db(bind=None):
+    """
+    Создает таблицы, которых еще нет в базе данных.
+    
+    Вызывается при старте приложения (если APP_INIT_DB=true), при первом
+    обращении к шарду (app/partitioning.py) или вручную:
+        python -m app.database
+    
+    Args:
+        bind: движок базы данных (по умолчанию - основной)
+    """
+    bind = bind or engine
+    from app import models  # Регистрирует модели в Base.metadata
+    Base.metadata.create_all(bind=bind)
+    upgrade_schema(bind)
+    
+    from app import stats, sync
+    db = SessionLocal(bind=bind)
+    try:
+        stats.rebuild_if_empty(db)
+        sync.backfill(db)
+    finally:
+        db.close()
+    print("База данных инициализирована")
+
+def upgrade_schema(bind):
+    """
+    Добавляет в существующие таблицы колонки и индексы, появившиеся в моделях.
+    
+    create_all создает только отсутствующие таблицы, поэтому базы, созданные
+    предыдущими версиями приложения, дополняются здесь через ALTER TABLE.
+    Новые колонки должны быть nullable или иметь server_default.
+    Индексы, которых больше нет в моделях или которые изменились
+    (колонки, уникальность), пересоздаются.
+    """
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT '{column.server_default.arg}'"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+                connection.execute(text(ddl))
+            
+            model_indexes = {index.name: index for index in table.indexes}
+            for db_index in inspector.get_indexes(table.name):
+                # Индексы, которые СУБД создает для ограничений, не трогаем
+                if db_index.get("duplicates_constraint"):
+                    continue
+                index = model_indexes.get(db_index["name"])
+                if (
+                    index is None
+                    or [column.name for column in index.columns] != db_index["column_names"]
+                    or bool(index.unique) != bool(db_index["unique"])
+                ):
+                    connection.execute(text(f"DROP INDEX {db_index['name']}"))
+            
+            if table.name == "tags" and not any(
+                db_index["name"] == "ux_tags_anonymous_name" for db_index in inspector.get_indexes("tags")
+            ):
+                merge_anonymous_tags(connection)
+            
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+def merge_anonymous_tags(connection):
+    """
+    Объединяет анонимные теги (user_id = NULL) с одинаковыми названиями,
+    чтобы можно было создать уникальный индекс ux_tags_anonymous_name.
+    
+    Задачи дубликатов переносятся на тег с наименьшим ID, дубликаты
+    удаляются, счетчики task_count оставшихся тегов пересчитываются.
+    """
+    rows = connection.execute(text("SELECT id, name FROM tags WHERE user_id IS NULL ORDER BY id")).all()
+    keep = {}
+    duplicates = {}
+    for tag_id, name in rows:
+        if name in keep:
+            duplicates[tag_id] = keep[name]
+        else:
+            keep[name] = tag_id
+    if not duplicates:
+        return
+    
+    for duplicate_id, keep_id in duplicates.items():
+        connection.execute(
+            text(
+                "INSERT INTO task_tags (task_id, tag_id) "
+                "SELECT task_id, :keep_id FROM task_tags AS link WHERE link.tag_id = :duplicate_id "
+                "AND NOT EXISTS (SELECT 1 FROM task_tags AS other "
+                "WHERE other.task_id = link.task_id AND other.tag_id = :keep_id)"
+            ),
+            {"keep_id": keep_id, "duplicate_id": duplicate_id}
+        )
+        connection.execute(text("DELETE FROM task_tags WHERE tag_id = :id"), {"id": duplicate_id})
+        connection.execute(text("DELETE FROM tags WHERE id = :id"), {"id": duplicate_id})
+    
+    for keep_id in set(duplicates.values()):
+        connection.execute(
+            text("UPDATE tags SET task_count = (SELECT COUNT(*) FROM task_tags WHERE tag_id = :id) WHERE id = :id"),
+            {"id": keep_id}
+        )
+    print(f"🏷️ Объединены дубликаты анонимных тегов: {len(duplicates)}")
+
+if __name__ == "__main__":
+    # При запуске через -m этот модуль - __main__ со своим Base, а модели
+    # регистрируются в Base модуля app.database
+    from app.database import init_db as init_app_db
+    init_app_db()
\ No newline at end of file
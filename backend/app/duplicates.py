@@ -0,0 +1,307 @@
+"""
+Модуль duplicates.py находит похожие задачи (возможные дубликаты).
+
+Пользователи часто создают одну и ту же задачу дважды с немного другой
+формулировкой ("Купить молоко" и "купить молока!"). Сравнение нового текста
+с каждой задачей пользователя - O(n) на создание, поэтому используется
+MinHash с LSH индексом:
+
+1. Текст задачи (название и описание) нормализуется (нижний регистр, ё -> е,
+   только буквы и цифры) и разбивается на шинглы - подстроки из
+   SHINGLE_SIZE символов.
+2. MinHash сигнатура - минимумы NUM_PERMUTATIONS хэш-функций по шинглам
+   (значения всех функций для шингла - 32-битные части одного хэша SHAKE-128,
+   минимумы считаются по столбцам без цикла на Python по функциям).
+   Доля совпадающих позиций двух сигнатур - оценка коэффициента Жаккара
+   множеств шинглов. Сигнатура хранится в колонке tasks.minhash и
+   записывается в той же транзакции, что и задача (подписчик on_tasks_flushed).
+3. LSH: сигнатура делится на BANDS полос по ROWS_PER_BAND позиций. Задачи,
+   у которых совпала хотя бы одна полоса, попадают в одну корзину. Похожие
+   задачи (сходство выше ~0.5) почти наверняка совпадают хотя бы в одной
+   полосе, непохожие - почти никогда, поэтому поиск проверяет только
+   задачи из корзин нового текста, а не все задачи пользователя.
+
+Индекс строится в памяти для каждого пользователя при первом поиске из
+сохраненных сигнатур (только невыполненные задачи) и поддерживается
+инкрементально после commit (app/events.py): создание и изменение текста
+пересчитывают сигнатуру задачи, выполнение и удаление убирают ее из индекса.
+Записи других процессов индекс не видит - на этот случай индекс
+перестраивается через INDEX_TTL_SECONDS.
+
+Похожие задачи возвращают POST /tasks и /api/ai/process в поле duplicates.
+Задержка поиска: python -m benchmarks.bench_duplicates
+"""
+
+import hashlib
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Set, Union
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import get_settings
+from app.events import on_tasks_changed, on_tasks_flushed
+from app.partitioning import USER_KEY, session_for_user
+
+SHINGLE_SIZE = 3
+
+# 16 полос по 4 позиции: задачи со сходством 0.5 попадают в общую корзину
+# с вероятностью 1 - (1 - 0.5^4)^16 = 64%, со сходством 0.8 - 99.9%,
+# со сходством 0.2 - 2.5%
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+# Сколько похожих задач возвращать
+DUPLICATES_LIMIT = 5
+
+# Срок жизни индекса пользователя (страховка от записей в других процессах)
+INDEX_TTL_SECONDS = 300
+
+# Для скольких пользователей держать индексы (давно не искавшие вытесняются)
+MAX_INDEXED_USERS = 1000
+
+# Сигнатура в колонке minhash: NUM_PERMUTATIONS чисел uint32 little-endian.
+# Хэш не зависит от процесса (в отличие от hash()), поэтому сохраненные
+# сигнатуры совпадают во всех воркерах и после перезапуска
+_FORMAT = struct.Struct(f"<{NUM_PERMUTATIONS}I")
+_BAND_BYTES = ROWS_PER_BAND * 4
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+def normalize(text: str) -> str:
+    """Нижний регистр, ё -> е, слова из букв и цифр через один пробел."""
+    return _NON_WORD.sub(" ", text.lower().replace("ё", "е")).strip()
+
+def shingles(text: str) -> Set[str]:
+    """Подстроки из SHINGLE_SIZE символов нормализованного текста."""
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+@lru_cache(maxsize=4096)
+def task_signature(title: Optional[str], description: Optional[str]) -> Optional[bytes]:
+    """
+    MinHash сигнатура названия и описания задачи.
+
+    Returns:
+        Optional[bytes]: сигнатура для колонки minhash или None, если
+                         в тексте нет ни одной буквы или цифры
+    """
+    text = f"{title or ''} {description or ''}"
+    hashes = [
+        _FORMAT.unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(_FORMAT.size))
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return None
+    return _FORMAT.pack(*map(min, zip(*hashes)))
+
+def similarity(first: bytes, second: bytes) -> float:
+    """Оценка коэффициента Жаккара по двум сигнатурам."""
+    matches = sum(x == y for x, y in zip(_FORMAT.unpack(first), _FORMAT.unpack(second)))
+    return matches / NUM_PERMUTATIONS
+
+def _band_keys(signature: bytes) -> List[int]:
+    return [
+        hash((band, signature[band * _BAND_BYTES:(band + 1) * _BAND_BYTES]))
+        for band in range(BANDS)
+    ]
+
+class DuplicateIndex:
+    """
+    LSH индекс невыполненных задач одного пользователя.
+
+    Корзина хранит ID задачи числом, а множество создается только при
+    совпадении полос у нескольких задач: так индекс занимает меньше памяти.
+    Методы вызываются под блокировкой модуля.
+    """
+
+    def __init__(self):
+        self.signatures: Dict[int, bytes] = {}
+        self.titles: Dict[int, str] = {}
+        self.buckets: Dict[int, Union[int, Set[int]]] = {}
+        self.expires_at = time.monotonic() + INDEX_TTL_SECONDS
+
+    def add(self, task_id: int, title: str, signature: bytes) -> None:
+        self.remove(task_id)
+        self.signatures[task_id] = signature
+        self.titles[task_id] = title
+        for key in _band_keys(signature):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = task_id
+            elif isinstance(bucket, set):
+                bucket.add(task_id)
+            else:
+                self.buckets[key] = {bucket, task_id}
+
+    def remove(self, task_id: int) -> None:
+        signature = self.signatures.pop(task_id, None)
+        if signature is None:
+            return
+        del self.titles[task_id]
+        for key in _band_keys(signature):
+            bucket = self.buckets.get(key)
+            if isinstance(bucket, set):
+                bucket.discard(task_id)
+                if len(bucket) == 1:
+                    self.buckets[key] = next(iter(bucket))
+            elif bucket == task_id:
+                del self.buckets[key]
+
+    def query(self, signature: bytes, threshold: float, limit: int) -> List[dict]:
+        """Задачи со сходством не меньше threshold, самые похожие сначала."""
+        candidates: Set[int] = set()
+        for key in _band_keys(signature):
+            bucket = self.buckets.get(key)
+            if isinstance(bucket, set):
+                candidates |= bucket
+            elif bucket is not None:
+                candidates.add(bucket)
+
+        matches = []
+        for task_id in candidates:
+            score = similarity(signature, self.signatures[task_id])
+            if score >= threshold:
+                matches.append((score, task_id))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return [
+            {"id": task_id, "title": self.titles[task_id], "similarity": round(score, 2)}
+            for score, task_id in matches[:limit]
+        ]
+
+_indexes: "OrderedDict[Optional[int], DuplicateIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+# Номер поколения индекса пользователя: увеличивается при каждом изменении
+# его задач. Индекс, построенный во время изменения, не сохраняется -
+# он мог прочитать базу до commit и пропустить изменение
+_generations: Dict[Optional[int], int] = {}
+
+def _save_signatures(connection: Connection, rows: List[dict]) -> None:
+    """Записывает сигнатуры: rows - словари {"task_id", "signature"}."""
+    if not rows:
+        return
+    tasks = models.Task.__table__
+    # updated_at присваивается самому себе, иначе сработал бы onupdate колонки
+    connection.execute(
+        update(tasks).where(tasks.c.id == bindparam("task_id")).values(
+            minhash=bindparam("signature"), updated_at=tasks.c.updated_at
+        ),
+        rows
+    )
+
+def build_index(db: Session) -> DuplicateIndex:
+    """
+    Строит индекс невыполненных задач пользователя сессии.
+    Сигнатуры задач, созданных до появления индекса, вычисляются и сохраняются.
+    """
+    Task = models.Task
+    index = DuplicateIndex()
+    missing = []
+    rows = db.query(Task.id, Task.title, Task.description, Task.minhash).filter(Task.is_completed == False)
+    for task_id, title, description, signature in rows:
+        if signature is None:
+            signature = task_signature(title, description)
+            if signature is None:
+                continue
+            missing.append({"task_id": task_id, "signature": signature})
+        index.add(task_id, title, signature)
+
+    if missing:
+        with db.get_bind().begin() as connection:
+            _save_signatures(connection, missing)
+    return index
+
+def _get_index(user_id: Optional[int], load: Callable[[], DuplicateIndex]) -> DuplicateIndex:
+    now = time.monotonic()
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None and index.expires_at > now:
+            _indexes.move_to_end(user_id)
+            return index
+        generation = _generations.get(user_id, 0)
+
+    index = load()
+
+    with _lock:
+        if _generations.get(user_id, 0) == generation:
+            _indexes[user_id] = index
+            _indexes.move_to_end(user_id)
+            while len(_indexes) > MAX_INDEXED_USERS:
+                _indexes.popitem(last=False)
+    return index
+
+def find(db: Session, title: str, description: Optional[str] = None) -> List[dict]:
+    """
+    Невыполненные задачи пользователя сессии, похожие на текст.
+
+    Returns:
+        List[dict]: до DUPLICATES_LIMIT задач {"id", "title", "similarity"},
+                    самые похожие сначала
+    """
+    signature = task_signature(title, description)
+    if signature is None:
+        return []
+    index = _get_index(db.info.get(USER_KEY), lambda: build_index(db))
+    with _lock:
+        return index.query(signature, get_settings().duplicate_threshold, DUPLICATES_LIMIT)
+
+def find_for_user(user_id: Optional[int], title: str, description: Optional[str] = None) -> List[dict]:
+    """То же, что find, для кода без сессии пользователя (AI эндпоинты, фоновые задания)."""
+    db = session_for_user(user_id)
+    try:
+        return find(db, title, description)
+    finally:
+        db.close()
+
+def _text_changed(change) -> bool:
+    return (change.old["title"], change.old["description"]) != (change.new["title"], change.new["description"])
+
+@on_tasks_flushed
+def _store_signatures(connection: Connection, changes) -> None:
+    """Сохраняет сигнатуры созданных задач и задач с измененным текстом."""
+    rows = []
+    for change in changes:
+        if change.action == "created" or (change.action == "updated" and _text_changed(change)):
+            signature = task_signature(change.new["title"], change.new["description"])
+            if signature is not None:
+                rows.append({"task_id": change.task_id, "signature": signature})
+    _save_signatures(connection, rows)
+
+def _index_updates(changes) -> Iterable[tuple]:
+    """Пары (пользователь, ID задачи, название, сигнатура или None - убрать из индекса)."""
+    for change in changes:
+        new_user = change.new["user_id"] if change.new else None
+        if change.old is not None and (change.new is None or change.old["user_id"] != new_user):
+            yield change.old["user_id"], change.task_id, None, None
+        if change.new is not None:
+            signature = None
+            if not change.new["is_completed"]:
+                signature = task_signature(change.new["title"], change.new["description"])
+            yield new_user, change.task_id, change.new["title"], signature
+
+@on_tasks_changed
+def _update_indexes(changes) -> None:
+    """Обновляет индексы пользователей после commit."""
+    # Сигнатуры вычисляются до блокировки (обычно они уже в кэше task_signature)
+    updates = list(_index_updates(changes))
+    with _lock:
+        for user_id, task_id, title, signature in updates:
+            _generations[user_id] = _generations.get(user_id, 0) + 1
+            index = _indexes.get(user_id)
+            if index is None:
+                continue
+            if signature is None:
+                index.remove(task_id)
+            else:
+                index.add(task_id, title, signature)
@@ -0,0 +1,165 @@
+"""
+Модуль events.py сообщает подписчикам об изменениях задач после commit.
+
+Кэши и индексы в памяти (календарь, статистика и т.д.) должны узнавать
+о каждой записи, откуда бы она ни пришла: из эндпоинтов main.py, из crud.py
+или из фоновых задач. Для этого используются события сессии SQLAlchemy:
+- after_flush: запоминаем, какие задачи созданы, изменены или удалены,
+  и значения их полей до и после изменения;
+- after_commit: передаем накопленные изменения подписчикам;
+- after_rollback: отбрасываем их (транзакция не состоялась).
+
+Подписчики on_tasks_flushed вызываются прямо в after_flush с соединением
+текущей транзакции - так можно обновить другие таблицы атомарно с задачами.
+
+Код, который пишет задачи Core запросами в обход ORM (массовый импорт),
+сообщает об изменениях сам через record_changes.
+
+Теги задач в TaskChange не входят: изменения числа задач с тегом
+(app/crud.py) передаются отдельно подписчикам on_tags_changed, тоже
+после commit.
+
+Пример:
+    @on_tasks_changed
+    def invalidate(changes):
+        for change in changes:
+            ...
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Поля задачи, значения которых передаются подписчикам
+TRACKED_FIELDS = ("title", "description", "is_completed", "due_date", "priority", "user_id", "recurrence")
+
+class TaskChange(NamedTuple):
+    """
+    Изменение одной задачи.
+
+    Attributes:
+        action: "created", "updated" или "deleted"
+        task_id: ID задачи
+        old: значения полей до изменения (None для created)
+        new: значения полей после изменения (None для deleted)
+    """
+    action: str
+    task_id: int
+    old: Optional[Dict]
+    new: Optional[Dict]
+
+class TagChange(NamedTuple):
+    """
+    Изменение числа задач с тегом.
+
+    Attributes:
+        user_id: владелец тега
+        name: название тега
+        delta: на сколько изменилось число задач с тегом
+    """
+    user_id: Optional[int]
+    name: str
+    delta: int
+
+_subscribers: List[Callable[[List[TaskChange]], None]] = []
+_flush_subscribers: List[Callable[[Connection, List[TaskChange]], None]] = []
+_tag_subscribers: List[Callable[[List[TagChange]], None]] = []
+
+def on_tasks_changed(callback: Callable[[List[TaskChange]], None]):
+    """Регистрирует подписчика, вызываемого после commit. Можно использовать как декоратор."""
+    _subscribers.append(callback)
+    return callback
+
+def on_tasks_flushed(callback: Callable[[Connection, List[TaskChange]], None]):
+    """
+    Регистрирует подписчика, вызываемого внутри транзакции после каждого flush.
+    Подписчик получает соединение транзакции и должен выполнять только
+    Core запросы через него (ORM сессия в этот момент занята flush).
+    Ошибка подписчика откатывает всю транзакцию.
+    """
+    _flush_subscribers.append(callback)
+    return callback
+
+def on_tags_changed(callback: Callable[[List[TagChange]], None]):
+    """Регистрирует подписчика на изменения тегов, вызываемого после commit."""
+    _tag_subscribers.append(callback)
+    return callback
+
+def _current_values(task: models.Task) -> Dict:
+    return {field: getattr(task, field) for field in TRACKED_FIELDS}
+
+def _previous_values(task: models.Task) -> Dict:
+    state = inspect(task)
+    values = {}
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field] = history.deleted[0]
+        elif history.unchanged:
+            values[field] = history.unchanged[0]
+        else:
+            values[field] = getattr(task, field)
+    return values
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    # В after_flush списки new/dirty/deleted и история атрибутов
+    # еще описывают состояние до flush, а ID новых задач уже известны
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, models.Task):
+            changes.append(TaskChange("created", obj.id, None, _current_values(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, models.Task) and session.is_modified(obj, include_collections=False):
+            changes.append(TaskChange("updated", obj.id, _previous_values(obj), _current_values(obj)))
+    for obj in session.deleted:
+        if isinstance(obj, models.Task):
+            changes.append(TaskChange("deleted", obj.id, _previous_values(obj), None))
+
+    record_changes(session, changes)
+
+def record_changes(session: Session, changes: List[TaskChange]) -> None:
+    """
+    Сообщает подписчикам об изменениях задач в транзакции сессии.
+
+    Вызывается из after_flush, а также кодом, который изменяет задачи
+    Core запросами через соединение сессии: подписчики on_tasks_flushed
+    вызываются сразу, on_tasks_changed - после commit.
+    """
+    if not changes:
+        return
+
+    connection = session.connection()
+    for callback in _flush_subscribers:
+        callback(connection, changes)
+
+    session.info.setdefault("task_changes", []).extend(changes)
+
+def record_tag_changes(session: Session, changes: List[TagChange]) -> None:
+    """Сообщает подписчикам on_tags_changed об изменениях тегов после commit."""
+    if changes:
+        session.info.setdefault("tag_changes", []).extend(changes)
+
+def _notify(subscribers: List[Callable], changes: Optional[List]) -> None:
+    if not changes:
+        return
+    for callback in subscribers:
+        try:
+            callback(changes)
+        except Exception as e:
+            # Ошибка подписчика не должна ломать уже выполненную запись
+            print(f"❌ Ошибка обработчика изменений задач {callback.__name__}: {str(e)}")
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session):
+    _notify(_subscribers, session.info.pop("task_changes", None))
+    _notify(_tag_subscribers, session.info.pop("tag_changes", None))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("task_changes", None)
+    session.info.pop("tag_changes", None)
@@ -0,0 +1,270 @@
+"""
+Модуль group_commit.py объединяет записи нескольких запросов в одну транзакцию.
+
+Каждый POST/PUT/PATCH/DELETE раньше делал собственный commit, а значит
+отдельный fsync. При нескольких сотнях записей в секунду на SQLite
+это узкое место. В режиме группового commit (APP_GROUP_COMMIT=true):
+- эндпоинт передает операцию (функцию от сессии) выделенному потоку
+  записи своей базы данных и ждет future с результатом;
+- поток записи собирает операции, пришедшие в течение
+  APP_GROUP_COMMIT_WINDOW_MS, и выполняет их в одной транзакции
+  (не больше APP_GROUP_COMMIT_MAX_BATCH операций). Если записи идут по
+  одной (предыдущая порция из одной записи и очередь пуста), окно не
+  ждется, чтобы одиночные запросы не замедлялись;
+- каждая операция получает свой результат или свою ошибку. Если операция
+  падает, ничего не изменив (например, 404), ошибка просто передается ей.
+  Если она успела изменить данные, транзакция откатывается, а остальные
+  операции порции выполняются заново.
+
+По умолчанию режим выключен: execute выполняет операцию в сессии запроса
+и сразу делает commit, как раньше. Метрики (размер порций, время ожидания
+в очереди) доступны в GET /metrics/writes.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.partitioning import USER_KEY
+
+# Операция записи: изменяет объекты в сессии и возвращает результат
+# (commit делает вызывающий код)
+Operation = Callable[[Session], Any]
+
+# Сколько последних значений хранить для перцентилей
+METRICS_WINDOW = 1000
+
+# Ключ в session.info: счетчик flush в сессии
+FLUSH_COUNT_KEY = "flush_count"
+
+@event.listens_for(Session, "after_flush")
+def _count_flush(session, flush_context):
+    session.info[FLUSH_COUNT_KEY] = session.info.get(FLUSH_COUNT_KEY, 0) + 1
+
+def _has_changes(db: Session, flushes_before: int) -> bool:
+    """Изменила ли операция что-нибудь в сессии или в базе данных."""
+    return bool(
+        db.info.get(FLUSH_COUNT_KEY, 0) != flushes_before
+        or db.new or db.dirty or db.deleted
+    )
+
+class _Write:
+    """Операция в очереди потока записи."""
+
+    __slots__ = ("operation", "user_id", "future", "enqueued_at")
+
+    def __init__(self, operation: Operation, user_id: Optional[int]):
+        self.operation = operation
+        self.user_id = user_id
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+class WriteMetrics:
+    """Метрики группового commit: размеры порций и время ожидания в очереди."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+        self.retries = 0
+        self.max_batch_size = 0
+        self._batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self._queue_waits_ms = deque(maxlen=METRICS_WINDOW)
+
+    def record(self, batch: List[_Write], started_at: float, retries: int) -> None:
+        with self._lock:
+            self.batches += 1
+            self.writes += len(batch)
+            self.retries += retries
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self._batch_sizes.append(len(batch))
+            self._queue_waits_ms.extend((started_at - write.enqueued_at) * 1000 for write in batch)
+
+    def snapshot(self) -> Dict:
+        """Текущие значения метрик."""
+        with self._lock:
+            sizes = sorted(self._batch_sizes)
+            waits = sorted(self._queue_waits_ms)
+            return {
+                "batches": self.batches,
+                "writes": self.writes,
+                "retries": self.retries,
+                "batch_size": {
+                    "avg": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+                    "p50": _percentile(sizes, 50),
+                    "max": self.max_batch_size
+                },
+                "queue_wait_ms": {
+                    "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p50": round(_percentile(waits, 50), 3),
+                    "p99": round(_percentile(waits, 99), 3)
+                }
+            }
+
+def _percentile(values: List[float], percent: int) -> float:
+    if not values:
+        return 0
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+metrics = WriteMetrics()
+
+class WriteCoordinator:
+    """Выделенный поток записи для одной базы данных."""
+
+    def __init__(self, bind: Engine):
+        self.bind = bind
+        self._queue: "queue.Queue[_Write]" = queue.Queue()
+        self._last_batch_size = 0
+        self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation: Operation, user_id: Optional[int]) -> Future:
+        """Ставит операцию в очередь; future завершится после commit порции."""
+        write = _Write(operation, user_id)
+        self._queue.put(write)
+        return write.future
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self) -> List[_Write]:
+        """Ждет первую операцию и добирает те, что придут за окно."""
+        settings = get_settings()
+        batch = [self._queue.get()]
+        if self._last_batch_size <= 1 and self._queue.empty():
+            self._last_batch_size = 1
+            return batch
+        deadline = time.perf_counter() + settings.group_commit_window_ms / 1000
+        while len(batch) < settings.group_commit_max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._last_batch_size = len(batch)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            started_at = time.perf_counter()
+            retries = self._commit_batch(batch)
+            metrics.record(batch, started_at, retries)
+
+    def _commit_batch(self, batch: List[_Write]) -> int:
+        """
+        Выполняет операции в одной транзакции и завершает их future.
+
+        Returns:
+            int: сколько раз порцию пришлось выполнить заново из-за ошибок операций
+        """
+        pending = list(batch)
+        retries = 0
+        while pending:
+            db = SessionLocal(bind=self.bind)
+            done = []
+            failed = None
+            try:
+                for write in pending:
+                    # Сессия ограничивается пользователем текущей операции
+                    # (см. app/partitioning.py); flush проставляет владельца
+                    db.info[USER_KEY] = write.user_id
+                    flushes_before = db.info.get(FLUSH_COUNT_KEY, 0)
+                    try:
+                        result = write.operation(db)
+                        db.flush()
+                    except Exception as e:
+                        if _has_changes(db, flushes_before):
+                            failed = (write, e)
+                            break
+                        # Операция ничего не изменила - откат не нужен
+                        write.future.set_exception(e)
+                        continue
+                    done.append((write, result))
+
+                if failed is None:
+                    db.commit()
+            except Exception as e:
+                # Ошибка commit относится ко всей порции
+                db.rollback()
+                for write, _ in done:
+                    write.future.set_exception(e)
+                return retries
+            finally:
+                if failed is not None:
+                    db.rollback()
+                db.close()
+
+            if failed is None:
+                for write, result in done:
+                    write.future.set_result(result)
+                return retries
+
+            # Ошибка операции, изменившей данные: порция откачена,
+            # повторяем ее без этой операции (и без уже завершенных)
+            write, error = failed
+            write.future.set_exception(error)
+            pending = [item for item in pending if not item.future.done()]
+            retries += 1
+        return retries
+
+_coordinators: Dict[str, WriteCoordinator] = {}
+_coordinators_lock = threading.Lock()
+
+def coordinator_for(bind: Engine) -> WriteCoordinator:
+    """Поток записи для базы данных (создается при первой записи)."""
+    key = bind.url.render_as_string(hide_password=False)
+    with _coordinators_lock:
+        coordinator = _coordinators.get(key)
+        if coordinator is None:
+            coordinator = _coordinators[key] = WriteCoordinator(bind)
+        return coordinator
+
+def execute(db: Session, operation: Operation) -> Any:
+    """
+    Выполняет операцию записи и сохраняет изменения.
+
+    Args:
+        db: сессия запроса (определяет базу данных и пользователя)
+        operation: функция, которая изменяет объекты в переданной ей сессии
+                   и возвращает результат для ответа
+
+    Returns:
+        Any: результат операции
+
+    Raises:
+        Exception: ошибка операции или commit (например, HTTPException 404)
+    """
+    if not get_settings().group_commit:
+        try:
+            result = operation(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+
+    coordinator = coordinator_for(db.get_bind())
+    return coordinator.submit(operation, db.info.get(USER_KEY)).result()
+
+def get_metrics() -> Dict:
+    """Метрики группового commit и глубина очередей потоков записи."""
+    with _coordinators_lock:
+        depth = sum(coordinator.queue_depth for coordinator in _coordinators.values())
+        writers = len(_coordinators)
+    return {
+        "enabled": get_settings().group_commit,
+        "writers": writers,
+        "queue_depth": depth,
+        **metrics.snapshot()
+    }
@@ -0,0 +1,356 @@
+"""
+Модуль jobs.py выполняет AI задания в фоне (асинхронный режим /api/ai/process).
+
+При медленном ответе Yandex GPT синхронный запрос не укладывался в таймаут
+axios (10 секунд), клиент получал ошибку, а сервер продолжал работу впустую.
+В асинхронном режиме (POST /api/ai/process?mode=async) запрос только
+сохраняет задание и сразу возвращает его ID, а результат клиент получает:
+- опросом GET /api/ai/jobs/{id};
+- или push-уведомлениями GET /api/ai/jobs/{id}/events (Server-Sent Events).
+
+Задания хранятся в таблице ai_jobs основной базы данных, поэтому ожидающие
+задания не теряются при перезапуске сервера. Очередь выполняют
+APP_AI_JOB_WORKERS потоков процесса:
+- задание выбирается по приоритету, затем по времени создания, и
+  закрепляется за воркером условным UPDATE (status = 'queued'), поэтому
+  несколько потоков и процессов не выполнят его дважды;
+- закрепление действует APP_AI_JOB_LEASE_SECONDS. Задание, которое не
+  завершилось за это время (процесс упал или перезапущен), возвращается
+  в очередь, пока не исчерпано APP_AI_JOB_MAX_ATTEMPTS попыток;
+- завершенные задания удаляются через APP_AI_JOB_TTL_HOURS часов.
+
+Обработчики заданий регистрируются по типу:
+    @jobs.handler("process")
+    def process(payload: dict) -> dict:
+        ...
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from starlette.concurrency import run_in_threadpool
+
+from app import models
+from app.config import get_settings
+from app.database import SessionLocal
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+FINISHED = ("done", "failed")
+
+# Как часто воркеры проверяют очередь без уведомления (задания,
+# добавленные другими процессами) и как часто обслуживают таблицу
+POLL_INTERVAL_SECONDS = 1.0
+MAINTENANCE_INTERVAL_SECONDS = 60.0
+
+# SSE: как часто перечитывать задание из базы (если его выполняет другой
+# процесс, уведомление сюда не придет) и как часто слать пустой комментарий,
+# чтобы прокси не закрыли соединение
+EVENTS_POLL_SECONDS = 2.0
+EVENTS_HEARTBEAT_SECONDS = 15.0
+
+_handlers: Dict[str, Callable[[dict], dict]] = {}
+
+def handler(kind: str):
+    """Регистрирует обработчик заданий типа kind. Используется как декоратор."""
+    def register(callback: Callable[[dict], dict]):
+        _handlers[kind] = callback
+        return callback
+    return register
+
+class QueueFull(Exception):
+    """В очереди уже APP_AI_JOB_MAX_QUEUED заданий."""
+
+def job_to_dict(job: models.AIJob) -> dict:
+    """Задание в формате ответа API."""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "priority": next((name for name, value in PRIORITIES.items() if value == job.priority), job.priority),
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+# --- Уведомления ожидающих (SSE) ---
+
+_listeners: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+_listeners_lock = threading.Lock()
+
+def listen(job_id: str) -> asyncio.Event:
+    """Событие, которое устанавливается при изменении статуса задания в этом процессе."""
+    event = asyncio.Event()
+    with _listeners_lock:
+        _listeners.setdefault(job_id, []).append((asyncio.get_running_loop(), event))
+    return event
+
+def unlisten(job_id: str, event: asyncio.Event) -> None:
+    with _listeners_lock:
+        listeners = [item for item in _listeners.get(job_id, []) if item[1] is not event]
+        if listeners:
+            _listeners[job_id] = listeners
+        else:
+            _listeners.pop(job_id, None)
+
+def _notify(job_id: str) -> None:
+    with _listeners_lock:
+        listeners = list(_listeners.get(job_id, []))
+    for loop, event in listeners:
+        loop.call_soon_threadsafe(event.set)
+
+def _load(job_id: str, user_id: Optional[int]) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id, user_id)
+        return job_to_dict(job) if job is not None else None
+    finally:
+        db.close()
+
+def _sse(job: dict) -> str:
+    return f"event: status\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+
+async def stream_events(
+    job_id: str,
+    user_id: Optional[int],
+    is_disconnected: Callable[[], Awaitable[bool]]
+) -> Optional[AsyncIterator[str]]:
+    """
+    Поток Server-Sent Events о задании: событие status с заданием при каждом
+    изменении статуса; поток закрывается после done или failed.
+
+    Returns:
+        Optional[AsyncIterator[str]]: генератор событий или None, если задания нет
+    """
+    # Подписка до первого чтения, чтобы не пропустить изменение между ними
+    event = listen(job_id)
+    current = await run_in_threadpool(_load, job_id, user_id)
+    if current is None:
+        unlisten(job_id, event)
+        return None
+
+    async def generate():
+        nonlocal current
+        try:
+            yield _sse(current)
+            last_sent = time.monotonic()
+            while current["status"] not in FINISHED:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=EVENTS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+                if await is_disconnected():
+                    return
+                job = await run_in_threadpool(_load, job_id, user_id)
+                if job is None:
+                    return
+                if job["status"] != current["status"]:
+                    current = job
+                    yield _sse(job)
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= EVENTS_HEARTBEAT_SECONDS:
+                    yield ": ping\n\n"
+                    last_sent = time.monotonic()
+        finally:
+            unlisten(job_id, event)
+
+    return generate()
+
+# --- Очередь ---
+
+def enqueue(db, kind: str, payload: dict, user_id: Optional[int], priority: str = "normal") -> models.AIJob:
+    """
+    Сохраняет задание в очереди и будит воркер.
+
+    Raises:
+        QueueFull: если очередь переполнена
+    """
+    queued = db.query(func.count(models.AIJob.id)).filter(models.AIJob.status == "queued").scalar()
+    if queued >= get_settings().ai_job_max_queued:
+        raise QueueFull()
+
+    job = models.AIJob(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        kind=kind,
+        priority=PRIORITIES[priority],
+        payload=json.dumps(payload, ensure_ascii=False),
+        created_at=datetime.now()
+    )
+    db.add(job)
+    db.commit()
+    _pool.wake()
+    return job
+
+def get_job(db, job_id: str, user_id: Optional[int]) -> Optional[models.AIJob]:
+    """Задание пользователя (чужие задания не возвращаются)."""
+    job = db.get(models.AIJob, job_id)
+    if job is None or job.user_id != user_id:
+        return None
+    return job
+
+def _claim(db) -> Optional[models.AIJob]:
+    """Закрепляет за воркером следующее задание очереди."""
+    Job = models.AIJob
+    settings = get_settings()
+    while True:
+        job_id = db.execute(
+            select(Job.id).where(Job.status == "queued").order_by(Job.priority, Job.created_at).limit(1)
+        ).scalar()
+        if job_id is None:
+            return None
+        now = datetime.now()
+        claimed = db.execute(
+            update(Job).where(Job.id == job_id, Job.status == "queued").values(
+                status="running",
+                started_at=now,
+                lease_until=now + timedelta(seconds=settings.ai_job_lease_seconds),
+                attempts=Job.attempts + 1
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(Job, job_id)
+        # Задание забрал другой воркер - берем следующее
+
+def _finish(job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(models.AIJob).where(models.AIJob.id == job_id, models.AIJob.status == "running").values(
+                status=status,
+                result=json.dumps(result, ensure_ascii=False) if result is not None else None,
+                error=error,
+                finished_at=datetime.now(),
+                lease_until=None
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+    _notify(job_id)
+
+def maintain(now: Optional[datetime] = None) -> None:
+    """
+    Возвращает в очередь задания с истекшим закреплением
+    и удаляет старые завершенные задания.
+    """
+    Job = models.AIJob
+    settings = get_settings()
+    now = now or datetime.now()
+    db = SessionLocal()
+    try:
+        expired = Job.status == "running", Job.lease_until < now
+        db.execute(
+            update(Job).where(*expired, Job.attempts >= settings.ai_job_max_attempts).values(
+                status="failed", error="Задание не завершилось за отведенное время", finished_at=now
+            )
+        )
+        db.execute(update(Job).where(*expired).values(status="queued", lease_until=None))
+        db.execute(
+            delete(Job).where(
+                Job.status.in_(FINISHED),
+                Job.finished_at < now - timedelta(hours=settings.ai_job_ttl_hours)
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+class WorkerPool:
+    """Потоки, выполняющие задания из таблицы ai_jobs."""
+
+    def __init__(self):
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_maintenance = 0.0
+
+    def start(self, workers: int) -> None:
+        self._stopping.clear()
+        try:
+            maintain()
+        except Exception as e:
+            # Например, таблицы ai_jobs нет (APP_INIT_DB=false, схема не создана):
+            # приложение запускается, но задания в этом процессе не выполняются
+            print(f"⚠️ Воркеры AI заданий не запущены: {str(e)}")
+            return
+        for number in range(workers):
+            thread = threading.Thread(target=self._run, name=f"ai-job-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self.wake(all_workers=True)
+        self._threads.clear()
+
+    def wake(self, all_workers: bool = False) -> None:
+        with self._wakeup:
+            if all_workers:
+                self._wakeup.notify_all()
+            else:
+                self._wakeup.notify()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if not self._run_next():
+                    with self._wakeup:
+                        self._wakeup.wait(POLL_INTERVAL_SECONDS)
+                self._maybe_maintain()
+            except Exception as e:
+                print(f"❌ Ошибка воркера AI заданий: {str(e)}")
+                self._stopping.wait(POLL_INTERVAL_SECONDS)
+
+    def _maybe_maintain(self) -> None:
+        now = datetime.now().timestamp()
+        if now - self._last_maintenance >= MAINTENANCE_INTERVAL_SECONDS:
+            self._last_maintenance = now
+            maintain()
+
+    def _run_next(self) -> bool:
+        """Выполняет одно задание. Returns: было ли задание в очереди."""
+        db = SessionLocal()
+        try:
+            job = _claim(db)
+            if job is None:
+                return False
+            job_id, kind, payload = job.id, job.kind, json.loads(job.payload)
+        finally:
+            db.close()
+        _notify(job_id)
+
+        callback = _handlers.get(kind)
+        if callback is None:
+            _finish(job_id, "failed", error=f"Неизвестный тип задания: {kind}")
+            return True
+        try:
+            result = callback(payload)
+        except Exception as e:
+            print(f"❌ Ошибка AI задания {job_id}: {str(e)}")
+            _finish(job_id, "failed", error=str(e))
+            return True
+        _finish(job_id, "done", result=result)
+        return True
+
+_pool = WorkerPool()
+
+def start_workers() -> None:
+    """Запускает воркеры процесса (APP_AI_JOB_WORKERS)."""
+    workers = get_settings().ai_job_workers
+    if workers > 0:
+        _pool.start(workers)
+
+def stop_workers() -> None:
+    """Останавливает воркеры; начатые задания будут выполнены заново после перезапуска."""
+    _pool.stop()
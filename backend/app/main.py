@@ -4,22 +4,41 @@
 """
 
 # Импорт стандартных библиотек Python
+import asyncio  # Для фоновых задач (архивация)
 import datetime  # Для работы с датами и временем
+import heapq  # Для слияния задач и повторений по сроку
+from itertools import islice  # Для ограничения числа повторений
 
 # Импорт компонентов FastAPI
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware  # Для обработки CORS (кросс-доменных запросов)
-from fastapi.responses import JSONResponse  # Для возврата JSON ответов
+from fastapi.responses import JSONResponse, StreamingResponse  # Для возврата JSON и потоковых ответов
+from starlette.concurrency import run_in_threadpool  # Для синхронной работы с БД из async эндпоинтов
 from pydantic import BaseModel  # Для валидации данных (Pydantic модели)
 from sqlalchemy.orm import Session  # Для работы с сессиями базы данных
-from typing import Optional, List  # Для аннотации типов (опциональные параметры, списки)
+from typing import Optional, List, Literal  # Для аннотации типов (опциональные параметры, списки)
 
 # Импорт собственных модулей проекта
-from app.database import SessionLocal, engine, init_db  # Настройки базы данных
+from app.database import SessionLocal, engine, init_db, get_db  # Настройки базы данных и сессии
 from app import models  # Модели SQLAlchemy (таблицы базы данных)
-
-# Создание таблиц в базе данных при импорте модуля
-models.Base.metadata.create_all(bind=engine)
+from app import crud  # Запросы к базе данных
+from app import calendar_view  # Сводка задач по дням месяца
+from app import stats  # Счетчики задач (task_stats)
+from app import archive  # Архив старых выполненных задач
+from app import group_commit  # Групповой commit для эндпоинтов записи
+from app import sync  # Дельта-синхронизация (GET /tasks/changes)
+from app import transfer  # Потоковый экспорт и импорт задач
+from app import columnar  # Ответы в MessagePack (Accept: application/msgpack)
+from app import duplicates  # Поиск похожих задач (MinHash/LSH)
+from app import similar  # Похожие задачи и подсказки тегов (TF-IDF)
+from app import suggest  # Подсказки названий и тегов при вводе (префиксный индекс)
+from app import recurrence  # Повторяющиеся задачи (правила RRULE)
+from app import jobs  # Фоновые AI задания (/api/ai/process?mode=async)
+from app import reminders  # Напоминания о сроках (GET /tasks/reminders/events)
+from app import ai  # AI эндпоинты и аутентификация (/api/*)
+from app.partitioning import get_user_db  # Сессия в шарде текущего пользователя
+from app.auth import check_secret_key, get_stream_user_id  # Ключ подписи токенов, ID пользователя из токена (для потоков событий)
+from app.config import get_settings  # Настройки сервера (переменные окружения APP_*)
 
 # ============================================================================
 # PYDANTIC МОДЕЛИ ДЛЯ ВАЛИДАЦИИ ДАННЫХ
@@ -34,10 +53,19 @@ class TaskCreate(BaseModel):
         title (str): Заголовок задачи (обязательное поле)
         description (Optional[str]): Описание задачи (может быть пустым)
         is_completed (bool): Статус выполнения (по умолчанию False)
+        due_date (Optional[datetime]): Срок выполнения
+        priority (str): Приоритет - high, medium или low (по умолчанию medium)
+        tags (List[str]): Теги задачи
+        recurrence (Optional[str]): Правило повторения - RRULE ("FREQ=WEEKLY;BYDAY=MO")
+            или фраза ("каждый понедельник в 10 утра"); due_date - первое повторение
     """
     title: str
     description: Optional[str] = None
     is_completed: bool = False
+    due_date: Optional[datetime.datetime] = None
+    priority: Literal["high", "medium", "low"] = "medium"
+    tags: List[str] = []
+    recurrence: Optional[str] = None
 
 class TaskUpdate(BaseModel):
     """
@@ -48,10 +76,18 @@ class TaskUpdate(BaseModel):
         title (Optional[str]): Новый заголовок задачи
         description (Optional[str]): Новое описание задачи
         is_completed (Optional[bool]): Новый статус выполнения
+        due_date (Optional[datetime]): Новый срок (None - убрать срок)
+        priority (Optional[str]): Новый приоритет
+        tags (Optional[List[str]]): Новый список тегов
+        recurrence (Optional[str]): Новое правило повторения (None - задача не повторяется)
     """
     title: Optional[str] = None
     description: Optional[str] = None
     is_completed: Optional[bool] = None
+    due_date: Optional[datetime.datetime] = None
+    priority: Optional[Literal["high", "medium", "low"]] = None
+    tags: Optional[List[str]] = None
+    recurrence: Optional[str] = None
     
     class Config:
         """Конфигурация Pydantic модели."""
@@ -80,29 +116,89 @@ app.add_middleware(
     allow_headers=["*"],  # Разрешаем все заголовки
 )
 
-# ============================================================================
-# ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
-# ============================================================================
+@app.on_event("startup")
+def configure_threadpool():
+    """
+    Задает размер пула потоков, в котором выполняются синхронные эндпоинты.
+    По умолчанию в AnyIO он равен 40 потокам на процесс.
+    """
+    import anyio.to_thread
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = get_settings().threadpool_size
 
-def get_db():
+@app.on_event("startup")
+def check_auth_settings():
     """
-    Функция-генератор для получения сессии базы данных.
-    
-    Эта функция используется как dependency в эндпоинтах FastAPI.
-    Каждый запрос получает свою сессию базы данных, которая автоматически
-    закрывается после завершения обработки запроса.
-    
-    Yields:
-        Session: Сессия SQLAlchemy для работы с базой данных
+    Не дает запустить приложение без ключа подписи токенов при обязательной
+    авторизации (иначе токен для любого пользователя подписал бы кто угодно).
     """
-    # Создаем новую сессию базы данных
-    db = SessionLocal()
-    try:
-        # Возвращаем сессию для использования в эндпоинте
-        yield db
-    finally:
-        # Закрываем сессию после завершения работы (даже если произошла ошибка)
-        db.close()
+    check_secret_key()
+
+@app.on_event("startup")
+def create_schema():
+    """
+    Создает таблицы при старте приложения (а не при импорте модуля).
+    В продакшене с несколькими воркерами лучше выставить APP_INIT_DB=false
+    и один раз выполнить python -m app.database перед запуском.
+    """
+    if get_settings().init_db:
+        init_db()
+
+# Фоновая задача переноса старых выполненных задач в архив
+_archive_task = None
+
+@app.on_event("startup")
+async def start_archiver():
+    """
+    Запускает периодический перенос задач в архив и сжатие отметок об
+    удаленных задачах (app/archive.py). Выключается настройкой
+    APP_ARCHIVE_INTERVAL_SECONDS=0 (перенос в архив - еще и APP_ARCHIVE_AFTER_DAYS=0).
+    """
+    global _archive_task
+    settings = get_settings()
+    if settings.archive_interval_seconds > 0:
+        _archive_task = asyncio.create_task(archive.archive_loop())
+
+@app.on_event("shutdown")
+async def stop_archiver():
+    """Останавливает фоновую задачу архивации."""
+    if _archive_task is not None:
+        _archive_task.cancel()
+
+@app.on_event("startup")
+def start_ai_jobs():
+    """
+    Запускает воркеры фоновых AI заданий (app/jobs.py). Задания, которые
+    ждали в очереди до перезапуска, выполняются. APP_AI_JOB_WORKERS=0 -
+    не выполнять задания в этом процессе.
+    """
+    jobs.start_workers()
+
+@app.on_event("shutdown")
+def stop_ai_jobs():
+    """Останавливает воркеры фоновых AI заданий."""
+    jobs.stop_workers()
+
+@app.on_event("startup")
+def start_reminders():
+    """
+    Запускает планировщик напоминаний о сроках (app/reminders.py).
+    APP_REMINDER_HORIZON_HOURS=0 - не запускать.
+    """
+    reminders.start_scheduler()
+
+@app.on_event("shutdown")
+def stop_reminders():
+    """Останавливает планировщик напоминаний."""
+    reminders.stop_scheduler()
+
+# Подключаем AI эндпоинты (раньше их обслуживали отдельные Flask и http.server процессы)
+app.include_router(ai.router)
+
+# ============================================================================
+# ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
+# ============================================================================
 
 def task_to_dict(task: models.Task) -> dict:
     """
@@ -120,7 +216,40 @@ def task_to_dict(task: models.Task) -> dict:
         "description": task.description,
         "is_completed": task.is_completed,
         "created_at": task.created_at.isoformat() if task.created_at else None,
-        "updated_at": task.updated_at.isoformat() if task.updated_at else None
+        "updated_at": task.updated_at.isoformat() if task.updated_at else None,
+        "due_date": task.due_date.isoformat() if task.due_date else None,
+        "priority": task.priority,
+        "tags": [tag.name for tag in task.tags],
+        "recurrence": task.recurrence
+    }
+
+def similar_response(db: Session, matches: List, own_tags: List[str] = ()) -> dict:
+    """
+    Ответ эндпоинтов похожих задач.
+    
+    Args:
+        db (Session): Сессия базы данных
+        matches (List): Пары (ID задачи, сходство) из app/similar.py
+        own_tags (List[str]): Теги, которые не нужно предлагать
+    
+    Returns:
+        dict: Похожие задачи (с полем similarity) и предлагаемые теги
+    """
+    # Задачи читаются по первичному ключу - только найденные индексом
+    found = db.query(models.Task).filter(models.Task.id.in_([task_id for task_id, _ in matches])).all()
+    by_id = {task.id: task for task in found}
+    
+    # Задачи, удаленные другим процессом после построения индекса, пропускаем
+    ranked = [(by_id[task_id], score) for task_id, score in matches if task_id in by_id]
+    tasks_list = []
+    for task, score in ranked:
+        item = task_to_dict(task)
+        item["similarity"] = round(score, 3)
+        tasks_list.append(item)
+    
+    return {
+        "tasks": tasks_list,
+        "suggested_tags": similar.suggest_tags(ranked, exclude=own_tags)
     }
 
 # ============================================================================
@@ -144,7 +273,17 @@ def root():
             "get_task": "/tasks/{id}",
             "update_task": "/tasks/{id} (PUT)",
             "delete_task": "/tasks/{id} (DELETE)",
-            "complete_task": "/tasks/{id}/complete (PATCH)"
+            "complete_task": "/tasks/{id}/complete (PATCH)",
+            "agenda": "/tasks/agenda?range=today|overdue|week",
+            "calendar": "/tasks/calendar?month=YYYY-MM",
+            "similar": "/tasks/similar?text=... или /tasks/{id}/similar",
+            "suggest": "/tasks/suggest?prefix=...",
+            "reminders": "/tasks/reminders/events (Server-Sent Events)",
+            "stats": "/tasks/stats",
+            "tags": "/tags",
+            "ai_status": "/api/ai/status",
+            "ai_process": "/api/ai/process (POST)",
+            "ai_chat": "/api/ai/chat (POST)"
         }
     }
 
@@ -153,15 +292,39 @@ def get_tasks(
     skip: int = Query(0, ge=0, description="Количество пропущенных задач"),
     limit: int = Query(100, ge=1, le=1000, description="Максимальное количество задач"),
     completed: Optional[bool] = Query(None, description="Фильтр по статусу выполнения"),
-    db: Session = Depends(get_db)
+    tag: Optional[str] = Query(None, description="Фильтр по тегу"),
+    include_archived: bool = Query(False, description="Включить задачи из архива"),
+    occurrences_from: Optional[datetime.datetime] = Query(
+        None, alias="from", description="Начало интервала повторений (по умолчанию - сегодня)"
+    ),
+    occurrences_to: Optional[datetime.datetime] = Query(
+        None, alias="to", description="Конец интервала повторений (по умолчанию - через неделю)"
+    ),
+    binary: bool = Depends(columnar.wants_msgpack),
+    db: Session = Depends(get_user_db)
 ):
     """
     Получает список задач с поддержкой пагинации и фильтрации.
     
+    С заголовком Accept: application/msgpack ответ возвращается в MessagePack,
+    задачи - по колонкам (см. app/columnar.py).
+    
+    Повторяющиеся задачи возвращаются одной задачей с полем occurrences -
+    повторениями в интервале from/to (вычисляются по правилу, в базе
+    хранятся только выполненные повторения, см. app/recurrence.py).
+    В MessagePack повторения передаются отдельным полем ответа occurrences -
+    списком пар [[ID задачи, [[срок, выполнено], ...]], ...] (не словарем:
+    целые ключи не принимают стандартные декодеры MessagePack).
+    
     Args:
         skip (int): Сколько задач пропустить (для пагинации)
         limit (int): Максимальное количество возвращаемых задач
         completed (Optional[bool]): Фильтр по статусу выполнения (True - выполненные, False - активные, None - все)
+        tag (Optional[str]): Фильтр по тегу (выполняется в SQL через task_tags)
+        include_archived (bool): Добавить старые выполненные задачи из архива
+        occurrences_from (Optional[datetime]): параметр from - начало интервала повторений
+        occurrences_to (Optional[datetime]): параметр to - конец интервала повторений
+        binary (bool): Клиент запросил MessagePack
         db (Session): Сессия базы данных (автоматически инжектируется FastAPI)
     
     Returns:
@@ -175,18 +338,61 @@ def get_tasks(
         if completed is not None:
             query = query.filter(models.Task.is_completed == completed)
         
-        # Получаем общее количество задач (для пагинации на фронтенде)
-        total = query.count()
+        # Применяем фильтр по тегу, если он указан
+        if tag is not None:
+            query = crud.filter_by_tag(query, tag)
         
-        # Применяем пагинацию и сортировку (новые задачи сначала)
-        tasks = query.appointment_by(models.Task.created_at.desc()).offset(skip).limit(limit).all()
+        # Получаем общее количество задач (для пагинации на фронтенде).
+        # Без фильтра по тегу оно берется из счетчиков, без COUNT(*) по таблице
+        total = crud.get_tasks_count(db, completed=completed, tag=tag)
         
-        # Преобразуем объекты SQLAlchemy в словари для JSON сериализации
-        tasks_list = [task_to_dict(task) for task in tasks]
+        if include_archived:
+            # Страница собирается из таблицы tasks и архива (app/archive.py)
+            total += archive.count_archived(db, completed=completed, tag=tag)
+            tasks = archive.merge_with_archived(db, query, skip, limit, completed=completed, tag=tag)
+        else:
+            # Применяем пагинацию и сортировку (новые задачи сначала)
+            # id - для однозначного порядка при одинаковой дате в любой СУБД
+            tasks = query.order_by(models.Task.created_at.desc(), models.Task.id.desc()).offset(skip).limit(limit).all()
         
         # Логируем успешное выполнение (для отладки)
-        print(f"✅ Получено {len(tasks_list)} задач (всего в БД: {total})")
+        print(f"✅ Получено {len(tasks)} задач (всего в БД: {total})")
         
+        # Повторения повторяющихся задач страницы в запрошенном интервале
+        window_from = occurrences_from or datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        window_to = occurrences_to or window_from + datetime.timedelta(days=recurrence.DEFAULT_WINDOW_DAYS)
+        repeated = recurrence.task_occurrences(
+            db,
+            (task for task in tasks if isinstance(task, models.Task) and task.recurrence),
+            window_from,
+            window_to
+        )
+        
+        if binary:
+            content = {
+                "tasks": columnar.task_columns(tasks, archived=include_archived),
+                "total": total
+            }
+            if repeated:
+                content["occurrences"] = [
+                    [task_id, [[columnar.epoch_ms(item.due_date), item.is_completed] for item in items]]
+                    for task_id, items in repeated.items()
+                ]
+            return columnar.response(content)
+        
+        # Преобразуем объекты SQLAlchemy в словари для JSON сериализации
+        tasks_list = []
+        for task in tasks:
+            if isinstance(task, models.ArchivedTask):
+                tasks_list.append(archive.archived_to_dict(task))
+                continue
+            item = task_to_dict(task)
+            if task.id in repeated:
+                item["occurrences"] = [
+                    {"date": occurrence.due_date.isoformat(), "is_completed": occurrence.is_completed}
+                    for occurrence in repeated[task.id]
+                ]
+            tasks_list.append(item)
         return {
             "tasks": tasks_list,
             "total": total
@@ -200,61 +406,389 @@ def get_tasks(
 @app.post("/tasks")
 def create_task(
     task: TaskCreate,  # Валидируем входные данные с помощью Pydantic модели
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Создает новую задачу.
     
+    Ответ содержит поле duplicates - похожие невыполненные задачи
+    пользователя (возможные дубликаты, см. app/duplicates.py).
+    
+    Для повторяющейся задачи передается recurrence; если это фраза
+    ("каждый понедельник в 10 утра") и срок не указан, срок - ближайшее
+    повторение.
+    
     Args:
         task (TaskCreate): Данные для создания задачи (валидируются Pydantic)
         db (Session): Сессия базы данных
     
     Returns:
-        dict: Созданная задача
+        dict: Созданная задача и список duplicates
     
     Raises:
-        HTTPException: 400 если заголовок пустой, 500 при внутренней ошибке
+        HTTPException: 400 если заголовок пустой или правило повторения неверное,
+                       500 при внутренней ошибке
     """
     try:
         # Проверяем, что заголовок не пустой
         if not task.title or not task.title.strip():
             raise HTTPException(status_code=400, detail="Заголовок задачи не может быть пустым")
         
-        # Создаем новый объект задачи
-        new_task = models.Task(
-            title=task.title.strip(),
-            description=task.description.strip() if task.description else None,
-            is_completed=task.is_completed,
-            created_at=datetime.datetime.now(),
-            updated_at=datetime.datetime.now()
-        )
+        # Проверяем правило повторения и приводим его к формату RRULE
+        rule, due_date = None, task.due_date
+        if task.recurrence:
+            try:
+                rule, due_date = recurrence.resolve(task.recurrence, task.due_date)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Неверное правило повторения: {e}")
         
-        # Добавляем задачу в сессию
-        db.add(new_task)
+        # Ищем похожие задачи до создания, чтобы новая задача не нашла сама себя
+        similar = duplicates.find(db, task.title.strip(), task.description)
         
-        # Сохраняем изменения в базе данных
-        db.commit()
+        def apply(db: Session) -> dict:
+            # Создаем новый объект задачи
+            new_task = models.Task(
+                title=task.title.strip(),
+                description=task.description.strip() if task.description else None,
+                is_completed=task.is_completed,
+                due_date=due_date,
+                priority=task.priority,
+                recurrence=rule,
+                created_at=datetime.datetime.now(),
+                updated_at=datetime.datetime.now()
+            )
+            
+            # Добавляем задачу в сессию
+            db.add(new_task)
+            
+            # Привязываем теги и увеличиваем их счетчики в той же транзакции
+            crud.set_task_tags(db, new_task, task.tags)
+            
+            # Отправляем изменения в базу данных (получаем сгенерированный ID)
+            db.flush()
+            return task_to_dict(new_task)
         
-        # Обновляем объект из базы данных (получаем сгенерированный ID)
-        db.refresh(new_task)
+        # Сохраняем изменения (сразу или в общей транзакции группового commit)
+        created = group_commit.execute(db, apply)
+        created["duplicates"] = similar
         
         # Логируем успешное создание
-        print(f"✅ Создана новая задача: ID={new_task.id}, title='{new_task.title}'")
+        print(f"✅ Создана новая задача: ID={created['id']}, title='{created['title']}'")
+        if similar:
+            print(f"ℹ️ Похожие задачи: {[item['id'] for item in similar]}")
         
         # Возвращаем созданную задачу
-        return task_to_dict(new_task)
+        return created
         
     except HTTPException:
         # Пробрасываем HTTPException дальше (например, ошибка 400)
         raise
     except Exception as e:
-        # Откатываем транзакцию при ошибке
-        db.rollback()
+        # Транзакция уже откачена в group_commit.execute
         print(f"❌ Ошибка при создании задачи: {str(e)}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
+@app.get("/tasks/agenda")
+def get_agenda(
+    period: Optional[Literal["today", "overdue", "week"]] = Query(
+        None, alias="range", description="Готовый интервал: today - сегодня, overdue - просроченные, week - эта неделя"
+    ),
+    date_from: Optional[datetime.datetime] = Query(None, alias="from", description="Начало интервала"),
+    date_to: Optional[datetime.datetime] = Query(None, alias="to", description="Конец интервала (не включительно)"),
+    limit: int = Query(100, ge=1, le=1000, description="Максимальное количество задач"),
+    binary: bool = Depends(columnar.wants_msgpack),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Получает невыполненные задачи со сроком в заданном интервале (повестка).
+    
+    Интервал задается параметром range или явно через from/to.
+    Если передано и то и другое, from/to имеют приоритет.
+    
+    Повторяющиеся задачи попадают в повестку каждым невыполненным
+    повторением в интервале (due_date - срок повторения). Для интервала
+    без начала (overdue) повторения берутся только за последние
+    recurrence.OVERDUE_LOOKBACK_DAYS дней.
+    
+    Args:
+        period (Optional[str]): параметр range - today, overdue или week
+        date_from (Optional[datetime]): начало интервала
+        date_to (Optional[datetime]): конец интервала
+        limit (int): максимальное количество задач
+        binary (bool): клиент запросил MessagePack
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: Задачи, отсортированные по сроку, и границы интервала
+    """
+    now = datetime.datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    # Границы готовых интервалов
+    if period == "today":
+        range_from, range_to = today, today + datetime.timedelta(days=1)
+    elif period == "overdue":
+        range_from, range_to = None, now
+    elif period == "week":
+        week_start = today - datetime.timedelta(days=today.weekday())
+        range_from, range_to = week_start, week_start + datetime.timedelta(days=7)
+    else:
+        range_from, range_to = None, None
+    
+    date_from = date_from or range_from
+    date_to = date_to or range_to
+    
+    tasks = crud.get_agenda(db, date_from=date_from, date_to=date_to, limit=limit)
+    
+    # Повторения вычисляются лениво: генераторы задач сливаются по сроку
+    # и останавливаются, как только набрано limit задач
+    repeated = recurrence.agenda_occurrences(db, date_from, date_to, now)
+    tasks = list(islice(heapq.merge(tasks, repeated, key=lambda task: task.due_date), limit))
+    
+    if binary:
+        return columnar.response({
+            "tasks": columnar.task_columns(tasks),
+            "from": columnar.epoch_ms(date_from),
+            "to": columnar.epoch_ms(date_to)
+        })
+    
+    return {
+        "tasks": [task_to_dict(task) for task in tasks],
+        "from": date_from.isoformat() if date_from else None,
+        "to": date_to.isoformat() if date_to else None
+    }
+
+@app.get("/tasks/changes")
+def get_changes(
+    since: int = Query(0, ge=0, description="Курсор из предыдущего ответа (0 - все задачи)"),
+    limit: int = Query(500, ge=1, le=1000, description="Максимальное количество изменений"),
+    binary: bool = Depends(columnar.wants_msgpack),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Получает задачи, созданные или измененные после курсора, и ID удаленных задач.
+    
+    Клиент сохраняет cursor из ответа и передает его в следующем запросе.
+    Если has_more = true, нужно сразу запросить следующую порцию.
+    Если full_resync = true, курсор слишком старый (отметки об удалениях
+    уже сжаты): нужно заново загрузить GET /tasks и продолжить с cursor из
+    этого ответа.
+    
+    Args:
+        since (int): Курсор
+        limit (int): Максимальное количество изменений в ответе
+        binary (bool): Клиент запросил MessagePack
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: Измененные задачи, удаленные ID, новый курсор и признаки has_more, full_resync
+    """
+    changes = sync.get_changes(db, since, limit)
+    
+    tasks = columnar.task_columns(changes.tasks) if binary else [task_to_dict(task) for task in changes.tasks]
+    result = {
+        "tasks": tasks,
+        "deleted": changes.deleted,
+        "cursor": changes.cursor,
+        "has_more": changes.has_more,
+        "full_resync": changes.full_resync
+    }
+    return columnar.response(result) if binary else result
+
+@app.get("/tasks/export")
+def export_tasks(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Формат файла: ndjson или csv"),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Выгружает все задачи пользователя файлом NDJSON (одна задача в строке) или CSV.
+    
+    Ответ формируется потоково: задачи читаются из базы порциями по мере
+    отправки, поэтому память сервера не зависит от числа задач.
+    
+    Args:
+        fmt (str): параметр format - ndjson или csv
+        db (Session): Сессия базы данных
+    
+    Returns:
+        StreamingResponse: Файл с задачами
+    """
+    return StreamingResponse(
+        transfer.export_chunks(db, fmt, task_to_dict),
+        media_type=transfer.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{fmt}"'}
+    )
+
+@app.post("/tasks/import")
+async def import_tasks(
+    request: Request,
+    fmt: Optional[Literal["ndjson", "csv"]] = Query(
+        None, alias="format", description="Формат файла (по умолчанию - по Content-Type)"
+    ),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Загружает задачи из файла NDJSON или CSV (формат как у экспорта).
+    
+    Тело запроса читается по частям и разбирается построчно. Корректные
+    строки сохраняются порциями в отдельных транзакциях, строки с ошибками
+    пропускаются и перечисляются в ответе с номерами строк.
+    
+    Args:
+        request (Request): Запрос (тело - файл с задачами)
+        fmt (Optional[str]): параметр format - ndjson или csv
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: Сколько задач загружено, сколько строк с ошибками и первые ошибки
+    """
+    if fmt is None:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    
+    result = transfer.ImportResult()
+    records = []
+    saving = None
+    
+    try:
+        lines = transfer.iter_lines(request.stream())
+        async for line_number, data, error in transfer.iter_records(lines, fmt):
+            if error:
+                result.error(line_number, error)
+                continue
+            records.append((line_number, data))
+            
+            # Проверка и сохранение порции выполняются в пуле потоков, а следующая
+            # порция тем временем читается. Сессия одна, поэтому одновременно
+            # сохраняется не больше одной порции
+            if len(records) >= transfer.IMPORT_BATCH_SIZE:
+                if saving is not None:
+                    await saving
+                saving = asyncio.ensure_future(run_in_threadpool(transfer.save_batch, db, records, result))
+                records = []
+    finally:
+        # Сессия закрывается после ответа - порция должна быть сохранена до этого
+        if saving is not None:
+            await saving
+    
+    await run_in_threadpool(transfer.save_batch, db, records, result)
+    
+    print(f"✅ Импорт задач: загружено {result.imported}, ошибок {result.failed}")
+    return result.as_dict()
+
+@app.get("/tasks/stats")
+def get_stats(db: Session = Depends(get_user_db)):
+    """
+    Получает статистику задач: всего, выполнено, открыто,
+    открытые по приоритетам и по дням срока.
+    
+    Счетчики хранятся в таблице task_stats и обновляются в той же
+    транзакции, что и задачи, поэтому запрос не зависит от числа задач.
+    
+    Returns:
+        dict: Статистика задач
+    """
+    return stats.get_stats(db)
+
+@app.get("/tasks/calendar")
+def get_calendar(
+    month: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Месяц в формате YYYY-MM"),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Получает сводку задач по дням месяца для календаря.
+    
+    Для каждого дня со сроками возвращаются: общее количество задач,
+    количество выполненных, разбивка по приоритетам (открытые/выполненные)
+    и первые несколько задач. Результат кэшируется по месяцу и сбрасывается
+    при изменении задач этого месяца.
+    
+    Args:
+        month (str): Месяц в формате YYYY-MM
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: Месяц и список дней с задачами
+    """
+    year, month_number = (int(part) for part in month.split("-"))
+    return calendar_view.get_month(db, year, month_number)
+
+@app.get("/tasks/reminders/events")
+async def reminder_events(request: Request, user_id: Optional[int] = Depends(get_stream_user_id)):
+    """
+    Server-Sent Events с напоминаниями о сроках задач пользователя.
+    
+    Событие reminder приходит за APP_REMINDER_LEAD_MINUTES минут до срока
+    каждой невыполненной задачи (и каждого повторения повторяющейся).
+    Напоминания планируются в памяти (app/reminders.py), поэтому
+    подключение не создает запросов к базе данных. Напоминания, пришедшие,
+    пока клиент не был подключен, не повторяются.
+    
+    EventSource не отправляет заголовки, поэтому авторизованный клиент
+    передает токен из GET /api/auth/stream-token в параметре ?token=.
+    
+    Returns:
+        StreamingResponse: поток событий {task_id, title, due_date, remind_at}
+    """
+    return StreamingResponse(
+        reminders.stream_events(user_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/tasks/similar")
+def get_similar_by_text(
+    text: str = Query(..., min_length=1, description="Текст, для которого ищутся похожие задачи"),
+    limit: int = Query(10, ge=1, le=50, description="Максимальное количество задач"),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Ищет задачи, похожие на текст (например, пока пользователь вводит новую задачу),
+    и предлагает теги, которые он ставил похожим задачам.
+    
+    Поиск выполняется по TF-IDF индексу в памяти (app/similar.py), без
+    чтения таблицы задач.
+    
+    Args:
+        text (str): Текст для поиска
+        limit (int): Максимальное количество задач
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: Похожие задачи (самые похожие сначала) и предлагаемые теги
+    """
+    return similar_response(db, similar.find(db, text, limit))
+
+@app.get("/tasks/suggest")
+def get_suggestions(
+    prefix: str = Query(..., min_length=1, max_length=255, description="Начало названия задачи или тега"),
+    limit: int = Query(5, ge=1, le=suggest.MAX_SUGGESTIONS, description="Максимальное количество подсказок"),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Подсказки при вводе названия задачи: названия прошлых задач и теги,
+    которые начинаются с prefix, частые и недавние сначала.
+    
+    Подсказки берутся из префиксного индекса в памяти (app/suggest.py),
+    без запросов LIKE к таблице задач. Ответ содержит prefix, чтобы клиент
+    мог отбросить ответы на устаревшие запросы, и кэшируется браузером на
+    несколько секунд (повторный ввод того же префикса не доходит до сервера).
+    Клиенту стоит отправлять запрос после паузы в вводе (api.suggestTasks).
+    
+    Args:
+        prefix (str): Введенное начало названия
+        limit (int): Сколько названий и тегов вернуть
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: prefix, titles [{title, count}] и tags [{name, count}]
+    """
+    return JSONResponse(
+        content={"prefix": prefix, **suggest.suggest(db, prefix, limit)},
+        headers={"Cache-Control": "private, max-age=5"}
+    )
+
 @app.get("/tasks/{task_id}")
-def get_task(task_id: int, db: Session = Depends(get_db)):
+def get_task(task_id: int, db: Session = Depends(get_user_db)):
     """
     Получает задачу по её ID.
     
@@ -278,11 +812,40 @@ def get_task(task_id: int, db: Session = Depends(get_db)):
     # Возвращаем найденную задачу
     return task_to_dict(task)
 
+@app.get("/tasks/{task_id}/similar")
+def get_similar_tasks(
+    task_id: int,
+    limit: int = Query(10, ge=1, le=50, description="Максимальное количество задач"),
+    db: Session = Depends(get_user_db)
+):
+    """
+    Ищет задачи, похожие на задачу task_id, и предлагает теги,
+    которых у нее еще нет.
+    
+    Args:
+        task_id (int): ID задачи
+        limit (int): Максимальное количество задач
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: Похожие задачи (без самой задачи) и предлагаемые теги
+    
+    Raises:
+        HTTPException: 404 если задача не найдена
+    """
+    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    text = f"{task.title} {task.description or ''}"
+    matches = similar.find(db, text, limit, exclude=task.id)
+    return similar_response(db, matches, own_tags=[tag.name for tag in task.tags])
+
 @app.put("/tasks/{task_id}")
 def update_task(
     task_id: int,
     task_update: TaskUpdate,  # Валидируем данные обновления с помощью Pydantic
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_db)
 ):
     """
     Обновляет существующую задачу.
@@ -299,13 +862,13 @@ def update_task(
     Raises:
         HTTPException: 404 если задача не найдена, 500 при внутренней ошибке
     """
-    # Ищем задачу в базе данных
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    
-    if not task:
-        raise HTTPException(status_code=404, detail="Задача не найдена")
-    
-    try:
+    def apply(db: Session) -> dict:
+        # Ищем задачу в базе данных
+        task = db.query(models.Task).filter(models.Task.id == task_id).first()
+        
+        if not task:
+            raise HTTPException(status_code=404, detail="Задача не найдена")
+        
         # Логируем полученные данные обновления
         print(f"🔄 Обновление задачи ID={task_id}")
         print(f"   Полученные данные: {task_update.dict(exclude_unset=True)}")
@@ -351,26 +914,70 @@ def update_task(
                 has_changes = True
                 print(f"   Статус выполнения обновлен: {new_status}")
         
+        # Обновляем срок: явно переданный None убирает срок
+        if 'due_date' in update_data:
+            new_due_date = update_data['due_date']
+            if new_due_date != task.due_date:
+                task.due_date = new_due_date
+                has_changes = True
+                print(f"   Срок обновлен: {new_due_date}")
+        
+        # Обновляем правило повторения: явно переданный None делает задачу обычной.
+        # Правило проверяется и при изменении срока, так как срок - первое повторение
+        if 'recurrence' in update_data or (task.recurrence and 'due_date' in update_data):
+            new_recurrence = update_data.get('recurrence', task.recurrence)
+            if new_recurrence is not None:
+                try:
+                    new_recurrence, new_start = recurrence.resolve(new_recurrence, task.due_date)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"Неверное правило повторения: {e}")
+                if new_start != task.due_date:
+                    task.due_date = new_start
+                    has_changes = True
+                    print(f"   Срок обновлен по правилу повторения: {new_start}")
+            if new_recurrence != task.recurrence:
+                task.recurrence = new_recurrence
+                has_changes = True
+                print(f"   Правило повторения обновлено: {new_recurrence}")
+        
+        # Обновляем приоритет, если он передан
+        if 'priority' in update_data and update_data['priority'] is not None:
+            new_priority = update_data['priority']
+            if new_priority != task.priority:
+                task.priority = new_priority
+                has_changes = True
+                print(f"   Приоритет обновлен: {new_priority}")
+        
+        # Обновляем теги, если они переданы
+        if 'tags' in update_data and update_data['tags'] is not None:
+            if crud.set_task_tags(db, task, update_data['tags']):
+                has_changes = True
+                print(f"   Теги обновлены: {update_data['tags']}")
+        
         # Если были изменения, обновляем updated_at и сохраняем в БД
         if has_changes:
             task.updated_at = datetime.datetime.now()
-            db.commit()  # Сохраняем изменения в базе данных
-            db.refresh(task)  # Обновляем объект из БД
+            db.flush()  # Отправляем изменения в базу данных
             print(f"✅ Задача ID={task_id} успешно обновлена")
         else:
             print(f"ℹ️  Задача ID={task_id} не изменилась (данные идентичны)")
         
         # Возвращаем обновленную (или неизмененную) задачу
         return task_to_dict(task)
+    
+    try:
+        # Сохраняем изменения (сразу или в общей транзакции группового commit)
+        return group_commit.execute(db, apply)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        # Откатываем транзакцию при ошибке
-        db.rollback()
+        # Транзакция уже откачена в group_commit.execute
         print(f"❌ Ошибка при обновлении задачи ID={task_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 @app.delete("/tasks/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db)):
+def delete_task(task_id: int, db: Session = Depends(get_user_db)):
     """
     Удаляет задачу по её ID.
     
@@ -384,56 +991,72 @@ def delete_task(task_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: 404 если задача не найдена, 500 при внутренней ошибке
     """
-    # Ищем задачу в базе данных
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    
-    if not task:
-        raise HTTPException(status_code=404, detail="Задача не найдена")
-    
-    try:
+    def apply(db: Session) -> None:
+        # Ищем задачу в базе данных
+        task = db.query(models.Task).filter(models.Task.id == task_id).first()
+        
+        if not task:
+            raise HTTPException(status_code=404, detail="Задача не найдена")
+        
         # Логируем удаление
         print(f"🗑️  Удаление задачи ID={task_id}, title='{task.title}'")
         
-        # Удаляем задачу
+        # Уменьшаем счетчики тегов и удаляем задачу
+        crud.set_task_tags(db, task, [])
         db.delete(task)
-        
-        # Сохраняем изменения в базе данных
-        db.commit()
+    
+    try:
+        # Сохраняем изменения (сразу или в общей транзакции группового commit)
+        group_commit.execute(db, apply)
         
         print(f"✅ Задача ID={task_id} успешно удалена")
         
         # Возвращаем сообщение об успехе (статус 200 по умолчанию)
         return {"message": "Задача успешно удалена"}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        # Откатываем транзакцию при ошибке
-        db.rollback()
+        # Транзакция уже откачена в group_commit.execute
         print(f"❌ Ошибка при удалении задачи ID={task_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 @app.patch("/tasks/{task_id}/complete")
-def complete_task(task_id: int, db: Session = Depends(get_db)):
+def complete_task(
+    task_id: int,
+    occurrence: Optional[datetime.datetime] = Query(None, description="Срок выполненного повторения (для повторяющихся задач)"),
+    db: Session = Depends(get_user_db)
+):
     """
     Отмечает задачу как выполненную.
     Это специализированный эндпоинт для быстрого завершения задач.
     
+    У повторяющейся задачи отмечается одно повторение (параметр occurrence):
+    оно сохраняется исключением в task_occurrences, а сама задача остается
+    открытой. Завершить всю серию можно через PUT с is_completed = true.
+    
     Args:
         task_id (int): ID задачи для отметки как выполненной
+        occurrence (Optional[datetime]): Срок повторения
         db (Session): Сессия базы данных
     
     Returns:
-        dict: Обновленная задача
+        dict: Обновленная задача (для повторения - с полем occurrence)
     
     Raises:
-        HTTPException: 404 если задача не найдена, 500 при внутренней ошибке
+        HTTPException: 400 если occurrence не подходит к задаче,
+                       404 если задача не найдена, 500 при внутренней ошибке
     """
-    # Ищем задачу в базе данных
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    
-    if not task:
-        raise HTTPException(status_code=404, detail="Задача не найдена")
-    
-    try:
+    def apply(db: Session) -> dict:
+        # Ищем задачу в базе данных
+        task = db.query(models.Task).filter(models.Task.id == task_id).first()
+        
+        if not task:
+            raise HTTPException(status_code=404, detail="Задача не найдена")
+        
+        if occurrence is not None or (task.recurrence and not task.is_completed):
+            return complete_occurrence(db, task, occurrence)
+        
         # Проверяем, не выполнена ли задача уже
         if task.is_completed:
             print(f"ℹ️  Задача ID={task_id} уже была выполнена")
@@ -442,21 +1065,162 @@ def complete_task(task_id: int, db: Session = Depends(get_db)):
             task.is_completed = True
             task.updated_at = datetime.datetime.now()
             
-            # Сохраняем изменения
-            db.commit()
-            db.refresh(task)
+            # Отправляем изменения в базу данных
+            db.flush()
             
             print(f"✅ Задача ID={task_id} отмечена как выполненная")
         
         # Возвращаем обновленную задачу
         return task_to_dict(task)
+    
+    try:
+        # Сохраняем изменения (сразу или в общей транзакции группового commit)
+        return group_commit.execute(db, apply)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        # Откатываем транзакцию при ошибке
-        db.rollback()
+        # Транзакция уже откачена в group_commit.execute
         print(f"❌ Ошибка при выполнении задачи ID={task_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
+def complete_occurrence(db: Session, task: models.Task, occurrence: Optional[datetime.datetime]) -> dict:
+    """
+    Отмечает выполненным повторение повторяющейся задачи.
+    
+    Args:
+        db (Session): Сессия базы данных
+        task (models.Task): Повторяющаяся задача
+        occurrence (Optional[datetime]): Срок повторения
+    
+    Returns:
+        dict: Задача с полем occurrence
+    
+    Raises:
+        HTTPException: 400 если задача не повторяется или срок не совпадает с повторением
+    """
+    if not task.recurrence:
+        raise HTTPException(status_code=400, detail="Задача не повторяется, параметр occurrence не нужен")
+    if occurrence is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Для повторяющейся задачи укажите occurrence - срок выполненного повторения"
+        )
+    
+    # Срок без часового пояса, как и в базе данных
+    occurrence = occurrence.replace(tzinfo=None)
+    try:
+        added = recurrence.complete(db, task, occurrence)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Неверное повторение: {e}")
+    
+    if added:
+        # Изменение updated_at сообщает об изменении задачи кэшам и клиентам синхронизации
+        task.updated_at = datetime.datetime.now()
+        db.flush()
+        print(f"✅ Повторение {occurrence} задачи ID={task.id} отмечено как выполненное")
+    else:
+        print(f"ℹ️  Повторение {occurrence} задачи ID={task.id} уже было выполнено")
+    
+    result = task_to_dict(task)
+    result["occurrence"] = {"date": occurrence.isoformat(), "is_completed": True}
+    return result
+
+# ============================================================================
+# ТЕГИ
+# ============================================================================
+
+class TagRename(BaseModel):
+    """
+    Модель для переименования тега.
+    
+    Attributes:
+        name (str): Новое название тега
+    """
+    name: str
+
+@app.get("/tags")
+def get_tags(db: Session = Depends(get_user_db)):
+    """
+    Получает все теги с количеством задач.
+    Счетчики обновляются при каждой записи, поэтому задачи не пересчитываются.
+    
+    Returns:
+        dict: Список тегов с количеством задач
+    """
+    return {
+        "tags": [{"name": tag.name, "count": tag.task_count} for tag in crud.get_tags(db)]
+    }
+
+@app.put("/tags/{name}")
+def rename_tag(name: str, tag_rename: TagRename, db: Session = Depends(get_user_db)):
+    """
+    Переименовывает тег у всех задач (если новое имя занято - объединяет теги).
+    
+    Args:
+        name (str): Текущее название тега
+        tag_rename (TagRename): Новое название
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: Тег после переименования
+    
+    Raises:
+        HTTPException: 400 если новое название пустое, 404 если тег не найден
+    """
+    if not tag_rename.name.strip():
+        raise HTTPException(status_code=400, detail="Название тега не может быть пустым")
+    
+    try:
+        tag = crud.rename_tag(db, name, tag_rename.name)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Ошибка при переименовании тега '{name}': {str(e)}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+    
+    if not tag:
+        raise HTTPException(status_code=404, detail="Тег не найден")
+    
+    return {"name": tag.name, "count": tag.task_count}
+
+@app.delete("/tags/{name}")
+def delete_tag(name: str, db: Session = Depends(get_user_db)):
+    """
+    Удаляет тег у всех задач.
+    
+    Args:
+        name (str): Название тега
+        db (Session): Сессия базы данных
+    
+    Returns:
+        dict: Сообщение об успешном удалении
+    
+    Raises:
+        HTTPException: 404 если тег не найден
+    """
+    try:
+        deleted = crud.delete_tag(db, name)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Ошибка при удалении тега '{name}': {str(e)}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Тег не найден")
+    
+    return {"message": "Тег успешно удален"}
+
+@app.get("/metrics/writes")
+def get_write_metrics():
+    """
+    Метрики группового commit (APP_GROUP_COMMIT): число порций и записей,
+    размер порций, время ожидания в очереди потока записи.
+    
+    Returns:
+        dict: Метрики записи
+    """
+    return group_commit.get_metrics()
+
 @app.get("/favicon.ico")
 def favicon():
     """
@@ -474,7 +1238,7 @@ def favicon():
 if __name__ == "__main__":
     """
     Точка входа для запуска приложения напрямую (python main.py).
-    В bookion обычно используется uvicorn напрямую.
+    Только для разработки: в продакшене используйте serve.py.
     """
     import uvicorn
     
@@ -5,14 +5,48 @@
 """
 
 # Импортируем необходимые компоненты из SQLAlchemy
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index, Table, ForeignKey, LargeBinary, event
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 
-# Создаем базовый класс для всех моделей
+# Базовый класс для всех моделей объявлен в database.py
 # Все наши модели будут наследоваться от этого класса
-Base = declarative_base()
+from app.database import Base
+
+# Таблица связи "многие ко многим" между задачами и тегами.
+# Первичный ключ (task_id, tag_id) служит индексом "задача -> теги",
+# индекс ix_task_tags_tag_id_task_id - индексом "тег -> задачи"
+task_tags = Table(
+    "task_tags",
+    Base.metadata,
+    Column("task_id", Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_task_tags_tag_id_task_id", "tag_id", "task_id"),
+)
+
+class User(Base):
+    """
+    Модель User представляет таблицу 'users'.
+    
+    Атрибуты:
+    - id: уникальный идентификатор пользователя
+    - username: имя пользователя
+    - email: адрес почты (уникальный, используется для входа)
+    - password_hash: хэш пароля (см. app/auth.py)
+    - created_at: дата регистрации
+    """
+    
+    __tablename__ = "users"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    username = Column(String(100), nullable=False)
+    email = Column(String(255), nullable=False, unique=True, index=True)
+    password_hash = Column(String(255), nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<User(id={self.id}, email='{self.email}')>"
 
 class Task(Base):
     """
@@ -26,6 +60,18 @@ class Task(Base):
     - is_completed: статус выполнения (False по умолчанию)
     - created_at: дата и время создания (автоматически устанавливается)
     - updated_at: дата и время последнего обновления
+    - due_date: срок выполнения (может быть пустым)
+    - priority: приоритет (high/medium/low)
+    - tags: список тегов
+    - completed_at: когда задача была выполнена (для анализа опозданий)
+    - user_id: владелец задачи (NULL - задачи без владельца, общие для
+      анонимных запросов)
+    - change_seq: номер последнего изменения задачи для синхронизации
+      (см. app/sync.py)
+    - minhash: MinHash сигнатура названия и описания для поиска похожих
+      задач (см. app/duplicates.py)
+    - recurrence: правило повторения в формате RRULE (None - задача
+      не повторяется); due_date - первое повторение (см. app/recurrence.py)
     """
     
     # Указываем имя таблицы в базе данных
@@ -66,9 +112,314 @@ class Task(Base):
     # default=func.now(): значение по умолчанию - текущее время
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Колонка 'due_date' - срок выполнения задачи (извлекается AI из текста)
+    due_date = Column(DateTime, nullable=True, default=None)
+    
+    # Колонка 'priority' - приоритет: high, medium или low
+    # server_default нужен, чтобы колонку можно было добавить в существующую таблицу
+    priority = Column(String(10), nullable=False, default="medium", server_default="medium")
+    
+    # Колонка 'completed_at' - время выполнения задачи.
+    # Заполняется автоматически при изменении is_completed (см. ниже)
+    completed_at = Column(DateTime, nullable=True, default=None)
+    
+    # Колонка 'user_id' - владелец задачи.
+    # Внешний ключ не объявлен: в режиме шардирования задачи лежат в файлах
+    # шардов, а пользователи - в основной базе данных
+    user_id = Column(Integer, nullable=True, default=None)
+    
+    # Колонка 'change_seq' - номер изменения из возрастающей последовательности.
+    # Проставляется при каждом создании и изменении задачи (app/sync.py)
+    change_seq = Column(Integer, nullable=True, default=None)
+    
+    # Колонка 'minhash' - MinHash сигнатура текста задачи (app/duplicates.py).
+    # deferred: сигнатура нужна только индексу дубликатов, поэтому обычные
+    # запросы задач ее не читают
+    minhash = deferred(Column(LargeBinary, nullable=True, default=None))
+    
+    # Колонка 'recurrence' - правило повторения ("FREQ=WEEKLY;BYDAY=MO").
+    # Повторения не хранятся строками, а вычисляются для нужного интервала
+    recurrence = Column(String(255), nullable=True, default=None)
+    
+    # Теги задачи через таблицу task_tags
+    # lazy="selectin": теги для списка задач загружаются одним запросом
+    tags = relationship("Tag", secondary=task_tags, lazy="selectin", order_by="Tag.name")
+    
+    # Все запросы к задачам выполняются в рамках одного пользователя,
+    # поэтому составные индексы начинаются с user_id
+    __table_args__ = (
+        # Список задач пользователя, новые сначала
+        Index("ix_tasks_user_created_at", user_id, created_at),
+        # Частичный индекс по сроку только для невыполненных задач.
+        # Запросы повестки ("сегодня", "просрочено", "эта неделя") всегда
+        # фильтруют is_completed = false, поэтому читают только этот индекс:
+        # выполненные задачи в него не попадают и не увеличивают его размер
+        Index(
+            "ix_tasks_user_open_due_date",
+            user_id,
+            due_date,
+            sqlite_where=(is_completed == False),
+            postgresql_where=(is_completed == False),
+        ),
+        # Тот же срок без user_id: планировщик напоминаний (app/reminders.py)
+        # читает ближайшие сроки всех пользователей диапазоном этого индекса
+        Index(
+            "ix_tasks_open_due_date",
+            due_date,
+            sqlite_where=(is_completed == False),
+            postgresql_where=(is_completed == False),
+        ),
+        # Индекс для календаря: GROUP BY по дню, приоритету и статусу
+        # за месяц читает только диапазон этого индекса, не обращаясь к таблице
+        Index("ix_tasks_user_due_date_calendar", user_id, due_date, priority, is_completed),
+        # Выполненные задачи по времени выполнения (аналитика)
+        Index("ix_tasks_user_completed_at", user_id, completed_at),
+        # Изменения после курсора (GET /tasks/changes)
+        Index("ix_tasks_user_change_seq", user_id, change_seq),
+        # Все задачи пользователя по порядку ID (экспорт порциями)
+        Index("ix_tasks_user_id_id", user_id, id),
+        # Частичный индекс повторяющихся задач: повестка и календарь
+        # разворачивают их отдельно от обычных задач
+        Index(
+            "ix_tasks_user_recurring",
+            user_id,
+            due_date,
+            sqlite_where=(recurrence.isnot(None)),
+            postgresql_where=(recurrence.isnot(None)),
+        ),
+    )
+    
     def __repr__(self):
         """
         Магический метод для строкового представления объекта.
         Вызывается при использовании print(task) или str(task).
         """
-        return f"<Task(id={self.id}, title='{self.title}', completed={self.is_completed})>"
\ No newline at end of file
+        return f"<Task(id={self.id}, title='{self.title}', completed={self.is_completed})>"
+
+@event.listens_for(Task.is_completed, "set")
+def _track_completed_at(task, value, old_value, initiator):
+    """
+    Заполняет completed_at при выполнении задачи и очищает при возврате в работу.
+    Срабатывает для любого кода, который меняет is_completed.
+    """
+    if value and not old_value:
+        task.completed_at = datetime.now()
+    elif not value:
+        task.completed_at = None
+
+class TaskOccurrence(Base):
+    """
+    Модель TaskOccurrence представляет таблицу 'task_occurrences' -
+    выполненные повторения повторяющихся задач (см. app/recurrence.py).
+    
+    Повторения вычисляются по правилу задачи, а в таблице хранятся только
+    исключения - повторения, которые пользователь отметил выполненными.
+    
+    Атрибуты:
+    - task_id: ID повторяющейся задачи
+    - occurrence: срок повторения
+    - completed_at: когда повторение выполнено
+    """
+    
+    __tablename__ = "task_occurrences"
+    
+    task_id = Column(Integer, primary_key=True)
+    occurrence = Column(DateTime, primary_key=True)
+    completed_at = Column(DateTime, nullable=False, default=datetime.now)
+    
+    def __repr__(self):
+        return f"<TaskOccurrence(task_id={self.task_id}, occurrence={self.occurrence})>"
+
+class TaskStat(Base):
+    """
+    Модель TaskStat представляет таблицу 'task_stats' - счетчики задач.
+    
+    Каждая строка - один счетчик (см. app/stats.py). Название начинается
+    с префикса пользователя ("5:", для задач без владельца "-:"):
+    - total: всего задач
+    - completed: выполненных задач
+    - open:priority:<high|medium|low>: невыполненных задач с приоритетом
+    - open:day:<YYYY-MM-DD>: невыполненных задач со сроком в этот день
+    
+    Счетчики обновляются в той же транзакции, что и задачи.
+    """
+    
+    __tablename__ = "task_stats"
+    
+    name = Column(String(64), primary_key=True)
+    value = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    def __repr__(self):
+        return f"<TaskStat(name='{self.name}', value={self.value})>"
+
+class TaskTombstone(Base):
+    """
+    Модель TaskTombstone представляет таблицу 'task_tombstones' - отметки
+    об удаленных задачах для синхронизации клиентов (см. app/sync.py).
+    
+    Атрибуты:
+    - id: идентификатор отметки
+    - task_id: ID удаленной задачи
+    - user_id: владелец задачи
+    - change_seq: номер изменения, с которым задача удалена
+    - deleted_at: время удаления (старые отметки удаляются)
+    """
+    
+    __tablename__ = "task_tombstones"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True, default=None)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_task_tombstones_user_change_seq", user_id, change_seq),
+        Index("ix_task_tombstones_deleted_at", deleted_at),
+    )
+    
+    def __repr__(self):
+        return f"<TaskTombstone(task_id={self.task_id}, change_seq={self.change_seq})>"
+
+class SyncState(Base):
+    """
+    Модель SyncState представляет таблицу 'sync_state' - счетчики синхронизации.
+    
+    - change_seq: последний выданный номер изменения
+    - tombstone_floor: наибольший номер удаленных (сжатых) отметок;
+      клиентам с курсором меньше него нужна полная синхронизация
+    """
+    
+    __tablename__ = "sync_state"
+    
+    name = Column(String(32), primary_key=True)
+    value = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    def __repr__(self):
+        return f"<SyncState(name='{self.name}', value={self.value})>"
+
+class ArchivedTask(Base):
+    """
+    Модель ArchivedTask представляет таблицу 'archived_tasks' - холодное
+    хранилище выполненных задач (см. app/archive.py).
+    
+    Старые выполненные задачи переносятся сюда фоновой задачей, чтобы
+    таблица tasks и ее индексы не росли бесконечно. Строки не меняются
+    после переноса, поэтому теги хранятся прямо в строке.
+    
+    Атрибуты:
+    - id: идентификатор строки архива
+    - task_id: идентификатор задачи в таблице tasks до переноса
+    - user_id, title, description, created_at, updated_at, due_date,
+      priority, completed_at: значения задачи на момент переноса
+    - tags: названия тегов в виде ",тег1,тег2," (для поиска по LIKE)
+    - archived_at: когда задача перенесена в архив
+    """
+    
+    __tablename__ = "archived_tasks"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True, default=None)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True, default=None)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    due_date = Column(DateTime, nullable=True, default=None)
+    priority = Column(String(10), nullable=False, default="medium", server_default="medium")
+    completed_at = Column(DateTime, nullable=True, default=None)
+    tags = Column(Text, nullable=False, default=",", server_default=",")
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Список задач пользователя вместе с архивом, новые сначала
+        Index("ix_archived_tasks_user_created_at", user_id, created_at),
+    )
+    
+    @property
+    def tag_names(self):
+        """Названия тегов списком."""
+        return [name for name in self.tags.split(",") if name]
+    
+    def __repr__(self):
+        return f"<ArchivedTask(task_id={self.task_id}, title='{self.title}')>"
+
+class AIJob(Base):
+    """
+    Модель AIJob представляет таблицу 'ai_jobs' - очередь фоновых AI задач
+    (см. app/jobs.py). Задания хранятся в базе, поэтому переживают
+    перезапуск сервера.
+    
+    Атрибуты:
+    - id: случайный идентификатор задания (uuid4 hex)
+    - user_id: кто создал задание (None - анонимный запрос)
+    - kind: тип задания (process - извлечение задачи из текста)
+    - priority: приоритет (меньше - раньше)
+    - status: queued, running, done или failed
+    - payload: входные данные (JSON)
+    - result: результат (JSON), error: текст ошибки
+    - attempts: сколько раз задание начинали выполнять
+    - lease_until: до какого времени задание закреплено за воркером;
+      если воркер не успел (упал процесс), задание возвращается в очередь
+    """
+    
+    __tablename__ = "ai_jobs"
+    
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, nullable=True, default=None)
+    kind = Column(String(16), nullable=False)
+    priority = Column(Integer, nullable=False, default=1, server_default="1")
+    status = Column(String(16), nullable=False, default="queued", server_default="queued")
+    payload = Column(Text, nullable=False)
+    result = Column(Text, nullable=True, default=None)
+    error = Column(Text, nullable=True, default=None)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    started_at = Column(DateTime, nullable=True, default=None)
+    finished_at = Column(DateTime, nullable=True, default=None)
+    lease_until = Column(DateTime, nullable=True, default=None)
+    
+    __table_args__ = (
+        # Выбор следующего задания: очередь по приоритету и времени создания
+        Index("ix_ai_jobs_status_priority_created_at", status, priority, created_at),
+    )
+    
+    def __repr__(self):
+        return f"<AIJob(id='{self.id}', kind='{self.kind}', status='{self.status}')>"
+
+class Tag(Base):
+    """
+    Модель Tag представляет таблицу 'tags'.
+    
+    Атрибуты:
+    - id: уникальный идентификатор тега
+    - user_id: владелец тега (у каждого пользователя свои теги)
+    - name: название тега (уникальное для пользователя)
+    - task_count: количество задач с этим тегом. Поддерживается при каждой
+      записи (создание, изменение тегов, удаление задачи), поэтому GET /tags
+      не считает задачи через GROUP BY
+    """
+    
+    __tablename__ = "tags"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=True, default=None)
+    name = Column(String(50), nullable=False)
+    task_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    __table_args__ = (
+        Index("ux_tags_user_id_name", user_id, name, unique=True),
+        # Строки с user_id = NULL (режим без авторизации) в уникальном
+        # индексе не равны друг другу, поэтому названия анонимных тегов
+        # уникальны по отдельному частичному индексу
+        Index(
+            "ux_tags_anonymous_name",
+            name,
+            unique=True,
+            sqlite_where=user_id.is_(None),
+            postgresql_where=user_id.is_(None),
+        ),
+    )
+    
+    def __repr__(self):
+        return f"<Tag(id={self.id}, name='{self.name}', task_count={self.task_count})>"
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Модуль partitioning.py разделяет данные по пользователям.
+
+1. Владение данными. Сессия, созданная для запроса, помнит пользователя
+   (session.info["user_id"]). Ко всем ORM запросам к задачам и тегам
+   автоматически добавляется условие user_id = <пользователь>
+   (with_loader_criteria), а новым задачам и тегам проставляется владелец.
+   Эндпоинтам не нужно помнить о фильтре, и он всегда совпадает с
+   первой колонкой составных индексов.
+
+2. Шардирование (APP_SHARD_MODE). В режиме user у каждого пользователя
+   свой файл SQLite, в режиме bucket - файл на группу пользователей по
+   хэшу user_id. ShardRouter выбирает движок для запроса; запись от
+   пользователей из разных шардов не ждет общей блокировки SQLite.
+   Пользователи (таблица users) всегда хранятся в основной базе данных.
+"""
+
+import glob
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List, Optional
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from app import models
+from app.auth import get_current_user_id
+from app.config import get_settings
+from app.database import SessionLocal, engine, init_db, make_engine
+
+# Ключ в session.info, в котором хранится пользователь сессии
+USER_KEY = "user_id"
+
+def _owner_criteria(user_id: Optional[int]):
+    if user_id is None:
+        return lambda cls: cls.user_id.is_(None)
+    return lambda cls: cls.user_id == user_id
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_user(execute_state):
+    """Ограничивает ORM запросы к задачам, тегам и архиву пользователем сессии."""
+    session = execute_state.session
+    if USER_KEY not in session.info:
+        return
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+
+    criteria = _owner_criteria(session.info[USER_KEY])
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(models.Task, criteria, include_aliases=True),
+        with_loader_criteria(models.Tag, criteria, include_aliases=True),
+        with_loader_criteria(models.ArchivedTask, criteria, include_aliases=True),
+        with_loader_criteria(models.TaskTombstone, criteria, include_aliases=True),
+    )
+
+@event.listens_for(Session, "before_flush")
+def _assign_owner(session, flush_context, instances):
+    """Проставляет владельца новым задачам и тегам."""
+    if USER_KEY not in session.info:
+        return
+    for obj in session.new:
+        if isinstance(obj, (models.Task, models.Tag)) and obj.user_id is None:
+            obj.user_id = session.info[USER_KEY]
+
+class ShardRouter:
+    """
+    Выбирает движок базы данных для пользователя.
+
+    Движки шардов создаются при первом обращении (вместе со схемой)
+    и хранятся в LRU кэше размером APP_SHARD_CACHE_SIZE.
+    """
+
+    def __init__(self):
+        self._engines: "OrderedDict[str, Engine]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def shard_key(self, user_id: Optional[int]) -> Optional[str]:
+        """Имя шарда пользователя или None, если шардирование выключено."""
+        settings = get_settings()
+        if settings.shard_mode == "user":
+            return str(user_id) if user_id is not None else "anonymous"
+        if settings.shard_mode == "bucket":
+            if user_id is None:
+                return "0"
+            return str(zlib.crc32(str(user_id).encode()) % settings.shard_count)
+        return None
+
+    def engine_for(self, user_id: Optional[int]) -> Engine:
+        """Движок базы данных, в которой лежат задачи пользователя."""
+        key = self.shard_key(user_id)
+        if key is None:
+            return engine
+        return self._engine_for_key(key)
+
+    def _engine_for_key(self, key: str) -> Engine:
+        with self._lock:
+            shard_engine = self._engines.get(key)
+            if shard_engine is not None:
+                self._engines.move_to_end(key)
+                return shard_engine
+
+            settings = get_settings()
+            url = settings.shard_url_template.format(shard=key)
+            database = make_url(url).database
+            if url.startswith("sqlite") and database:
+                os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+            shard_engine = make_engine(url)
+            init_db(shard_engine)
+            self._engines[key] = shard_engine
+
+            while len(self._engines) > settings.shard_cache_size:
+                _, evicted = self._engines.popitem(last=False)
+                evicted.dispose()
+
+            return shard_engine
+
+    def all_engines(self) -> List[Engine]:
+        """
+        Движки всех баз с задачами (для фоновых задач обслуживания).
+        В режиме user шарды находятся по файлам SQLite, уже созданным на диске.
+        """
+        settings = get_settings()
+        if settings.shard_mode == "off":
+            return [engine]
+        if settings.shard_mode == "bucket":
+            keys = [str(bucket) for bucket in range(settings.shard_count)]
+        else:
+            pattern = make_url(settings.shard_url_template.format(shard="*")).database
+            prefix, _, suffix = os.path.basename(pattern).partition("*")
+            names = [os.path.basename(path) for path in glob.glob(pattern)]
+            keys = [name[len(prefix):len(name) - len(suffix)] for name in names]
+        return [self._engine_for_key(key) for key in keys]
+
+router = ShardRouter()
+
+def session_for_user(user_id: Optional[int]) -> Session:
+    """Создает сессию в шарде пользователя, ограниченную его данными."""
+    db = SessionLocal(bind=router.engine_for(user_id))
+    db.info[USER_KEY] = user_id
+    return db
+
+def get_user_db(user_id: Optional[int] = Depends(get_current_user_id)):
+    """
+    Dependency FastAPI: сессия базы данных текущего пользователя.
+
+    Yields:
+        Session: сессия в шарде пользователя, все запросы к задачам и
+                 тегам ограничены его данными
+    """
+    db = session_for_user(user_id)
+    try:
+        yield db
+    finally:
+        db.close()
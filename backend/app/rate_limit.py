@@ -0,0 +1,257 @@
+"""
+Модуль rate_limit.py ограничивает нагрузку на AI эндпоинты (admission control).
+
+Каждый запрос к /api/ai/process, /api/ai/chat и /api/ai/productivity может
+занимать поток на время вызова Yandex GPT (до 30 секунд). Без ограничений
+всплеск таких запросов занимал весь пул потоков, и сервер переставал
+отвечать даже на обычные CRUD запросы. Теперь перед выполнением эндпоинта
+запрос проходит проверки:
+
+1. token bucket клиента (пользователь по токену или IP адрес): если токенов
+   нет, сразу 429;
+2. общий token bucket процесса: если токен появится не позже чем через
+   APP_AI_QUEUE_TIMEOUT_SECONDS, запрос резервирует его и ждет, иначе 429;
+3. число одновременно выполняемых запросов (APP_AI_MAX_CONCURRENCY): если все
+   места заняты, запрос ждет в очереди (FIFO) не дольше
+   APP_AI_QUEUE_TIMEOUT_SECONDS. Если в очереди уже APP_AI_QUEUE_SIZE
+   запросов, сразу 429.
+
+Ожидание происходит в event loop (асинхронная dependency), поэтому ждущие
+запросы не занимают потоки: их занимают только выполняемые, не больше
+APP_AI_MAX_CONCURRENCY. Ответ 429 содержит заголовок Retry-After (секунды).
+
+Лимиты действуют в пределах одного процесса-воркера. Глубина очереди
+и число отказов по причинам показываются в GET /api/ai/status.
+"""
+
+import asyncio
+import math
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from app.auth import read_token
+from app.config import get_settings
+
+# Сколько token bucket клиентов хранить (давно не приходившие вытесняются)
+MAX_CLIENTS = 10000
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, не больше burst.
+
+    Токены можно резервировать в долг (tokens < 0): запрос получает время,
+    через которое его токен появится, и ждет его, а следующие запросы
+    встают за ним.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float, max_wait: float) -> Optional[float]:
+        """
+        Берет токен, если он будет доступен не позже чем через max_wait секунд.
+
+        Returns:
+            Optional[float]: сколько секунд ждать токен (0 - доступен сразу)
+                             или None, если ждать пришлось бы дольше max_wait
+        """
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+    def refund(self) -> None:
+        """Возвращает зарезервированный токен (запрос не был выполнен)."""
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def retry_after(self, now: float) -> float:
+        """Через сколько секунд появится свободный токен."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+class RateLimited(HTTPException):
+    """Ответ 429 с заголовком Retry-After."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=message,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+class AdmissionController:
+    """
+    Очередь и лимиты для AI эндпоинтов одного процесса.
+
+    Все методы, кроме snapshot, вызываются из event loop, поэтому
+    блокировки не нужны.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.max_concurrency = max(1, settings.ai_max_concurrency)
+        self.queue_size = settings.ai_queue_size
+        self.queue_timeout = settings.ai_queue_timeout_seconds
+        self.client_rate = settings.ai_client_rate_per_minute / 60
+        self.client_burst = settings.ai_client_burst
+        self.global_bucket = TokenBucket(settings.ai_rate_per_second, settings.ai_burst)
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected: Counter = Counter()
+        self._clients: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # Запросы, ждущие свободного места; место передается первому из них
+        self._slots: Deque[asyncio.Future] = deque()
+
+    def _client_bucket(self, client: str) -> TokenBucket:
+        bucket = self._clients.get(client)
+        if bucket is None:
+            bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst)
+            if len(self._clients) > MAX_CLIENTS:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+        return bucket
+
+    def _reject(self, reason: str, message: str, retry_after: float) -> None:
+        self.rejected[reason] += 1
+        raise RateLimited(message, retry_after)
+
+    async def acquire(self, client: str) -> None:
+        """
+        Пропускает запрос клиента или отклоняет его.
+
+        Raises:
+            RateLimited: 429, если лимит превышен или очередь переполнена
+        """
+        now = time.monotonic()
+
+        client_bucket = self._client_bucket(client)
+        if client_bucket.reserve(now, max_wait=0) is None:
+            self._reject("client", "Слишком много запросов к AI, попробуйте позже",
+                         client_bucket.retry_after(now))
+
+        token_wait = self.global_bucket.reserve(now, max_wait=self.queue_timeout)
+        if token_wait is None:
+            client_bucket.refund()
+            self._reject("global", "AI сервис перегружен, попробуйте позже",
+                         self.global_bucket.retry_after(now))
+
+        if token_wait == 0 and self.active < self.max_concurrency and not self._slots:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if self.waiting >= self.queue_size:
+            client_bucket.refund()
+            self.global_bucket.refund()
+            self._reject("queue_full", "AI сервис перегружен, попробуйте позже",
+                         max(token_wait, self.queue_timeout / 2))
+
+        deadline = now + self.queue_timeout
+        self.waiting += 1
+        try:
+            if token_wait > 0:
+                await asyncio.sleep(token_wait)
+            await self._wait_for_slot(deadline)
+        except RateLimited:
+            # Запрос не выполнен - не засчитываем его клиенту
+            client_bucket.refund()
+            raise
+        finally:
+            self.waiting -= 1
+        self.admitted += 1
+
+    async def _wait_for_slot(self, deadline: float) -> None:
+        if self.active < self.max_concurrency and not self._slots:
+            self.active += 1
+            return
+
+        slot = asyncio.get_running_loop().create_future()
+        self._slots.append(slot)
+        try:
+            await asyncio.wait_for(slot, timeout=max(0.0, deadline - time.monotonic()))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if slot.done() and not slot.cancelled():
+                # Место уже передано этому запросу - передаем его следующему
+                self.release()
+            else:
+                try:
+                    self._slots.remove(slot)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject("timeout", "AI сервис перегружен, попробуйте позже", self.queue_timeout)
+
+    def release(self) -> None:
+        """Освобождает место: передает его первому ждущему запросу."""
+        while self._slots:
+            slot = self._slots.popleft()
+            if not slot.done():
+                slot.set_result(None)
+                return
+        self.active -= 1
+
+    def snapshot(self) -> Dict:
+        """Текущее состояние для /api/ai/status."""
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.waiting,
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": {
+                reason: self.rejected[reason]
+                for reason in ("client", "global", "queue_full", "timeout")
+            }
+        }
+
+_controller: Optional[AdmissionController] = None
+
+def get_controller() -> AdmissionController:
+    """Контроллер процесса (создается при первом обращении)."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
+
+def client_key(request: Request) -> str:
+    """Клиент для лимита: пользователь по токену, иначе IP адрес."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer":
+        user_id = read_token(token)
+        if user_id is not None:
+            return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+async def ai_admission(request: Request):
+    """
+    Dependency FastAPI для AI эндпоинтов: ждет допуска в event loop
+    и освобождает место после выполнения эндпоинта.
+    """
+    controller = get_controller()
+    await controller.acquire(client_key(request))
+    try:
+        yield
+    finally:
+        controller.release()
@@ -0,0 +1,623 @@
+"""
+Модуль recurrence.py поддерживает повторяющиеся задачи ("каждый понедельник в 10 утра").
+
+Каждое повторение не сохраняется отдельной строкой tasks - ежедневная
+задача за год дала бы 365 строк, а бессрочная - бесконечно много. Вместо
+этого повторяющаяся задача - одна строка tasks:
+- recurrence - правило в формате RRULE (RFC 5545, подмножество):
+  FREQ=DAILY|WEEKLY|MONTHLY|YEARLY, INTERVAL, BYDAY (для WEEKLY),
+  BYMONTHDAY (для MONTHLY, -1 - последний день месяца), UNTIL или COUNT;
+- due_date - первое повторение (DTSTART), его время - время всех повторений.
+
+Повторения вычисляются генератором occurrences только для запрошенного
+интервала: генератор сразу переходит к первому периоду интервала (без
+перебора повторений с начала), поэтому стоимость зависит от числа
+повторений в интервале, а не от возраста задачи. COUNT при сохранении
+заменяется на UNTIL (дату последнего повторения).
+
+Выполненные повторения хранятся исключениями в таблице task_occurrences -
+только те, которые пользователь отметил, а невыполненные нигде не
+хранятся. Выполнение задачи целиком (is_completed) завершает серию.
+
+Повторения разворачиваются в GET /tasks (поле occurrences), в повестке
+GET /tasks/agenda и в календаре GET /tasks/calendar. Фразы о повторении
+на русском языке распознает parse_phrase (используется при извлечении
+задачи из текста, app/ai.py).
+"""
+
+import calendar
+import heapq
+import re
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+from app.events import on_tasks_flushed
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+MAX_INTERVAL = 100
+MAX_COUNT = 1000
+
+# Правило, не дающее повторений в этом горизонте (например, 31 число
+# каждые 12 месяцев начиная с апреля), считается ошибочным
+CHECK_HORIZON_DAYS = 366 * 8
+
+# Повестка без начала интервала (просроченные): повторения раньше этого
+# срока не показываются - иначе ежедневная задача, созданная год назад,
+# дала бы 365 просроченных повторений
+OVERDUE_LOOKBACK_DAYS = 7
+
+# Интервал повторений в GET /tasks по умолчанию: неделя с сегодняшнего дня
+DEFAULT_WINDOW_DAYS = 7
+
+# Сколько повторений одной задачи возвращать в GET /tasks (интервал
+# может быть любым, а ежедневная задача за 10 лет - это 3650 повторений)
+MAX_TASK_OCCURRENCES = 100
+
+class Rule(NamedTuple):
+    """
+    Правило повторения.
+
+    Attributes:
+        freq: DAILY, WEEKLY, MONTHLY или YEARLY
+        interval: каждый interval-й период
+        weekdays: дни недели (0 - понедельник) для WEEKLY
+        monthday: день месяца для MONTHLY (-1 - последний день)
+        until: последнее возможное повторение включительно (None - бессрочно)
+    """
+    freq: str
+    interval: int = 1
+    weekdays: Tuple[int, ...] = ()
+    monthday: Optional[int] = None
+    until: Optional[datetime] = None
+
+# --- Формат RRULE ---
+
+def _parse_until(value: str) -> datetime:
+    value = value.rstrip("Z")
+    for fmt in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            until = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        # Дата без времени - весь этот день
+        return until if "T" in value else until.replace(hour=23, minute=59, second=59)
+    raise ValueError(f"неверная дата UNTIL: {value}")
+
+@lru_cache(maxsize=4096)
+def parse_rule(text: str, start: datetime) -> Rule:
+    """
+    Разбирает правило RRULE.
+
+    Args:
+        text: правило, например "FREQ=WEEKLY;BYDAY=MO,WE"
+        start: первое повторение (нужно для COUNT и значений по умолчанию)
+
+    Returns:
+        Rule: правило с заполненными weekdays/monthday и UNTIL вместо COUNT
+
+    Raises:
+        ValueError: если правило неверное или не дает повторений
+    """
+    text = text.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+
+    parts = {}
+    for part in text.split(";"):
+        if not part.strip():
+            continue
+        name, separator, value = part.partition("=")
+        if not separator:
+            raise ValueError(f"неверная часть правила: {part}")
+        parts[name.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ должен быть одним из {', '.join(FREQUENCIES)}")
+
+    try:
+        interval = int(parts.pop("INTERVAL", "1"))
+    except ValueError:
+        raise ValueError("INTERVAL должен быть числом")
+    if not 1 <= interval <= MAX_INTERVAL:
+        raise ValueError(f"INTERVAL должен быть от 1 до {MAX_INTERVAL}")
+
+    weekdays: Tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        names = [name.strip() for name in parts.pop("BYDAY").split(",")]
+        if any(name not in WEEKDAYS for name in names):
+            raise ValueError("BYDAY - дни недели через запятую (MO,TU,WE,TH,FR,SA,SU)")
+        weekdays = tuple(sorted({WEEKDAYS.index(name) for name in names}))
+        if freq == "DAILY" and interval == 1:
+            # "по будням" - ежедневно по отдельным дням, то же что еженедельно
+            freq = "WEEKLY"
+        elif freq != "WEEKLY":
+            raise ValueError("BYDAY поддерживается только с FREQ=WEEKLY")
+    elif freq == "WEEKLY":
+        weekdays = (start.weekday(),)
+
+    monthday = None
+    if "BYMONTHDAY" in parts:
+        if freq != "MONTHLY":
+            raise ValueError("BYMONTHDAY поддерживается только с FREQ=MONTHLY")
+        try:
+            monthday = int(parts.pop("BYMONTHDAY"))
+        except ValueError:
+            raise ValueError("BYMONTHDAY должен быть числом")
+        if not (1 <= monthday <= 31 or monthday == -1):
+            raise ValueError("BYMONTHDAY должен быть от 1 до 31 или -1")
+    elif freq == "MONTHLY":
+        monthday = start.day
+
+    until = None
+    if "UNTIL" in parts and "COUNT" in parts:
+        raise ValueError("UNTIL и COUNT нельзя указывать вместе")
+    if "UNTIL" in parts:
+        until = _parse_until(parts.pop("UNTIL"))
+
+    count = None
+    if "COUNT" in parts:
+        try:
+            count = int(parts.pop("COUNT"))
+        except ValueError:
+            raise ValueError("COUNT должен быть числом")
+        if not 1 <= count <= MAX_COUNT:
+            raise ValueError(f"COUNT должен быть от 1 до {MAX_COUNT}")
+
+    if parts:
+        raise ValueError(f"неподдерживаемые части правила: {', '.join(sorted(parts))}")
+
+    rule = Rule(freq, interval, weekdays, monthday, until)
+    horizon = _add_days(start, CHECK_HORIZON_DAYS)
+    first = next(occurrences(rule, start, start, horizon), None)
+    if first is None:
+        raise ValueError("правило не дает ни одного повторения")
+
+    if count is not None:
+        # Последнее из count повторений. Между соседними повторениями не
+        # больше CHECK_HORIZON_DAYS (иначе правило отклонено выше)
+        end = _add_days(start, CHECK_HORIZON_DAYS * count)
+        last = first
+        for last in islice(occurrences(rule, start, start, end), count):
+            pass
+        rule = rule._replace(until=last)
+    return rule
+
+def format_rule(rule: Rule) -> str:
+    """Правило в формате RRULE (так оно хранится в колонке tasks.recurrence)."""
+    parts = [f"FREQ={rule.freq}"]
+    if rule.interval != 1:
+        parts.append(f"INTERVAL={rule.interval}")
+    if rule.weekdays:
+        parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in rule.weekdays))
+    if rule.monthday is not None:
+        parts.append(f"BYMONTHDAY={rule.monthday}")
+    if rule.until is not None:
+        parts.append(f"UNTIL={rule.until.strftime('%Y%m%dT%H%M%S')}")
+    return ";".join(parts)
+
+def resolve(text: str, start: Optional[datetime], now: Optional[datetime] = None) -> Tuple[str, datetime]:
+    """
+    Правило и первое повторение для сохранения задачи.
+
+    Args:
+        text: правило RRULE или фраза ("каждый понедельник в 10 утра")
+        start: срок задачи - первое повторение (для фразы можно не указывать)
+        now: текущее время (для фразы без start)
+
+    Returns:
+        Tuple[str, datetime]: нормализованное правило и первое повторение
+
+    Raises:
+        ValueError: если правило неверное или для RRULE не указан срок
+    """
+    stripped = text.strip()
+    if re.match(r"(?i)(rrule:)?\s*freq\s*=", stripped):
+        if start is None:
+            raise ValueError("для правила RRULE нужен срок первого повторения")
+        return format_rule(parse_rule(stripped, start)), start
+
+    found = parse_phrase(stripped, now)
+    if found is None:
+        raise ValueError("не удалось распознать правило повторения")
+    rule_text, first = found
+    if start is None:
+        return rule_text, first
+    # Явный срок задает первое повторение и время
+    return format_rule(parse_rule(rule_text, start)), start
+
+# --- Вычисление повторений ---
+
+def _add_days(value: datetime, days: int) -> datetime:
+    """value + days дней, но не дальше последнего представимого года."""
+    try:
+        return value + timedelta(days=days)
+    except OverflowError:
+        return datetime.max
+
+def _daily(rule: Rule, start: datetime, window_from: datetime, end: datetime) -> Iterator[datetime]:
+    step = timedelta(days=rule.interval)
+    # Номер первого повторения не раньше window_from (деление с округлением вверх)
+    number = max(0, -((start - window_from) // step))
+    current = start + step * number
+    while current < end:
+        yield current
+        current += step
+
+def _weekly(rule: Rule, start: datetime, window_from: datetime, end: datetime) -> Iterator[datetime]:
+    period = timedelta(weeks=rule.interval)
+    # Понедельник недели первого повторения, время - как у первого повторения
+    anchor = start - timedelta(days=start.weekday())
+    week = anchor + period * max(0, (window_from - anchor) // period)
+    while week < end:
+        for weekday in rule.weekdays:
+            current = week + timedelta(days=weekday)
+            if current >= end:
+                return
+            if current >= window_from:
+                yield current
+        week += period
+
+def _monthly(rule: Rule, start: datetime, window_from: datetime, end: datetime) -> Iterator[datetime]:
+    if rule.freq == "YEARLY":
+        step, monthday = 12 * rule.interval, start.day
+    else:
+        step, monthday = rule.interval, rule.monthday
+    months = (window_from.year - start.year) * 12 + window_from.month - start.month
+    number = max(0, months // step)
+    while True:
+        total = start.month - 1 + number * step
+        year, month = start.year + total // 12, total % 12 + 1
+        if year > datetime.max.year or datetime(year, month, 1) >= end:
+            return
+        days = calendar.monthrange(year, month)[1]
+        day = monthday if monthday > 0 else days + monthday + 1
+        # Месяцы без нужного дня (31 число в апреле) пропускаются, как в RFC 5545
+        if day <= days:
+            current = start.replace(year=year, month=month, day=day)
+            if current >= end:
+                return
+            if current >= window_from:
+                yield current
+        number += 1
+
+_EXPANDERS = {"DAILY": _daily, "WEEKLY": _weekly, "MONTHLY": _monthly, "YEARLY": _monthly}
+
+def occurrences(rule: Rule, start: datetime, window_from: datetime, window_to: datetime) -> Iterator[datetime]:
+    """
+    Генератор повторений в интервале [window_from, window_to) по возрастанию.
+
+    Повторения до window_from не перебираются: генератор начинает с
+    периода, в который попадает window_from.
+    """
+    end = window_to
+    if rule.until is not None and rule.until < end:
+        end = rule.until + timedelta(microseconds=1)
+    window_from = max(window_from, start)
+    if window_from >= end:
+        return iter(())
+    return _EXPANDERS[rule.freq](rule, start, window_from, end)
+
+def is_occurrence(rule: Rule, start: datetime, value: datetime) -> bool:
+    """Совпадает ли value с одним из повторений."""
+    return next(occurrences(rule, start, value, value + timedelta(seconds=1)), None) == value
+
+def task_rule(task: models.Task) -> Rule:
+    """Правило повторяющейся задачи (правила в базе уже проверены при сохранении)."""
+    return parse_rule(task.recurrence, task.due_date)
+
+# --- Исключения (выполненные повторения) ---
+
+def recurring_tasks(db: Session, before: Optional[datetime] = None) -> List[models.Task]:
+    """
+    Невыполненные повторяющиеся задачи пользователя сессии, начавшиеся до before.
+    Запрос читает частичный индекс ix_tasks_user_recurring.
+    """
+    Task = models.Task
+    query = db.query(Task).filter(Task.recurrence.isnot(None), Task.is_completed == False)
+    if before is not None:
+        query = query.filter(Task.due_date < before)
+    return query.all()
+
+def completed_occurrences(
+    db: Session,
+    task_ids: Iterable[int],
+    window_from: Optional[datetime] = None,
+    window_to: Optional[datetime] = None
+) -> Dict[int, Set[datetime]]:
+    """Выполненные повторения задач в интервале: {ID задачи: {даты}}."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return {}
+    Occurrence = models.TaskOccurrence
+    query = db.query(Occurrence.task_id, Occurrence.occurrence).filter(Occurrence.task_id.in_(task_ids))
+    if window_from is not None:
+        query = query.filter(Occurrence.occurrence >= window_from)
+    if window_to is not None:
+        query = query.filter(Occurrence.occurrence < window_to)
+    completed: Dict[int, Set[datetime]] = {}
+    for task_id, occurrence in query:
+        completed.setdefault(task_id, set()).add(occurrence)
+    return completed
+
+def complete(db: Session, task: models.Task, occurrence: datetime) -> bool:
+    """
+    Отмечает повторение выполненным (добавляет исключение в сессию).
+
+    Returns:
+        bool: False, если повторение уже было выполнено
+
+    Raises:
+        ValueError: если дата не совпадает ни с одним повторением
+    """
+    if not is_occurrence(task_rule(task), task.due_date, occurrence):
+        raise ValueError("дата не совпадает с повторением задачи")
+    if db.get(models.TaskOccurrence, (task.id, occurrence)) is not None:
+        return False
+    db.add(models.TaskOccurrence(task_id=task.id, occurrence=occurrence, completed_at=datetime.now()))
+    return True
+
+class Occurrence:
+    """
+    Повторение задачи: все атрибуты как у задачи, кроме срока.
+    Подходит везде, где ожидается задача (task_to_dict, columnar.task_columns).
+    """
+
+    def __init__(self, task: models.Task, due_date: datetime, is_completed: bool = False):
+        self.task = task
+        self.due_date = due_date
+        self.is_completed = is_completed
+
+    def __getattr__(self, name):
+        return getattr(self.task, name)
+
+def expand(
+    tasks: Iterable[models.Task],
+    window_from: datetime,
+    window_to: datetime,
+    completed: Dict[int, Set[datetime]],
+    include_completed: bool = False
+) -> Iterator[Occurrence]:
+    """
+    Повторения нескольких задач в интервале, по возрастанию срока.
+
+    Генераторы задач объединяются лениво (heapq.merge), поэтому при
+    ограничении результата (islice) вычисляются только нужные повторения.
+    """
+    def task_occurrences(task: models.Task) -> Iterator[Occurrence]:
+        done = completed.get(task.id, ())
+        for value in occurrences(task_rule(task), task.due_date, window_from, window_to):
+            if value in done:
+                if include_completed:
+                    yield Occurrence(task, value, True)
+            else:
+                yield Occurrence(task, value)
+
+    return heapq.merge(
+        *(task_occurrences(task) for task in tasks),
+        key=lambda occurrence: (occurrence.due_date, occurrence.id)
+    )
+
+def task_occurrences(
+    db: Session,
+    tasks: Iterable[models.Task],
+    window_from: datetime,
+    window_to: datetime
+) -> Dict[int, List[Occurrence]]:
+    """
+    Повторения задач в интервале (и выполненные, и нет) для GET /tasks:
+    {ID задачи: до MAX_TASK_OCCURRENCES повторений}.
+    """
+    tasks = list(tasks)
+    completed = completed_occurrences(db, (task.id for task in tasks), window_from, window_to)
+    return {
+        task.id: list(islice(expand([task], window_from, window_to, completed, include_completed=True), MAX_TASK_OCCURRENCES))
+        for task in tasks
+    }
+
+def agenda_occurrences(
+    db: Session,
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    now: datetime
+) -> Iterator[Occurrence]:
+    """Невыполненные повторения для повестки (интервал без начала ограничен OVERDUE_LOOKBACK_DAYS)."""
+    window_from = date_from or (date_to or now) - timedelta(days=OVERDUE_LOOKBACK_DAYS)
+    window_to = date_to or datetime.max
+    tasks = recurring_tasks(db, before=date_to)
+    completed = completed_occurrences(db, (task.id for task in tasks), window_from, date_to)
+    return expand(tasks, window_from, window_to, completed)
+
+@on_tasks_flushed
+def _delete_exceptions(connection: Connection, changes) -> None:
+    """Удаляет исключения удаленных задач в той же транзакции."""
+    task_ids = [change.task_id for change in changes if change.action == "deleted"]
+    if task_ids:
+        table = models.TaskOccurrence.__table__
+        connection.execute(delete(table).where(table.c.task_id.in_(task_ids)))
+
+# --- Фразы на русском языке ---
+
+_WEEKDAY_STEMS = (
+    ("понедельн", 0), ("вторник", 1), ("сред", 2), ("четверг", 3),
+    ("пятниц", 4), ("суббот", 5), ("воскресень", 6)
+)
+
+_UNITS = (
+    ("дн", "DAILY"), ("день", "DAILY"), ("сут", "DAILY"),
+    ("недел", "WEEKLY"), ("месяц", "MONTHLY"), ("год", "YEARLY"), ("лет", "YEARLY")
+)
+
+_ORDINALS = {"втор": 2, "трет": 3, "четверт": 4}
+
+_NUMBERS = {"два": 2, "две": 2, "три": 3, "четыре": 4, "пять": 5, "шесть": 6}
+
+_TIME_OF_DAY = (("утр", 9), ("обед", 13), ("вечер", 19), ("ноч", 22))
+
+def _unit(word: str) -> Optional[str]:
+    for stem, freq in _UNITS:
+        if word.startswith(stem):
+            return freq
+    return None
+
+def _weekdays_in(text: str) -> List[int]:
+    days = []
+    for word in re.findall(r"\w+", text):
+        for stem, day in _WEEKDAY_STEMS:
+            if word.startswith(stem):
+                days.append(day)
+    return sorted(set(days))
+
+def _parse_time(text: str) -> Optional[time]:
+    """Время из фразы: "в 10 утра", "в 15:30", "в 3 часа дня", "к 18 часам", "вечером"."""
+    match = re.search(
+        r"\b[вк]\s+(\d{1,2})(?:[:.](\d{2}))?(?!\d|\s*(?:-?г?о\s+)?числ)(?:\s*час\w*)?(?:\s+(утра|дня|вечера|ночи))?", text
+    )
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        part = match.group(3)
+        if part in ("дня", "вечера") and hour < 12:
+            hour += 12
+        elif part == "ночи" and hour == 12:
+            hour = 0
+        if hour < 24 and minute < 60:
+            return time(hour, minute)
+    for stem, hour in _TIME_OF_DAY:
+        if re.search(rf"\b(?:кажд\w+\s+)?{stem}\w*", text):
+            return time(hour)
+    return None
+
+def _parse_rule_phrase(text: str) -> Optional[str]:
+    """
+    Правило RRULE без UNTIL для фразы (None - фраза не о повторении).
+
+    Повторением считаются только наречия ("ежедневно") и явные повторы
+    ("каждый ...", "по будням", "по понедельникам"): "купить ежедневник",
+    "ежегодный отчет", "до 15 числа этого месяца", "через день" - разовые задачи.
+    """
+    # По будням / по выходным / по понедельникам и средам
+    if re.search(r"\bпо\s+будням\b", text) or re.search(r"\bкажд\w*\s+будн", text):
+        return "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"
+    if re.search(r"\bпо\s+выходным\b", text) or re.search(r"\bкажд\w*\s+выходн", text):
+        return "FREQ=WEEKLY;BYDAY=SA,SU"
+    match = re.search(r"\bпо\s+((?:понедельникам|вторникам|средам|четвергам|пятницам|субботам|воскресеньям)\b[\w\s,и]*)", text)
+    if match:
+        days = _weekdays_in(match.group(1))
+        rule = "FREQ=WEEKLY;BYDAY=" + ",".join(WEEKDAYS[day] for day in days)
+        # Каждые 2 недели по понедельникам
+        weeks = re.search(r"\bкажд\w*\s+(\d+|\w+)\s+недел", text)
+        if weeks:
+            interval = int(weeks.group(1)) if weeks.group(1).isdigit() else _NUMBERS.get(weeks.group(1), 1)
+            if interval > 1:
+                rule += f";INTERVAL={interval}"
+        return rule
+
+    # Каждое 15 число / 15 числа каждого месяца / в последний день каждого месяца
+    every_month = re.search(r"\bежемесячно\b|\bкажд\w*\s+месяц", text)
+    monthday = re.search(r"(\d{1,2})(?:-?г?о)?\s+числ", text)
+    if monthday and (every_month or re.search(r"\bкажд\w*\s+\d", text)):
+        return f"FREQ=MONTHLY;BYMONTHDAY={int(monthday.group(1))}"
+    if re.search(r"последн\w*\s+(?:день|числ)", text) and every_month:
+        return "FREQ=MONTHLY;BYMONTHDAY=-1"
+
+    # Ежедневно / еженедельно / ежемесячно / ежегодно (только наречия:
+    # "ежедневник" и "ежегодный отчет" - не повторение)
+    adverb = re.search(r"\b(ежедневно|еженедельно|ежемесячно|ежегодно)\b", text)
+    if adverb:
+        freq = {"ежедневно": "DAILY", "еженедельно": "WEEKLY", "ежемесячно": "MONTHLY", "ежегодно": "YEARLY"}
+        return f"FREQ={freq[adverb.group(1)]}"
+
+    match = re.search(r"\bкажд\w*\s+(.+)", text)
+    if not match:
+        return None
+    rest = match.group(1)
+
+    # Каждые 2 дня / каждые три недели
+    number = re.match(r"(\d+|\w+)\s+(\w+)", rest)
+    if number:
+        value = int(number.group(1)) if number.group(1).isdigit() else _NUMBERS.get(number.group(1))
+        freq = _unit(number.group(2))
+        if value and freq:
+            return f"FREQ={freq};INTERVAL={value}" if value > 1 else f"FREQ={freq}"
+
+    # Каждую вторую неделю / каждый второй вторник
+    interval = 1
+    ordinal = re.match(r"(втор|трет|четверт)(?:ой|ую|ое|ый|ий|ье|ью|ья)\s+(.+)", rest)
+    if ordinal:
+        interval = _ORDINALS[ordinal.group(1)]
+        rest = ordinal.group(2)
+
+    # Каждый понедельник и среду
+    days = _weekdays_in(rest.split(" в ")[0])
+    if days:
+        rule = "FREQ=WEEKLY;BYDAY=" + ",".join(WEEKDAYS[day] for day in days)
+        return rule + (f";INTERVAL={interval}" if interval > 1 else "")
+
+    # Каждый день / каждую неделю / каждое утро / каждый вечер
+    word = re.match(r"(\w+)", rest)
+    if word:
+        freq = _unit(word.group(1))
+        if freq:
+            return f"FREQ={freq}" + (f";INTERVAL={interval}" if interval > 1 else "")
+        if any(word.group(1).startswith(stem) for stem, _ in _TIME_OF_DAY):
+            return "FREQ=DAILY"
+    return None
+
+def first_from(rule_text: str, text: str, start: datetime) -> datetime:
+    """
+    Первое повторение серии, которая начинается со срока start (например,
+    срока, найденного в тексте задачи): ближайшее повторение правила не
+    раньше start. Время - из фразы text, если оно в ней указано, иначе из start.
+    """
+    at = _parse_time(text.lower().replace("ё", "е"))
+    if at is not None:
+        start = datetime.combine(start.date(), at)
+    rule = parse_rule(rule_text, start)
+    return next(occurrences(rule, start, start, _add_days(start, CHECK_HORIZON_DAYS)), start)
+
+def parse_phrase(text: str, now: Optional[datetime] = None) -> Optional[Tuple[str, datetime]]:
+    """
+    Распознает повторение во фразе на русском языке.
+
+    Примеры: "каждый понедельник в 10 утра", "по будням в 9:30",
+    "каждые 2 дня", "каждую вторую среду", "ежемесячно 15 числа",
+    "каждый вечер".
+
+    Args:
+        text: текст задачи
+        now: текущее время (первое повторение - не раньше него)
+
+    Returns:
+        Optional[Tuple[str, datetime]]: правило RRULE и первое повторение
+                                        или None, если текст не о повторении
+    """
+    lowered = text.lower().replace("ё", "е")
+    rule_text = _parse_rule_phrase(lowered)
+    if rule_text is None:
+        return None
+
+    now = now or datetime.now()
+    at = _parse_time(lowered) or time(12)
+    start = datetime.combine(now.date(), at)
+    if start < now and "BYDAY" not in rule_text and "BYMONTHDAY" not in rule_text:
+        # Сегодняшнее время уже прошло - начинаем со следующего периода
+        start = datetime.combine(now.date() + timedelta(days=1), at)
+    rule = parse_rule(rule_text, start)
+    if rule.freq in ("WEEKLY", "MONTHLY"):
+        # Дни недели и число месяца после разбора заданы в правиле явно,
+        # поэтому первое повторение - ближайшее из них, начиная с сегодняшнего
+        # (и для "каждые 2 недели": серия начинается с ближайшего дня)
+        first = next(occurrences(rule._replace(interval=1), start, now, _add_days(now, CHECK_HORIZON_DAYS)), None)
+        if first is None:
+            return None
+        start = first
+    return format_rule(rule), start
@@ -0,0 +1,403 @@
+"""
+Модуль reminders.py напоминает о сроках задач.
+
+Опрос всей таблицы задач раз в минуту не масштабируется, поэтому
+напоминания планируются в памяти процесса:
+- в куче (heapq) лежат только напоминания о сроках в ближайшие
+  APP_REMINDER_HORIZON_HOURS часов, но не больше APP_REMINDER_MAX_SCHEDULED -
+  память не зависит от размера таблицы;
+- окно загружается из базы по частям: при старте - целиком, затем раз в
+  EXTEND_SECONDS дочитывается только новый отрезок времени, который вошел
+  в окно (диапазон частичного индекса ix_tasks_open_due_date);
+- повторяющиеся задачи дают напоминание о каждом невыполненном повторении
+  в окне (app/recurrence.py);
+- создание, изменение, выполнение и удаление задачи обновляют кучу сразу
+  после commit (app/events.py): старые напоминания задачи помечаются
+  удаленными (ленивое удаление из кучи), новые добавляются;
+- поток планировщика спит до ближайшего напоминания и отправляет его
+  подключенным клиентам пользователя через Server-Sent Events
+  (GET /tasks/reminders/events). Если клиент не подключен, напоминание
+  не сохраняется.
+
+Напоминание приходит за APP_REMINDER_LEAD_MINUTES минут до срока (задачи,
+созданные позже этого момента, напоминают сразу). Записи других
+процессов куча не видит, поэтому раз в RELOAD_SECONDS окно загружается
+заново (уже отправленные напоминания не повторяются).
+"""
+
+import asyncio
+import heapq
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app import models, recurrence
+from app.config import get_settings
+from app.events import on_tasks_changed
+
+# Как часто дочитывать в окно новый отрезок времени
+EXTEND_SECONDS = 60
+
+# Как часто загружать окно заново (записи других процессов)
+RELOAD_SECONDS = 600
+
+# Сколько напоминаний может ждать отправки одному подключению; если
+# клиент не успевает их читать, лишние отбрасываются
+MAX_QUEUED_PER_CONNECTION = 100
+
+# Как часто слать пустой комментарий в SSE, чтобы прокси не закрыли соединение
+EVENTS_HEARTBEAT_SECONDS = 15.0
+
+# Запись кучи: [когда напомнить, ID задачи, срок, пользователь, название, активна].
+# Пара (ID задачи, срок) уникальна, поэтому записи сравниваются по первым трем полям
+REMIND_AT, TASK_ID, DUE_DATE, USER_ID, TITLE, ALIVE = range(6)
+
+Plan = Tuple[int, List[Tuple[Optional[int], str, datetime]]]
+
+def reminder_to_dict(entry: list) -> dict:
+    """Напоминание в формате события."""
+    return {
+        "task_id": entry[TASK_ID],
+        "title": entry[TITLE],
+        "due_date": entry[DUE_DATE].isoformat(),
+        "remind_at": entry[REMIND_AT].isoformat()
+    }
+
+# --- Подписчики (SSE) ---
+
+_listeners: Dict[Optional[int], List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+_listeners_lock = threading.Lock()
+
+def listen(user_id: Optional[int]) -> asyncio.Queue:
+    """Очередь, в которую приходят напоминания пользователя."""
+    queue = asyncio.Queue(maxsize=MAX_QUEUED_PER_CONNECTION)
+    with _listeners_lock:
+        _listeners.setdefault(user_id, []).append((asyncio.get_running_loop(), queue))
+    return queue
+
+def unlisten(user_id: Optional[int], queue: asyncio.Queue) -> None:
+    with _listeners_lock:
+        listeners = [item for item in _listeners.get(user_id, []) if item[1] is not queue]
+        if listeners:
+            _listeners[user_id] = listeners
+        else:
+            _listeners.pop(user_id, None)
+
+def _put(queue: asyncio.Queue, reminder: dict) -> None:
+    try:
+        queue.put_nowait(reminder)
+    except asyncio.QueueFull:
+        pass
+
+def _deliver(entries: List[list]) -> None:
+    for entry in entries:
+        with _listeners_lock:
+            listeners = list(_listeners.get(entry[USER_ID], []))
+        if not listeners:
+            continue
+        reminder = reminder_to_dict(entry)
+        for loop, queue in listeners:
+            try:
+                loop.call_soon_threadsafe(_put, queue, reminder)
+            except RuntimeError:
+                # Цикл событий подключения уже закрыт
+                pass
+
+async def stream_events(
+    user_id: Optional[int],
+    is_disconnected: Callable[[], Awaitable[bool]]
+) -> AsyncIterator[str]:
+    """Поток Server-Sent Events: событие reminder для каждого напоминания пользователя."""
+    queue = listen(user_id)
+    try:
+        # Первый комментарий сразу отправляет заголовки ответа клиенту
+        yield ": connected\n\n"
+        while True:
+            try:
+                reminder = await asyncio.wait_for(queue.get(), timeout=EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": ping\n\n"
+                continue
+            yield f"event: reminder\ndata: {json.dumps(reminder, ensure_ascii=False)}\n\n"
+    finally:
+        unlisten(user_id, queue)
+
+# --- Загрузка из базы ---
+
+def _load_rows(start: datetime, end: datetime, limit: int) -> List[Tuple[int, Optional[int], str, datetime]]:
+    """
+    Невыполненные задачи и повторения со сроком в [start, end) во всех базах
+    (основной и шардах), по возрастанию срока, не больше limit.
+    """
+    from app.partitioning import router
+
+    tasks = models.Task.__table__
+    occurrences = models.TaskOccurrence.__table__
+    per_engine = []
+    for bind in router.all_engines():
+        with bind.connect() as connection:
+            # Обычные задачи - диапазон частичного индекса ix_tasks_open_due_date
+            rows = connection.execute(
+                select(tasks.c.id, tasks.c.user_id, tasks.c.title, tasks.c.due_date).where(
+                    tasks.c.is_completed == False,
+                    tasks.c.due_date >= start,
+                    tasks.c.due_date < end,
+                    tasks.c.recurrence.is_(None)
+                ).order_by(tasks.c.due_date).limit(limit)
+            ).all()
+
+            # Повторяющиеся задачи, начавшиеся до конца отрезка
+            series = connection.execute(
+                select(tasks.c.id, tasks.c.user_id, tasks.c.title, tasks.c.due_date, tasks.c.recurrence).where(
+                    tasks.c.recurrence.isnot(None),
+                    tasks.c.is_completed == False,
+                    tasks.c.due_date < end
+                )
+            ).all()
+            completed: Set[Tuple[int, datetime]] = set()
+            if series:
+                completed = set(connection.execute(
+                    select(occurrences.c.task_id, occurrences.c.occurrence).where(
+                        occurrences.c.occurrence >= start,
+                        occurrences.c.occurrence < end
+                    )
+                ).all())
+
+        repeated = [
+            (task_id, user_id, title, due_date)
+            for task_id, user_id, title, first, rule in series
+            for due_date in islice(recurrence.occurrences(recurrence.parse_rule(rule, first), first, start, end), limit)
+            if (task_id, due_date) not in completed
+        ]
+        repeated.sort(key=lambda row: row[3])
+        per_engine.append([tuple(row) for row in rows])
+        per_engine.append(repeated)
+
+    return list(islice(heapq.merge(*per_engine, key=lambda row: row[3]), limit))
+
+def _plan(task_id: int, values: Optional[dict], now: datetime, until: datetime) -> Plan:
+    """Напоминания задачи после изменения (values - новые значения полей, None - удалена)."""
+    if values is None or values["is_completed"] or values["due_date"] is None:
+        return task_id, []
+    if not values.get("recurrence"):
+        return task_id, [(values["user_id"], values["title"], values["due_date"])]
+
+    from app.partitioning import session_for_user
+
+    db = session_for_user(values["user_id"])
+    try:
+        completed = recurrence.completed_occurrences(db, [task_id], now, until).get(task_id, set())
+    finally:
+        db.close()
+    rule = recurrence.parse_rule(values["recurrence"], values["due_date"])
+    return task_id, [
+        (values["user_id"], values["title"], due_date)
+        for due_date in recurrence.occurrences(rule, values["due_date"], now, until)
+        if due_date not in completed
+    ]
+
+# --- Планировщик ---
+
+class ReminderScheduler:
+    """Куча напоминаний на ближайшие часы и поток, который их отправляет."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._heap: List[list] = []
+        # Активные записи кучи по задачам: {ID задачи: {срок: запись}}
+        self._entries: Dict[int, Dict[datetime, list]] = {}
+        self._dead = 0
+        # Отправленные напоминания со сроком в будущем: при повторной
+        # загрузке окна они не отправляются еще раз
+        self._sent: Set[Tuple[int, datetime]] = set()
+        # Окно загружено для сроков до loaded_until (None - не загружено)
+        self.loaded_until: Optional[datetime] = None
+        # Изменения, пришедшие во время загрузки: повторяются после нее
+        self._pending: Optional[List[Plan]] = None
+        self._next_reload = 0.0
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def size(self) -> int:
+        """Число запланированных напоминаний."""
+        with self._condition:
+            return len(self._heap) - self._dead
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        with self._condition:
+            self._condition.notify_all()
+        self._thread = None
+
+    # --- Изменение кучи (под блокировкой) ---
+
+    def _remove_task(self, task_id: int) -> None:
+        for entry in self._entries.pop(task_id, {}).values():
+            entry[ALIVE] = False
+            self._dead += 1
+
+    def _add(self, task_id: int, user_id: Optional[int], title: str, due_date: datetime, now: datetime) -> bool:
+        if due_date < now or self.loaded_until is None or due_date >= self.loaded_until:
+            return False
+        if (task_id, due_date) in self._sent:
+            return False
+        entries = self._entries.setdefault(task_id, {})
+        if due_date in entries:
+            return False
+        lead = timedelta(minutes=get_settings().reminder_lead_minutes)
+        entry = [due_date - lead, task_id, due_date, user_id, title, True]
+        entries[due_date] = entry
+        heapq.heappush(self._heap, entry)
+        return True
+
+    def _apply(self, plan: Plan, now: datetime) -> None:
+        task_id, reminders = plan
+        self._remove_task(task_id)
+        for user_id, title, due_date in reminders:
+            self._add(task_id, user_id, title, due_date, now)
+
+    def _compact(self) -> None:
+        """Убирает из кучи удаленные записи, если их больше половины."""
+        if self._dead > len(self._heap) // 2:
+            self._heap = [entry for entry in self._heap if entry[ALIVE]]
+            heapq.heapify(self._heap)
+            self._dead = 0
+
+    # --- События задач ---
+
+    def on_changes(self, changes) -> None:
+        """Обновляет напоминания измененных задач (вызывается после commit)."""
+        if self.loaded_until is None:
+            return
+        now = datetime.now()
+        until = now + timedelta(hours=get_settings().reminder_horizon_hours, seconds=EXTEND_SECONDS)
+        # Повторения вычисляются до блокировки (для них нужен запрос к базе)
+        plans = [_plan(change.task_id, change.new, now, until) for change in changes]
+        with self._condition:
+            for plan in plans:
+                self._apply(plan, now)
+                if self._pending is not None:
+                    self._pending.append(plan)
+            self._compact()
+            # Новое напоминание могло оказаться раньше того, до которого спит поток
+            self._condition.notify_all()
+
+    # --- Загрузка окна ---
+
+    def _load(self, start: datetime, end: datetime, now: datetime, reload: bool) -> None:
+        """Загружает напоминания со сроками в [start, end); reload - заменить всю кучу."""
+        settings = get_settings()
+        with self._condition:
+            room = settings.reminder_max_scheduled - (0 if reload else len(self._heap) - self._dead)
+            if room <= 0:
+                # Места нет: окно не расширяется, пока напоминания не отправлены
+                return
+            self._pending = []
+        try:
+            rows = _load_rows(start, end, room + 1)
+        except Exception:
+            with self._condition:
+                self._pending = None
+            raise
+
+        if len(rows) > room:
+            # Окно не помещается: загружаем его только до срока, на котором
+            # закончилось место (задачи с этим сроком - при следующем дочитывании)
+            end = rows[room][3]
+            rows = [row for row in rows[:room] if row[3] < end]
+
+        with self._condition:
+            if reload:
+                for entry in self._heap:
+                    entry[ALIVE] = False
+                self._heap, self._entries, self._dead = [], {}, 0
+                self._sent = {key for key in self._sent if key[1] >= now}
+            self.loaded_until = end
+            for task_id, user_id, title, due_date in rows:
+                self._add(task_id, user_id, title, due_date, now)
+            for plan in self._pending:
+                self._apply(plan, now)
+            self._pending = None
+            self._compact()
+
+    def _maybe_load(self) -> None:
+        now = datetime.now()
+        horizon = now + timedelta(hours=get_settings().reminder_horizon_hours)
+        if self.loaded_until is None or time.monotonic() >= self._next_reload:
+            self._load(now, horizon, now, reload=True)
+            self._next_reload = time.monotonic() + RELOAD_SECONDS
+            print(f"⏰ Напоминания загружены: {self.size} до {self.loaded_until:%Y-%m-%d %H:%M}")
+        elif horizon - self.loaded_until >= timedelta(seconds=EXTEND_SECONDS):
+            self._load(self.loaded_until, horizon, now, reload=False)
+
+    # --- Отправка ---
+
+    def _pop_due(self, now: datetime) -> List[list]:
+        """Снимает с кучи напоминания, время которых наступило (под блокировкой)."""
+        due = []
+        while self._heap and self._heap[0][REMIND_AT] <= now:
+            entry = heapq.heappop(self._heap)
+            if not entry[ALIVE]:
+                self._dead -= 1
+                continue
+            entries = self._entries.get(entry[TASK_ID])
+            if entries is not None:
+                entries.pop(entry[DUE_DATE], None)
+                if not entries:
+                    del self._entries[entry[TASK_ID]]
+            self._sent.add((entry[TASK_ID], entry[DUE_DATE]))
+            due.append(entry)
+        return due
+
+    def _run(self) -> None:
+        last_extend = 0.0
+        while not self._stopping.is_set():
+            try:
+                if time.monotonic() - last_extend >= EXTEND_SECONDS:
+                    self._maybe_load()
+                    last_extend = time.monotonic()
+
+                with self._condition:
+                    due = self._pop_due(datetime.now())
+                _deliver(due)
+
+                with self._condition:
+                    timeout = EXTEND_SECONDS - (time.monotonic() - last_extend)
+                    if self._heap:
+                        timeout = min(timeout, (self._heap[0][REMIND_AT] - datetime.now()).total_seconds())
+                    if timeout > 0:
+                        self._condition.wait(timeout)
+            except Exception as e:
+                print(f"❌ Ошибка планировщика напоминаний: {str(e)}")
+                self._stopping.wait(EXTEND_SECONDS)
+
+_scheduler = ReminderScheduler()
+
+def get_scheduler() -> ReminderScheduler:
+    return _scheduler
+
+def start_scheduler() -> None:
+    """Запускает планировщик (APP_REMINDER_HORIZON_HOURS=0 - не запускать)."""
+    if get_settings().reminder_horizon_hours > 0:
+        _scheduler.start()
+
+def stop_scheduler() -> None:
+    _scheduler.stop()
+
+@on_tasks_changed
+def _update_reminders(changes) -> None:
+    """Обновляет кучу после commit."""
+    _scheduler.on_changes(changes)
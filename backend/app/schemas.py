@@ -10,9 +10,11 @@ Pydantic гарантирует, что данные, которые прихо
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 
+from app import recurrence as recurrence_rules
+
 # Базовые схемы для задач
 
 class TaskBase(BaseModel):
@@ -31,6 +33,18 @@ class TaskBase(BaseModel):
         max_length=2000,
         description="Подробное описание задачи (максимум 2000 символов)"
     )
+    due_date: Optional[datetime] = Field(
+        None,
+        description="Срок выполнения задачи"
+    )
+    priority: Literal["high", "medium", "low"] = Field(
+        "medium",
+        description="Приоритет задачи"
+    )
+    tags: List[str] = Field(
+        default_factory=list,
+        description="Теги задачи"
+    )
 
 class TaskCreate(TaskBase):
     """
@@ -59,6 +73,50 @@ class TaskCreate(TaskBase):
             raise ValueError("Заголовок задачи не может быть пустым")
         return v.strip()
 
+class TaskImport(TaskCreate):
+    """
+    Схема строки импорта задач (POST /tasks/import).
+    
+    Кроме полей TaskCreate принимает статус выполнения и дату создания,
+    чтобы файл экспорта можно было загрузить обратно. Остальные поля
+    экспорта (id, updated_at) игнорируются.
+    """
+    is_completed: bool = False
+    created_at: Optional[datetime] = None
+    recurrence: Optional[str] = None
+    
+    @validator('description', 'due_date', 'created_at', 'recurrence', pre=True)
+    def empty_string_is_none(cls, v):
+        """Пустая ячейка CSV означает отсутствие значения."""
+        return None if v == "" else v
+    
+    @validator('priority', pre=True)
+    def empty_priority_is_medium(cls, v):
+        """Пустая ячейка CSV означает приоритет по умолчанию."""
+        return "medium" if v == "" else v
+    
+    @validator('is_completed', pre=True)
+    def empty_status_is_open(cls, v):
+        """Пустая ячейка CSV означает невыполненную задачу."""
+        return False if v == "" else v
+    
+    @validator('tags', pre=True)
+    def split_tags(cls, v):
+        """В CSV теги записываются одной ячейкой через запятую."""
+        if isinstance(v, str):
+            return [name for name in v.split(",") if name.strip()]
+        return v
+    
+    @validator('recurrence')
+    def check_recurrence(cls, v, values):
+        """Правило повторения проверяется и приводится к формату RRULE (app/recurrence.py)."""
+        if v is None:
+            return v
+        if values.get('due_date') is None:
+            raise ValueError("Для повторяющейся задачи нужен срок первого повторения")
+        rule, _ = recurrence_rules.resolve(v, values['due_date'])
+        return rule
+
 class TaskUpdate(BaseModel):
     """
     Схема для обновления существующей задачи.
@@ -79,6 +137,18 @@ class TaskUpdate(BaseModel):
         None,
         description="Статус выполнения задачи"
     )
+    due_date: Optional[datetime] = Field(
+        None,
+        description="Новый срок выполнения"
+    )
+    priority: Optional[Literal["high", "medium", "low"]] = Field(
+        None,
+        description="Новый приоритет"
+    )
+    tags: Optional[List[str]] = Field(
+        None,
+        description="Новый список тегов"
+    )
     
     class Config:
         """
@@ -0,0 +1,454 @@
+"""
+Модуль similar.py ищет похожие задачи для подсказок (GET /tasks/similar,
+GET /tasks/{id}/similar) и предлагает теги, которые пользователь уже ставил
+похожим задачам.
+
+В отличие от app/duplicates.py (почти одинаковые формулировки), здесь нужна
+ранжированная выдача по смыслу текста, поэтому используется TF-IDF:
+
+1. Признаки текста (название и описание): слова и символьные триграммы слов
+   (" мол", "оло", ...), хэшированные в FEATURES колонок. Триграммы
+   находят задачи с разными формами слова ("отчет" и "отчета").
+2. Задачи пользователя - разреженная матрица SciPy (строка - задача),
+   строки взвешены IDF и нормированы, поэтому скалярное произведение
+   со взвешенным запросом - косинусное сходство. Матрица хранится по
+   колонкам (CSC): запрос читает только колонки своих признаков, а не
+   всю матрицу, и считает оценки всех задач одним векторным умножением.
+   Признаки, которые есть больше чем в MAX_DF_SHARE задач, в большом
+   индексе при поиске пропускаются: их вклад мал, а колонки самые длинные.
+3. Новые и измененные задачи добавляются в "хвост" - небольшую матрицу
+   с теми же весами IDF, старая строка измененной или удаленной задачи
+   помечается неактуальной. Когда хвост или число неактуальных строк
+   превышают COMPACT_SHARE от основной матрицы, индекс сжимается в
+   фоновом потоке: строки объединяются, IDF пересчитывается. Поиск в это
+   время работает со старой матрицей, а изменения, пришедшие во время
+   сжатия, применяются к новой.
+
+Индекс строится для пользователя при первом запросе одним проходом по его
+задачам и поддерживается после commit (app/events.py). Изменения, сделанные
+во время построения, применяются к новому индексу после него. Записи других
+процессов индекс не видит - на этот случай он перестраивается через
+INDEX_TTL_SECONDS.
+
+Задержка поиска и время построения: python -m benchmarks.bench_similar
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from itertools import chain
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.duplicates import normalize
+from app.events import on_tasks_changed
+from app.partitioning import USER_KEY
+
+# numpy и scipy импортируются в функциях индекса, а не при импорте модуля:
+# app.main импортирует этот модуль при старте, а индекс нужен не сразу
+if TYPE_CHECKING:
+    import numpy as np
+    from scipy import sparse
+
+# Число колонок матрицы (хэшированных признаков)
+FEATURES = 1 << 18
+
+# Признаки, которые есть в большей доле задач (и не меньше чем в
+# FREQUENT_MIN_DOCS задачах), при поиске пропускаются: частые триграммы
+# вроде "ать" занимают большую часть матрицы, а на порядок похожих задач
+# почти не влияют. В небольших индексах используются все признаки
+MAX_DF_SHARE = 0.05
+FREQUENT_MIN_DOCS = 1000
+
+# Минимальное косинусное сходство похожей задачи
+MIN_SCORE = 0.1
+
+# Сжатие: когда хвост или неактуальные строки превышают эту долю основной
+# матрицы (но не раньше COMPACT_MIN_ROWS строк)
+COMPACT_SHARE = 0.1
+COMPACT_MIN_ROWS = 1000
+
+# Сколько тегов предлагать
+SUGGESTED_TAGS = 5
+
+# Срок жизни индекса пользователя (страховка от записей в других процессах)
+INDEX_TTL_SECONDS = 3600
+
+# Для скольких пользователей держать индексы (давно не искавшие вытесняются)
+MAX_INDEXED_USERS = 100
+
+# Сколько строк читать из базы за раз при построении индекса
+BUILD_BATCH_SIZE = 10000
+
+@lru_cache(maxsize=100000)
+def _word_features(word: str) -> Tuple[int, ...]:
+    """Колонки слова: само слово и его триграммы с границами слова."""
+    padded = f" {word} "
+    grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return (hash(("word", word)) % FEATURES, *(hash(gram) % FEATURES for gram in grams))
+
+def text_features(title: Optional[str], description: Optional[str] = None) -> List[int]:
+    """Колонки признаков текста задачи (с повторами - частота признака)."""
+    words = normalize(f"{title or ''} {description or ''}").split()
+    return [column for word in words for column in _word_features(word)]
+
+def _term_counts(rows: Sequence[Sequence[int]]) -> "sparse.csr_matrix":
+    """Матрица частот признаков: строка на каждый список колонок."""
+    import numpy as np
+    from scipy import sparse
+
+    lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+    columns = np.fromiter(chain.from_iterable(rows), dtype=np.int32, count=int(lengths.sum()))
+    row_numbers = np.repeat(np.arange(len(rows), dtype=np.int32), lengths)
+    # Повторы одной колонки в строке суммируются при преобразовании в CSR
+    return sparse.coo_matrix(
+        (np.ones(len(columns), dtype=np.float32), (row_numbers, columns)),
+        shape=(len(rows), FEATURES)
+    ).tocsr()
+
+def _idf(df: "np.ndarray", docs: int) -> "np.ndarray":
+    import numpy as np
+
+    return (np.log((1 + docs) / (1 + df)) + 1).astype(np.float32)
+
+def _merge(
+    matrix: "sparse.csc_matrix",
+    norms: "np.ndarray",
+    idf: "np.ndarray",
+    alive: "np.ndarray",
+    task_ids: "np.ndarray",
+    tail_rows: Sequence[Sequence[int]],
+    tail_ids: Sequence[int],
+    tail_alive: Sequence[bool]
+) -> "Tuple[sparse.csr_matrix, np.ndarray]":
+    """Частоты признаков актуальных строк основной матрицы и хвоста и их ID задач."""
+    import numpy as np
+    from scipy import sparse
+
+    # Частоты восстанавливаются из весов: вес = частота * idf / длина строки
+    base = matrix.tocsr()
+    base.data *= np.repeat(norms, np.diff(base.indptr)) / idf[base.indices]
+    base.data = np.rint(base.data)
+    base = base[alive]
+
+    tail = [row for row, keep in zip(tail_rows, tail_alive) if keep]
+    kept_ids = [task_id for task_id, keep in zip(tail_ids, tail_alive) if keep]
+    counts = sparse.vstack([base, _term_counts(tail)], format="csr")
+    return counts, np.concatenate([task_ids[alive], np.asarray(kept_ids, dtype=np.int64)])
+
+def _weigh(counts: "sparse.csr_matrix", idf: "np.ndarray") -> "Tuple[sparse.csr_matrix, np.ndarray]":
+    """Строки TF-IDF единичной длины и длины строк до нормировки."""
+    import numpy as np
+
+    weighted = counts.copy()
+    weighted.data *= idf[weighted.indices]
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1), dtype=np.float32).ravel())
+    norms[norms == 0] = 1
+    weighted.data /= np.repeat(norms, np.diff(weighted.indptr))
+    return weighted, norms
+
+class SimilarIndex:
+    """
+    TF-IDF индекс задач одного пользователя.
+
+    Строки основной матрицы и хвоста нумеруются подряд: позиция задачи
+    меньше len(ids) - строка основной матрицы, иначе - строка хвоста.
+    Все методы вызываются под self.lock.
+    """
+
+    def __init__(self, task_ids: Sequence[int], rows: Sequence[Sequence[int]]):
+        import numpy as np
+
+        self.lock = threading.Lock()
+        self.expires_at = time.monotonic() + INDEX_TTL_SECONDS
+        # Изменения во время фонового сжатия (None - сжатие не идет)
+        self._log: Optional[List[Tuple[int, Optional[Sequence[int]]]]] = None
+        self._set_base(_term_counts(rows), np.asarray(task_ids, dtype=np.int64))
+
+    def _set_base(self, counts: "sparse.csr_matrix", task_ids: "np.ndarray") -> None:
+        import numpy as np
+
+        # Частота признака по задачам (колонки в строке CSR не повторяются)
+        self.df = np.bincount(counts.indices, minlength=FEATURES).astype(np.int32)
+        self.docs = counts.shape[0]
+        self.idf = _idf(self.df, self.docs)
+        weighted, self.norms = _weigh(counts, self.idf)
+        self.matrix = weighted.tocsc()
+        self.ids = task_ids
+        self.alive = np.ones(len(task_ids), dtype=bool)
+        self.positions: Dict[int, int] = dict(zip(task_ids.tolist(), range(len(task_ids))))
+        self.dead = 0
+        self.tail_rows: List[Sequence[int]] = []
+        self.tail_ids: List[int] = []
+        self.tail_alive: List[bool] = []
+        self._tail: "Optional[sparse.csc_matrix]" = None
+
+    @property
+    def size(self) -> int:
+        """Число актуальных задач в индексе."""
+        return len(self.positions)
+
+    def add(self, task_id: int, features: Sequence[int]) -> None:
+        """Добавляет задачу (или новую версию ее текста) в хвост."""
+        import numpy as np
+
+        if self._log is not None:
+            self._log.append((task_id, features))
+        self._remove(task_id)
+        self.positions[task_id] = len(self.ids) + len(self.tail_ids)
+        self.tail_rows.append(features)
+        self.tail_ids.append(task_id)
+        self.tail_alive.append(True)
+        self.df[np.unique(np.asarray(features, dtype=np.int64))] += 1
+        self.docs += 1
+        self._tail = None
+
+    def remove(self, task_id: int) -> None:
+        """Помечает строку задачи неактуальной (удаляется при сжатии)."""
+        if self._log is not None:
+            self._log.append((task_id, None))
+        self._remove(task_id)
+
+    def _remove(self, task_id: int) -> None:
+        position = self.positions.pop(task_id, None)
+        if position is None:
+            return
+        if position < len(self.ids):
+            self.alive[position] = False
+        else:
+            self.tail_alive[position - len(self.ids)] = False
+            self._tail = None
+        self.dead += 1
+
+    def needs_compaction(self) -> bool:
+        limit = max(COMPACT_MIN_ROWS, COMPACT_SHARE * len(self.ids))
+        return len(self.tail_ids) > limit or self.dead > limit
+
+    def _snapshot(self) -> tuple:
+        return (
+            self.matrix, self.norms, self.idf, self.alive.copy(), self.ids,
+            list(self.tail_rows), list(self.tail_ids), list(self.tail_alive)
+        )
+
+    def compact(self) -> None:
+        """Объединяет основную матрицу с хвостом без неактуальных строк и пересчитывает IDF."""
+        self._set_base(*_merge(*self._snapshot()))
+
+    def start_compaction(self) -> None:
+        """Запускает сжатие в фоновом потоке (если оно еще не идет)."""
+        if self._log is not None:
+            return
+        self._log = []
+        threading.Thread(
+            target=self._compact_in_background, args=(self._snapshot(),),
+            name="similar-compaction", daemon=True
+        ).start()
+
+    def _compact_in_background(self, snapshot: tuple) -> None:
+        try:
+            counts, task_ids = _merge(*snapshot)
+        except Exception as e:
+            print(f"❌ Ошибка сжатия индекса похожих задач: {str(e)}")
+            with self.lock:
+                self._log = None
+            return
+        with self.lock:
+            log, self._log = self._log, None
+            self._set_base(counts, task_ids)
+            # Изменения, пришедшие во время сжатия
+            for task_id, features in log:
+                if features is None:
+                    self.remove(task_id)
+                else:
+                    self.add(task_id, features)
+
+    def _tail_matrix(self) -> "sparse.csc_matrix":
+        if self._tail is None:
+            weighted, _ = _weigh(_term_counts(self.tail_rows), self.idf)
+            self._tail = weighted.tocsc()
+        return self._tail
+
+    def query(self, features: Sequence[int], limit: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Самые похожие задачи.
+
+        Returns:
+            List[Tuple[int, float]]: пары (ID задачи, косинусное сходство),
+                                     самые похожие сначала
+        """
+        import numpy as np
+
+        if not features or not self.positions:
+            return []
+        if self.needs_compaction():
+            self.start_compaction()
+
+        columns, counts = np.unique(np.asarray(features, dtype=np.int64), return_counts=True)
+        weights = (counts * self.idf[columns]).astype(np.float32)
+        weights /= np.linalg.norm(weights)
+        frequent = self.df[columns] > max(FREQUENT_MIN_DOCS, MAX_DF_SHARE * self.docs)
+        if frequent.all():
+            # Текст только из частых признаков - сравниваем по всем
+            frequent[:] = False
+        columns, weights = columns[~frequent], weights[~frequent]
+
+        scores = self.matrix[:, columns] @ weights
+        if self.tail_ids:
+            scores = np.concatenate([scores, self._tail_matrix()[:, columns] @ weights])
+
+        # Дальше работаем только с подходящими строками, а не со всей матрицей
+        base = len(self.ids)
+        candidates = np.flatnonzero(scores >= MIN_SCORE)
+        in_base = candidates < base
+        alive = np.ones(len(candidates), dtype=bool)
+        alive[in_base] = self.alive[candidates[in_base]]
+        if self.tail_ids:
+            alive[~in_base] = np.asarray(self.tail_alive)[candidates[~in_base] - base]
+        candidates = candidates[alive]
+        if exclude is not None and exclude in self.positions:
+            candidates = candidates[candidates != self.positions[exclude]]
+        if not len(candidates):
+            return []
+
+        count = min(limit, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], count - 1)[:count]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (int(self.ids[position] if position < base else self.tail_ids[position - base]), float(scores[position]))
+            for position in top
+        ]
+
+_indexes: "OrderedDict[Optional[int], SimilarIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+# Индексы строятся по одному: построение для пользователя с большим числом
+# задач занимает секунды, и параллельные запросы ждут его, а не строят заново
+_build_lock = threading.Lock()
+
+# Изменения задач пользователей, для которых сейчас строится индекс
+_pending: Dict[Optional[int], List[Tuple[int, Optional[List[int]]]]] = {}
+
+def build_index(db: Session) -> SimilarIndex:
+    """Строит индекс всех задач пользователя сессии одним проходом."""
+    Task = models.Task
+    task_ids: List[int] = []
+    rows: List[List[int]] = []
+    query = db.query(Task.id, Task.title, Task.description).yield_per(BUILD_BATCH_SIZE)
+    for task_id, title, description in query:
+        task_ids.append(task_id)
+        rows.append(text_features(title, description))
+    return SimilarIndex(task_ids, rows)
+
+def _apply(index: SimilarIndex, updates: Iterable[Tuple[int, Optional[List[int]]]]) -> None:
+    for task_id, features in updates:
+        if features is None:
+            index.remove(task_id)
+        else:
+            index.add(task_id, features)
+
+def _fresh_index(user_id: Optional[int]) -> Optional[SimilarIndex]:
+    index = _indexes.get(user_id)
+    if index is not None and index.expires_at > time.monotonic():
+        _indexes.move_to_end(user_id)
+        return index
+    return None
+
+def get_index(db: Session) -> SimilarIndex:
+    """Индекс пользователя сессии (строится при первом обращении)."""
+    user_id = db.info.get(USER_KEY)
+    with _lock:
+        index = _fresh_index(user_id)
+    if index is not None:
+        return index
+
+    with _build_lock:
+        with _lock:
+            index = _fresh_index(user_id)
+            if index is not None:
+                return index
+            # Изменения с этого момента копятся и применяются после построения:
+            # повторное применение уже прочитанного изменения ничего не меняет
+            _pending[user_id] = []
+        try:
+            index = build_index(db)
+        finally:
+            with _lock:
+                updates = _pending.pop(user_id)
+        with index.lock:
+            _apply(index, updates)
+        with _lock:
+            _indexes[user_id] = index
+            _indexes.move_to_end(user_id)
+            while len(_indexes) > MAX_INDEXED_USERS:
+                _indexes.popitem(last=False)
+        print(f"✅ Индекс похожих задач построен: {index.size} задач")
+        return index
+
+def find(db: Session, text: str, limit: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+    """
+    Задачи пользователя сессии, похожие на текст.
+
+    Args:
+        db: сессия пользователя
+        text: текст для поиска
+        limit: сколько задач вернуть
+        exclude: ID задачи, которую не нужно возвращать (сама задача)
+
+    Returns:
+        List[Tuple[int, float]]: пары (ID задачи, сходство), самые похожие сначала
+    """
+    features = text_features(text)
+    if not features:
+        return []
+    index = get_index(db)
+    with index.lock:
+        return index.query(features, limit, exclude)
+
+def suggest_tags(tasks: Iterable[Tuple[models.Task, float]], exclude: Iterable[str] = ()) -> List[str]:
+    """
+    Теги похожих задач, взвешенные их сходством.
+
+    Args:
+        tasks: пары (задача, сходство)
+        exclude: теги, которые предлагать не нужно (уже есть у задачи)
+
+    Returns:
+        List[str]: до SUGGESTED_TAGS тегов, самые подходящие сначала
+    """
+    excluded = set(exclude)
+    scores: Counter = Counter()
+    for task, score in tasks:
+        for tag in task.tags:
+            if tag.name not in excluded:
+                scores[tag.name] += score
+    return [name for name, _ in scores.most_common(SUGGESTED_TAGS)]
+
+def _text_changed(change) -> bool:
+    return (change.old["title"], change.old["description"]) != (change.new["title"], change.new["description"])
+
+@on_tasks_changed
+def _update_indexes(changes) -> None:
+    """Добавляет новые версии текста задач в индексы и убирает удаленные задачи."""
+    updates: Dict[Optional[int], List[Tuple[int, Optional[List[int]]]]] = {}
+    for change in changes:
+        new_user = change.new["user_id"] if change.new else None
+        if change.old is not None and (change.new is None or change.old["user_id"] != new_user):
+            updates.setdefault(change.old["user_id"], []).append((change.task_id, None))
+        if change.new is not None and (change.old is None or change.old["user_id"] != new_user or _text_changed(change)):
+            features = text_features(change.new["title"], change.new["description"])
+            updates.setdefault(new_user, []).append((change.task_id, features))
+
+    with _lock:
+        targets = []
+        for user_id, user_updates in updates.items():
+            if user_id in _pending:
+                _pending[user_id].extend(user_updates)
+            index = _indexes.get(user_id)
+            if index is not None:
+                targets.append((index, user_updates))
+    for index, user_updates in targets:
+        with index.lock:
+            _apply(index, user_updates)
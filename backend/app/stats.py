@@ -0,0 +1,234 @@
+"""
+Модуль stats.py поддерживает сводную статистику задач в таблице task_stats.
+
+Вместо COUNT(*) по всей таблице при каждой загрузке страницы счетчики
+обновляются при каждой записи: подписчик on_tasks_flushed (app/events.py)
+вычисляет изменения счетчиков по старым и новым значениям задачи и
+применяет их в той же транзакции. Поэтому GET /tasks/stats читает
+несколько строк task_stats независимо от числа задач.
+
+Счетчики ведутся отдельно для каждого пользователя: название счетчика
+начинается с ключа пользователя ("5:total", для задач без владельца "-:total").
+
+Сверка и перестроение счетчиков с нуля:
+    python -m app.stats            # проверить расхождения
+    python -m app.stats --rebuild  # пересчитать счетчики по таблице tasks
+Команда работает с основной базой данных; в режиме шардирования
+ее нужно запускать для каждого шарда (APP_DATABASE_URL=<URL шарда>).
+"""
+
+import argparse
+import sys
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+from app.events import on_tasks_flushed
+
+TOTAL = "total"
+COMPLETED = "completed"
+OPEN_PRIORITY = "open:priority:"
+OPEN_DAY = "open:day:"
+
+def user_prefix(user_id: Optional[int]) -> str:
+    """Префикс названий счетчиков пользователя."""
+    return f"{'-' if user_id is None else user_id}:"
+
+def _contribution(values: Optional[Dict]) -> Counter:
+    """Вклад одной задачи в счетчики."""
+    counter = Counter()
+    if not values:
+        return counter
+    prefix = user_prefix(values["user_id"])
+    counter[prefix + TOTAL] += 1
+    if values["is_completed"]:
+        counter[prefix + COMPLETED] += 1
+    else:
+        counter[prefix + OPEN_PRIORITY + (values["priority"] or "medium")] += 1
+        if values["due_date"] is not None:
+            counter[prefix + OPEN_DAY + values["due_date"].strftime("%Y-%m-%d")] += 1
+    return counter
+
+def _add(connection: Connection, deltas: Dict[str, int]) -> None:
+    """Прибавляет изменения к счетчикам (создает недостающие строки)."""
+    table = models.TaskStat.__table__
+    dialect = connection.dialect.name
+
+    for name, delta in deltas.items():
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            statement = dialect_insert(table).values(name=name, value=delta)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.name],
+                set_={"value": table.c.value + statement.excluded.value}
+            )
+            connection.execute(statement)
+        else:
+            updated = connection.execute(
+                update(table).where(table.c.name == name).values(value=table.c.value + delta)
+            ).rowcount
+            if not updated:
+                connection.execute(insert(table).values(name=name, value=delta))
+
+    # Счетчики по дням, дошедшие до нуля, удаляем, чтобы таблица не росла
+    days = [name for name in deltas if OPEN_DAY in name]
+    if days:
+        connection.execute(delete(table).where(table.c.name.in_(days), table.c.value <= 0))
+
+@on_tasks_flushed
+def _apply_changes(connection: Connection, changes) -> None:
+    """Обновляет счетчики по изменениям задач в текущей транзакции."""
+    deltas = Counter()
+    for change in changes:
+        deltas.update(_contribution(change.new))
+        deltas.subtract(_contribution(change.old))
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        _add(connection, deltas)
+
+def get_counters(db: Session, user_id: Optional[int] = None, all_users: bool = False) -> Dict[str, int]:
+    """
+    Счетчики в виде словаря {название: значение}.
+
+    Args:
+        db: сессия базы данных
+        user_id: пользователь (названия возвращаются без префикса)
+        all_users: вернуть счетчики всех пользователей (с префиксами)
+    """
+    query = select(models.TaskStat.name, models.TaskStat.value)
+    if all_users:
+        return dict(db.execute(query).all())
+
+    # Диапазон по первичному ключу: все названия, начинающиеся с префикса
+    prefix = user_prefix(user_id)
+    upper = prefix[:-1] + ";"  # ';' следует за ':' в таблице символов
+    rows = db.execute(query.where(models.TaskStat.name >= prefix, models.TaskStat.name < upper))
+    return {name[len(prefix):]: value for name, value in rows}
+
+def get_stats(db: Session) -> dict:
+    """
+    Статистика задач пользователя сессии для GET /tasks/stats.
+
+    Returns:
+        dict: всего, выполнено, открыто, открытые по приоритетам и по дням срока
+    """
+    counters = get_counters(db, db.info.get("user_id"))
+    total = counters.get(TOTAL, 0)
+    completed = counters.get(COMPLETED, 0)
+    return {
+        "total": total,
+        "completed": completed,
+        "open": total - completed,
+        "open_by_priority": {
+            priority: counters.get(OPEN_PRIORITY + priority, 0)
+            for priority in ("high", "medium", "low")
+        },
+        "open_by_day": {
+            name[len(OPEN_DAY):]: value
+            for name, value in sorted(counters.items())
+            if name.startswith(OPEN_DAY) and value
+        }
+    }
+
+def compute_counters(db: Session) -> Dict[str, int]:
+    """Вычисляет счетчики всех пользователей с нуля запросами по таблице tasks."""
+    Task = models.Task
+    counters = Counter()
+
+    totals = db.query(
+        Task.user_id,
+        func.count(Task.id),
+        func.count(Task.id).filter(Task.is_completed == True)
+    ).group_by(Task.user_id)
+    for user_id, total, completed in totals:
+        counters[user_prefix(user_id) + TOTAL] = total
+        counters[user_prefix(user_id) + COMPLETED] = completed
+
+    open_tasks = db.query(Task).filter(Task.is_completed == False)
+    by_priority = open_tasks.with_entities(
+        Task.user_id, Task.priority, func.count()
+    ).group_by(Task.user_id, Task.priority)
+    for user_id, priority, count in by_priority:
+        counters[user_prefix(user_id) + OPEN_PRIORITY + priority] = count
+
+    day = func.date(Task.due_date)
+    by_day = open_tasks.filter(Task.due_date.isnot(None)).with_entities(
+        Task.user_id, day, func.count()
+    ).group_by(Task.user_id, day)
+    for user_id, day_value, count in by_day:
+        counters[user_prefix(user_id) + OPEN_DAY + str(day_value)] = count
+
+    return {name: value for name, value in counters.items() if value}
+
+def find_drift(db: Session) -> Dict[str, tuple]:
+    """
+    Сравнивает сохраненные счетчики с вычисленными с нуля.
+
+    Returns:
+        dict: {название: (сохранено, фактически)} для расходящихся счетчиков
+    """
+    stored = {name: value for name, value in get_counters(db, all_users=True).items() if value}
+    actual = compute_counters(db)
+    drift = {}
+    for name in set(stored) | set(actual):
+        if stored.get(name, 0) != actual.get(name, 0):
+            drift[name] = (stored.get(name, 0), actual.get(name, 0))
+    return drift
+
+def rebuild(db: Session) -> Dict[str, int]:
+    """Перестраивает task_stats с нуля и сохраняет изменения."""
+    counters = compute_counters(db)
+    db.execute(delete(models.TaskStat))
+    if counters:
+        db.execute(insert(models.TaskStat), [
+            {"name": name, "value": value} for name, value in counters.items()
+        ])
+    db.commit()
+    return counters
+
+def rebuild_if_empty(db: Session) -> None:
+    """
+    Заполняет task_stats для базы, созданной до появления счетчиков,
+    и пересчитывает счетчики, записанные без префикса пользователя.
+    """
+    empty = db.query(models.TaskStat).first() is None
+    legacy = db.get(models.TaskStat, TOTAL) is not None
+    if legacy or (empty and db.query(models.Task).first() is not None):
+        rebuild(db)
+        print("Статистика задач пересчитана")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Сверка и перестроение статистики задач")
+    parser.add_argument("--rebuild", action="store_true", help="пересчитать счетчики с нуля")
+    args = parser.parse_args(argv)
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        drift = find_drift(db)
+        if not drift:
+            print("✅ Расхождений нет")
+            return 0
+
+        print(f"⚠️ Расхождений: {len(drift)}")
+        for name, (stored, actual) in sorted(drift.items()):
+            print(f"   {name}: сохранено {stored}, фактически {actual}")
+
+        if args.rebuild:
+            rebuild(db)
+            print("✅ Статистика пересчитана")
+            return 0
+        return 1
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+"""
+Модуль suggest.py подсказывает названия задач и теги при вводе
+(GET /tasks/suggest?prefix=...).
+
+Запрос LIKE 'x%' на каждое нажатие клавиши читал бы таблицу задач, поэтому
+подсказки строятся по индексу в памяти:
+- ключ - нормализованное название (app/duplicates.normalize), одинаковые
+  названия задач объединяются; ключи лежат в отсортированном списке, и
+  все ключи с префиксом - один диапазон, который находит bisect;
+- оценка ключа учитывает частоту и давность: count * 2^(t / HALF_LIFE),
+  где t - время последнего использования. Все оценки "стареют" одинаково,
+  поэтому их не нужно пересчитывать со временем: название, которое
+  использовали HALF_LIFE_DAYS назад, весит вдвое меньше нового;
+- узкий диапазон (до CACHE_MIN_RANGE ключей) просматривается при запросе,
+  а для коротких префиксов с широким диапазоном хранится готовый список
+  лучших CACHED_TOP ключей (узлы префиксного дерева с top-k). Списки
+  вычисляются при построении индекса снизу вверх и обновляются на месте
+  при изменении оценки ключа, а если ключ из списка потерял оценку -
+  список вычисляется заново при следующем запросе.
+
+Индекс строится для пользователя при первом запросе и поддерживается
+после commit (app/events.py), как индекс похожих задач (app/similar.py):
+названия - по изменениям задач, теги (число задач с тегом) - по
+изменениям счетчиков тегов (новые теги задач, переименование и удаление
+тегов). Записи других процессов учитываются при перестроении индекса
+через INDEX_TTL_SECONDS.
+
+Задержка подсказки: python -m benchmarks.bench_suggest
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.duplicates import normalize
+from app.events import on_tags_changed, on_tasks_changed
+from app.partitioning import USER_KEY
+
+# Период, за который вес использования названия падает вдвое
+HALF_LIFE_DAYS = 30
+_EPOCH = datetime(2024, 1, 1)
+
+# Диапазоны шире этого не просматриваются при запросе: для их префиксов
+# хранятся списки лучших ключей
+CACHE_MIN_RANGE = 1000
+
+# Сколько лучших ключей хранить для префикса (не меньше MAX_SUGGESTIONS)
+CACHED_TOP = 30
+
+# Максимальное число подсказок в ответе
+MAX_SUGGESTIONS = 20
+
+# Срок жизни индекса пользователя (записи в других процессах)
+INDEX_TTL_SECONDS = 600
+
+# Для скольких пользователей держать индексы (давно не вводившие вытесняются)
+MAX_INDEXED_USERS = 100
+
+# Сколько строк читать из базы за раз при построении индекса
+BUILD_BATCH_SIZE = 10000
+
+def recency_weight(moment: datetime) -> float:
+    """Вес одного использования в момент moment (растет вдвое за HALF_LIFE_DAYS)."""
+    return 2.0 ** ((moment - _EPOCH).total_seconds() / (HALF_LIFE_DAYS * 86400))
+
+class PrefixIndex:
+    """
+    Ключи с оценками и поиск лучших ключей по префиксу.
+
+    Запись ключа: [оценка, число использований, вес последнего использования,
+    исходный текст]. Методы вызываются под блокировкой владельца.
+    """
+
+    def __init__(self, entries: Dict[str, list]):
+        self.entries = entries
+        self.keys: List[str] = sorted(entries)
+        # Лучшие ключи широких префиксов: {префикс: [(оценка, ключ), ...]}
+        self._top: Dict[str, List[Tuple[float, str]]] = {}
+        if len(self.keys) > CACHE_MIN_RANGE:
+            self._fill("", 0, len(self.keys))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + "\uffff")
+
+    def _best(self, low: int, high: int, limit: int) -> List[Tuple[float, str]]:
+        entries = self.entries
+        return heapq.nlargest(limit, ((entries[key][0], key) for key in self.keys[low:high]))
+
+    def _fill(self, prefix: str, low: int, high: int) -> List[Tuple[float, str]]:
+        """
+        Вычисляет список лучших ключей широкого префикса из списков его
+        продолжений на один символ: каждый ключ просматривается один раз,
+        на уровне последнего широкого префикса.
+        """
+        parts = []
+        position = low
+        if self.keys[position] == prefix:
+            parts.append(self._best(position, position + 1, 1))
+            position += 1
+        while position < high:
+            child = self.keys[position][:len(prefix) + 1]
+            end = bisect_left(self.keys, child + "\uffff", position, high)
+            if end - position > CACHE_MIN_RANGE:
+                parts.append(self._top.get(child) or self._fill(child, position, end))
+            else:
+                parts.append(self._best(position, end, CACHED_TOP))
+            position = end
+        best = self._top[prefix] = heapq.nlargest(CACHED_TOP, chain.from_iterable(parts))
+        return best
+
+    def query(self, prefix: str, limit: int) -> List[list]:
+        """Записи лучших по оценке ключей, начинающихся с prefix."""
+        low, high = self._range(prefix)
+        if high - low <= CACHE_MIN_RANGE:
+            best = self._best(low, high, limit)
+        else:
+            best = self._top.get(prefix)
+            if best is None:
+                best = self._fill(prefix, low, high)
+            best = best[:limit]
+        return [self.entries[key] for _, key in best]
+
+    def add(self, key: str, text: str, weight: float, count: int = 1) -> None:
+        """Использование ключа: число использований растет, вес - по последнему."""
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = [0.0, 0, 0.0, text]
+            insort(self.keys, key)
+        entry[1] += count
+        entry[2] = max(entry[2], weight)
+        entry[3] = text
+        old_score, entry[0] = entry[0], entry[1] * entry[2]
+        self._rescore(key, old_score, entry[0])
+
+    def remove(self, key: str, count: int = 1) -> None:
+        """На count использований ключа меньше (ключ удаляется, когда их не осталось)."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry[1] -= count
+        old_score = entry[0]
+        if entry[1] <= 0:
+            del self.entries[key]
+            position = bisect_left(self.keys, key)
+            del self.keys[position]
+            self._rescore(key, old_score, None)
+        else:
+            entry[0] = entry[1] * entry[2]
+            self._rescore(key, old_score, entry[0])
+
+    def _rescore(self, key: str, old_score: float, score: Optional[float]) -> None:
+        """Обновляет списки лучших ключей префиксов key (score None - ключ удален)."""
+        for length in range(len(key) + 1):
+            prefix = key[:length]
+            best = self._top.get(prefix)
+            if best is None:
+                continue
+            position = next((i for i, (_, other) in enumerate(best) if other == key), None)
+            if position is None:
+                if score is not None and (len(best) < CACHED_TOP or score > best[-1][0]):
+                    best.append((score, key))
+                    best.sort(reverse=True)
+                    del best[CACHED_TOP:]
+                continue
+            if score is None or (score < old_score and len(best) == CACHED_TOP and score < best[-1][0]):
+                # Ключ мог уступить место тем, кого нет в списке
+                del self._top[prefix]
+                continue
+            best[position] = (score, key)
+            best.sort(reverse=True)
+
+class SuggestIndex:
+    """Подсказки одного пользователя: названия задач и теги."""
+
+    def __init__(self, titles: PrefixIndex, tags: PrefixIndex):
+        self.lock = threading.Lock()
+        self.expires_at = time.monotonic() + INDEX_TTL_SECONDS
+        self.titles = titles
+        self.tags = tags
+
+    def query(self, prefix: str, limit: int) -> dict:
+        key = normalize(prefix)
+        if not key:
+            return {"titles": [], "tags": []}
+        # Префикс, который заканчивается пробелом, ищет следующее слово
+        if prefix[-1:].isspace():
+            key += " "
+        return {
+            "titles": [{"title": text, "count": count} for _, count, _, text in self.titles.query(key, limit)],
+            "tags": [{"name": text, "count": count} for _, count, _, text in self.tags.query(key, limit)]
+        }
+
+def build_index(db: Session) -> SuggestIndex:
+    """Строит подсказки пользователя сессии одним проходом по задачам."""
+    Task = models.Task
+    titles: Dict[str, list] = {}
+    query = db.query(Task.title, Task.created_at).yield_per(BUILD_BATCH_SIZE)
+    for title, created_at in query:
+        key = normalize(title or "")
+        if not key:
+            continue
+        weight = recency_weight(created_at)
+        entry = titles.get(key)
+        if entry is None:
+            titles[key] = [0.0, 1, weight, title]
+        else:
+            entry[1] += 1
+            if weight >= entry[2]:
+                entry[2], entry[3] = weight, title
+    for entry in titles.values():
+        entry[0] = entry[1] * entry[2]
+
+    tags: Dict[str, list] = {}
+    rows = (
+        db.query(models.Tag.name, func.count(Task.id), func.max(Task.created_at))
+        .join(models.task_tags, models.task_tags.c.tag_id == models.Tag.id)
+        .join(Task, Task.id == models.task_tags.c.task_id)
+        .group_by(models.Tag.id, models.Tag.name)
+    )
+    for name, count, last_used in rows:
+        weight = recency_weight(last_used)
+        tags[normalize(name) or name] = [count * weight, count, weight, name]
+    return SuggestIndex(PrefixIndex(titles), PrefixIndex(tags))
+
+_indexes: "OrderedDict[Optional[int], SuggestIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+# Индексы строятся по одному: параллельные запросы ждут построения, а не строят заново
+_build_lock = threading.Lock()
+
+# Изменения названий задач и тегов пользователей, для которых сейчас строится индекс
+_pending: Dict[Optional[int], List[Tuple[Optional[str], Optional[str]]]] = {}
+_pending_tags: Dict[Optional[int], List[Tuple[str, int]]] = {}
+
+def _apply(index: SuggestIndex, updates: Iterable[Tuple[Optional[str], Optional[str]]], weight: float) -> None:
+    """Применяет пары (старое название, новое название); None - названия нет."""
+    for old_title, new_title in updates:
+        if old_title is not None:
+            key = normalize(old_title)
+            if key:
+                index.titles.remove(key)
+        if new_title is not None:
+            key = normalize(new_title)
+            if key:
+                index.titles.add(key, new_title, weight)
+
+def _apply_tags(index: SuggestIndex, updates: Iterable[Tuple[str, int]], weight: float) -> None:
+    """Применяет пары (название тега, изменение числа задач с тегом)."""
+    for name, delta in updates:
+        key = normalize(name) or name
+        if delta > 0:
+            index.tags.add(key, name, weight, delta)
+        elif delta < 0:
+            index.tags.remove(key, -delta)
+
+def _fresh_index(user_id: Optional[int]) -> Optional[SuggestIndex]:
+    index = _indexes.get(user_id)
+    if index is not None and index.expires_at > time.monotonic():
+        _indexes.move_to_end(user_id)
+        return index
+    return None
+
+def get_index(db: Session) -> SuggestIndex:
+    """Индекс пользователя сессии (строится при первом обращении)."""
+    user_id = db.info.get(USER_KEY)
+    with _lock:
+        index = _fresh_index(user_id)
+    if index is not None:
+        return index
+
+    with _build_lock:
+        with _lock:
+            index = _fresh_index(user_id)
+            if index is not None:
+                return index
+            _pending[user_id] = []
+            _pending_tags[user_id] = []
+        try:
+            index = build_index(db)
+        finally:
+            with _lock:
+                updates = _pending.pop(user_id)
+                tag_updates = _pending_tags.pop(user_id)
+        # Изменения во время построения могли попасть в прочитанные строки:
+        # новое название добавляется, только если его еще нет в индексе.
+        # Счетчики могут ошибиться на единицу до перестроения индекса
+        with index.lock:
+            weight = recency_weight(datetime.now())
+            for old_title, new_title in updates:
+                key = normalize(new_title or "")
+                if key and key not in index.titles.entries:
+                    _apply(index, [(old_title, new_title)], weight)
+                elif old_title is not None and new_title is None:
+                    _apply(index, [(old_title, None)], weight)
+            for name, delta in tag_updates:
+                if delta < 0 or (normalize(name) or name) not in index.tags.entries:
+                    _apply_tags(index, [(name, delta)], weight)
+        with _lock:
+            _indexes[user_id] = index
+            _indexes.move_to_end(user_id)
+            while len(_indexes) > MAX_INDEXED_USERS:
+                _indexes.popitem(last=False)
+        print(f"✅ Индекс подсказок построен: {len(index.titles)} названий, {len(index.tags)} тегов")
+        return index
+
+def suggest(db: Session, prefix: str, limit: int) -> dict:
+    """
+    Подсказки для начала названия.
+
+    Args:
+        db: сессия пользователя
+        prefix: введенное начало названия задачи или тега
+        limit: сколько названий и тегов вернуть
+
+    Returns:
+        dict: {"titles": [{"title", "count"}], "tags": [{"name", "count"}]},
+              лучшие по частоте и давности сначала
+    """
+    index = get_index(db)
+    with index.lock:
+        return index.query(prefix, limit)
+
+@on_tasks_changed
+def _update_indexes(changes) -> None:
+    """Учитывает новые, переименованные и удаленные задачи в индексах подсказок."""
+    updates: Dict[Optional[int], List[Tuple[Optional[str], Optional[str]]]] = {}
+    for change in changes:
+        old_user = change.old["user_id"] if change.old else None
+        new_user = change.new["user_id"] if change.new else None
+        if change.old is not None and change.new is not None and old_user == new_user:
+            if change.old["title"] != change.new["title"]:
+                updates.setdefault(new_user, []).append((change.old["title"], change.new["title"]))
+            continue
+        if change.old is not None:
+            updates.setdefault(old_user, []).append((change.old["title"], None))
+        if change.new is not None:
+            updates.setdefault(new_user, []).append((None, change.new["title"]))
+
+    weight = recency_weight(datetime.now())
+    with _lock:
+        targets = []
+        for user_id, user_updates in updates.items():
+            if user_id in _pending:
+                _pending[user_id].extend(user_updates)
+            index = _indexes.get(user_id)
+            if index is not None:
+                targets.append((index, user_updates))
+    for index, user_updates in targets:
+        with index.lock:
+            _apply(index, user_updates, weight)
+
+@on_tags_changed
+def _update_tag_indexes(changes) -> None:
+    """Учитывает новые теги задач, переименованные и удаленные теги в индексах подсказок."""
+    updates: Dict[Optional[int], List[Tuple[str, int]]] = {}
+    for change in changes:
+        if change.delta:
+            updates.setdefault(change.user_id, []).append((change.name, change.delta))
+
+    weight = recency_weight(datetime.now())
+    with _lock:
+        targets = []
+        for user_id, user_updates in updates.items():
+            if user_id in _pending_tags:
+                _pending_tags[user_id].extend(user_updates)
+            index = _indexes.get(user_id)
+            if index is not None:
+                targets.append((index, user_updates))
+    for index, user_updates in targets:
+        with index.lock:
+            _apply_tags(index, user_updates, weight)
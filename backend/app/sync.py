@@ -0,0 +1,226 @@
+"""
+Модуль sync.py реализует дельта-синхронизацию задач (GET /tasks/changes).
+
+Раньше клиент после каждого изменения заново скачивал GET /tasks?limit=1000.
+Теперь у каждой задачи есть change_seq - номер ее последнего изменения из
+возрастающей последовательности, а удаления оставляют отметки в
+task_tombstones. Клиент хранит курсор (последний полученный номер) и
+запрашивает только то, что изменилось после него.
+
+Номера выдаются счетчиком в таблице sync_state, который увеличивается в той
+же транзакции, что и изменение задачи (подписчик on_tasks_flushed). Строка
+счетчика заблокирована до commit, поэтому номера фиксируются в порядке
+commit: изменение с меньшим номером никогда не становится видимым позже
+изменения с большим, и клиент не пропускает записи.
+
+Отметки об удалениях старше APP_SYNC_TOMBSTONE_TTL_DAYS удаляются
+(compact_tombstones). Наибольший удаленный номер сохраняется как
+tombstone_floor: клиент с курсором меньше него мог пропустить удаление
+и получает ответ full_resync - нужно заново скачать список задач.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import get_settings
+from app.events import on_tasks_flushed
+
+CHANGE_SEQ = "change_seq"
+TOMBSTONE_FLOOR = "tombstone_floor"
+
+# Сколько отметок удалять за одну транзакцию при сжатии
+COMPACT_BATCH_SIZE = 1000
+
+def _read_state(connection: Connection) -> Dict[str, int]:
+    table = models.SyncState.__table__
+    return dict(connection.execute(select(table.c.name, table.c.value)).all())
+
+def _set_state(connection: Connection, name: str, value: int) -> None:
+    table = models.SyncState.__table__
+    updated = connection.execute(
+        update(table).where(table.c.name == name).values(value=value)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(table).values(name=name, value=value))
+
+def _allocate(connection: Connection, count: int) -> int:
+    """
+    Выделяет count последовательных номеров изменений.
+
+    Returns:
+        int: первый выделенный номер
+    """
+    table = models.SyncState.__table__
+    updated = connection.execute(
+        update(table).where(table.c.name == CHANGE_SEQ).values(value=table.c.value + count)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(table).values(name=CHANGE_SEQ, value=count))
+    last = connection.execute(select(table.c.value).where(table.c.name == CHANGE_SEQ)).scalar()
+    return last - count + 1
+
+def _stamp(connection: Connection, stamps: List[Tuple[int, int]]) -> None:
+    """Проставляет номера изменений: stamps - пары (ID задачи, номер)."""
+    if not stamps:
+        return
+    tasks = models.Task.__table__
+    # updated_at присваивается самому себе, иначе сработал бы onupdate колонки
+    connection.execute(
+        update(tasks).where(tasks.c.id == bindparam("task_id")).values(
+            change_seq=bindparam("seq"), updated_at=tasks.c.updated_at
+        ),
+        [{"task_id": task_id, "seq": seq} for task_id, seq in stamps]
+    )
+
+@on_tasks_flushed
+def _record_changes(connection: Connection, changes) -> None:
+    """Нумерует изменения задач и записывает отметки об удалениях."""
+    seq = _allocate(connection, len(changes))
+    changed = []
+    tombstones = []
+    for offset, change in enumerate(changes):
+        if change.action == "deleted":
+            tombstones.append({
+                "task_id": change.task_id,
+                "user_id": change.old["user_id"],
+                "change_seq": seq + offset,
+                "deleted_at": datetime.now()
+            })
+        else:
+            changed.append((change.task_id, seq + offset))
+
+    _stamp(connection, changed)
+    if tombstones:
+        connection.execute(insert(models.TaskTombstone.__table__), tombstones)
+
+def touch_tasks(db: Session, task_ids: Iterable[int]) -> None:
+    """
+    Отмечает задачи измененными без изменения их полей.
+
+    Нужно, когда меняется то, что входит в ответ по задаче, но хранится
+    в другой таблице (например, название тега при переименовании).
+    """
+    task_ids = list(task_ids)
+    if task_ids:
+        connection = db.connection()
+        seq = _allocate(connection, len(task_ids))
+        _stamp(connection, [(task_id, seq + offset) for offset, task_id in enumerate(task_ids)])
+
+def backfill(db: Session) -> None:
+    """Нумерует задачи, созданные до появления синхронизации."""
+    Task = models.Task
+    if db.query(Task.id).filter(Task.change_seq.is_(None)).first() is None:
+        return
+    connection = db.connection()
+    current = _read_state(connection).get(CHANGE_SEQ, 0)
+    # updated_at присваивается самому себе, иначе сработал бы onupdate и время
+    # изменения всех старых задач стало бы временем обновления схемы
+    connection.execute(
+        update(Task.__table__)
+        .where(Task.change_seq.is_(None))
+        .values(change_seq=Task.id + current, updated_at=Task.updated_at)
+    )
+    last = connection.execute(select(func.max(Task.change_seq))).scalar() or 0
+    _set_state(connection, CHANGE_SEQ, max(current, last))
+    db.commit()
+    print("Номера изменений задач проставлены")
+
+class Changes(NamedTuple):
+    """
+    Результат get_changes.
+
+    Attributes:
+        tasks: созданные и измененные задачи
+        deleted: ID удаленных задач
+        cursor: курсор для следующего запроса
+        has_more: есть ли еще изменения после cursor
+        full_resync: курсор слишком старый - нужна полная синхронизация
+    """
+    tasks: List[models.Task]
+    deleted: List[int]
+    cursor: int
+    has_more: bool
+    full_resync: bool
+
+def get_changes(db: Session, since: int, limit: int) -> Changes:
+    """
+    Изменения задач пользователя сессии после курсора since.
+
+    Задачи и отметки об удалении читаются по индексам (user_id, change_seq)
+    и сливаются по номеру изменения. Верхняя граница - значение счетчика на
+    момент запроса: все изменения до нее уже зафиксированы.
+
+    Args:
+        db: сессия базы данных
+        since: курсор из предыдущего ответа (0 - с самого начала)
+        limit: максимальное число изменений в ответе
+
+    Returns:
+        Changes: изменения, новый курсор и признаки has_more / full_resync
+    """
+    state = _read_state(db.connection())
+    current = state.get(CHANGE_SEQ, 0)
+    if since < state.get(TOMBSTONE_FLOOR, 0):
+        return Changes([], [], current, False, True)
+
+    Task = models.Task
+    Tombstone = models.TaskTombstone
+    tasks = db.query(Task).filter(
+        Task.change_seq > since, Task.change_seq <= current
+    ).order_by(Task.change_seq).limit(limit + 1).all()
+    tombstones = db.query(Tombstone).filter(
+        Tombstone.change_seq > since, Tombstone.change_seq <= current
+    ).order_by(Tombstone.change_seq).limit(limit + 1).all()
+
+    merged: List[Union[models.Task, models.TaskTombstone]] = list(islice(
+        heapq.merge(tasks, tombstones, key=lambda row: row.change_seq), limit + 1
+    ))
+    has_more = len(merged) > limit
+    page = merged[:limit]
+    cursor = page[-1].change_seq if has_more else current
+
+    return Changes(
+        tasks=[row for row in page if isinstance(row, models.Task)],
+        deleted=[row.task_id for row in page if isinstance(row, models.TaskTombstone)],
+        cursor=cursor,
+        has_more=has_more,
+        full_resync=False
+    )
+
+def compact_tombstones(bind: Engine, now: Optional[datetime] = None) -> int:
+    """
+    Удаляет отметки об удалениях старше APP_SYNC_TOMBSTONE_TTL_DAYS порциями
+    и поднимает tombstone_floor.
+
+    Returns:
+        int: сколько отметок удалено
+    """
+    from app.database import SessionLocal
+
+    cutoff = (now or datetime.now()) - timedelta(days=get_settings().sync_tombstone_ttl_days)
+    Tombstone = models.TaskTombstone
+    removed = 0
+    while True:
+        db = SessionLocal(bind=bind)
+        try:
+            rows = db.query(Tombstone.id, Tombstone.change_seq).filter(
+                Tombstone.deleted_at < cutoff
+            ).order_by(Tombstone.deleted_at).limit(COMPACT_BATCH_SIZE).all()
+            if not rows:
+                return removed
+
+            connection = db.connection()
+            floor = max(seq for _, seq in rows)
+            connection.execute(delete(Tombstone.__table__).where(Tombstone.id.in_([row_id for row_id, _ in rows])))
+            _set_state(connection, TOMBSTONE_FLOOR, max(floor, _read_state(connection).get(TOMBSTONE_FLOOR, 0)))
+            db.commit()
+            removed += len(rows)
+        finally:
+            db.close()
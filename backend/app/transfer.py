@@ -0,0 +1,310 @@
+"""
+Модуль transfer.py отвечает за потоковый экспорт и импорт задач.
+
+Экспорт (GET /tasks/export?format=ndjson|csv): задачи читаются порциями
+по первичному ключу (WHERE id > последний ID ORDER BY id LIMIT N) и сразу
+отдаются клиенту как StreamingResponse. Прочитанная порция удаляется из
+сессии, поэтому память не зависит от числа задач. yield_per здесь не
+подходит: он несовместим с загрузкой тегов через selectin.
+
+Импорт (POST /tasks/import): тело запроса читается по частям, делится на
+строки без загрузки всего файла, каждая строка проверяется схемой
+TaskImport. Корректные строки сохраняются порциями по IMPORT_BATCH_SIZE
+в отдельных транзакциях: задачи и связи с тегами вставляются одним
+многострочным INSERT (ORM на каждую задачу в несколько раз медленнее),
+а подписчики app/events.py получают изменения через record_changes,
+поэтому счетчики task_stats, номера изменений для синхронизации и кэш
+календаря обновляются как при обычном создании. Ошибки возвращаются
+с номером строки файла.
+"""
+
+import codecs
+import csv
+import io
+import json
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.events import TRACKED_FIELDS, TaskChange, record_changes
+from app.partitioning import USER_KEY
+
+# Размер порции строк при чтении для экспорта
+EXPORT_BATCH_SIZE = 1000
+
+# Сколько задач сохранять в одной транзакции при импорте
+IMPORT_BATCH_SIZE = 1000
+
+# Сколько ошибок возвращать в ответе импорта (считаются все)
+MAX_REPORTED_ERRORS = 100
+
+# Колонки CSV (совпадают с полями task_to_dict)
+CSV_COLUMNS = (
+    "id", "title", "description", "is_completed", "created_at",
+    "updated_at", "due_date", "priority", "tags", "recurrence"
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# --- Экспорт ---
+
+def export_chunks(db: Session, fmt: str, to_dict: Callable[[models.Task], dict]) -> Iterator[bytes]:
+    """
+    Генератор частей файла экспорта: одна часть на порцию задач.
+
+    Args:
+        db: сессия базы данных (ограничена пользователем)
+        fmt: "ndjson" или "csv"
+        to_dict: функция преобразования задачи в словарь (task_to_dict)
+
+    Yields:
+        bytes: строки файла в UTF-8
+    """
+    Task = models.Task
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+
+    last_id = 0
+    while True:
+        tasks = db.query(Task).filter(Task.id > last_id).order_by(Task.id).limit(EXPORT_BATCH_SIZE).all()
+        for task in tasks:
+            values = to_dict(task)
+            if writer is not None:
+                values["tags"] = ",".join(values["tags"])
+                writer.writerow([_csv_value(values[column]) for column in CSV_COLUMNS])
+            else:
+                buffer.write(json.dumps(values, ensure_ascii=False))
+                buffer.write("\n")
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if len(tasks) < EXPORT_BATCH_SIZE:
+            return
+        last_id = tasks[-1].id
+        # Прочитанные задачи больше не нужны - освобождаем карту идентичности
+        db.expunge_all()
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+# --- Импорт: разбор потока ---
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Делит поток байтов на строки UTF-8, не собирая тело целиком."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        if "\n" not in pending:
+            continue
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Разбирает строки файла импорта.
+
+    Yields:
+        tuple: (номер строки, данные или None, ошибка или None)
+    """
+    line_number = 0
+    header = None
+    record_start = 0
+    record = ""
+
+    async for line in lines:
+        line_number += 1
+        if line_number == 1:
+            line = line.lstrip("\ufeff")
+
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Некорректный JSON: {e.msg}"
+                continue
+            if not isinstance(data, dict):
+                yield line_number, None, "Строка должна быть JSON объектом"
+                continue
+            yield line_number, data, None
+            continue
+
+        # CSV: значение в кавычках может занимать несколько строк файла
+        if not record:
+            record_start = line_number
+            if not line.strip():
+                continue
+        record = record + "\n" + line if record else line
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+
+        if header is None:
+            header = [name.strip() for name in values]
+            if "title" not in header:
+                yield record_start, None, "В заголовке CSV нет колонки title"
+                return
+            continue
+        if len(values) != len(header):
+            yield record_start, None, f"Ожидалось колонок: {len(header)}, получено: {len(values)}"
+            continue
+        yield record_start, dict(zip(header, values)), None
+
+    if record:
+        yield record_start, None, "Незакрытые кавычки в конце файла"
+
+# --- Импорт: сохранение ---
+
+def _task_values(row: schemas.TaskImport, user_id: Optional[int], now: datetime) -> dict:
+    """Значения колонок tasks для строки импорта."""
+    return {
+        "user_id": user_id,
+        "title": row.title,
+        "description": row.description.strip() if row.description else None,
+        "is_completed": row.is_completed,
+        "completed_at": now if row.is_completed else None,
+        "due_date": row.due_date,
+        "priority": row.priority,
+        "recurrence": row.recurrence,
+        "created_at": row.created_at or now,
+        "updated_at": now
+    }
+
+def insert_batch(db: Session, rows: List[schemas.TaskImport]) -> None:
+    """
+    Сохраняет порцию задач одной транзакцией.
+    Теги всей порции находятся и создаются одним запросом.
+    """
+    names_per_row = [crud.normalize_tag_names(row.tags) for row in rows]
+    all_names = {name for names in names_per_row for name in names}
+
+    tags = crud.get_or_create_tags(db, all_names)
+
+    now = datetime.now()
+    values = [_task_values(row, db.info.get(USER_KEY), now) for row in rows]
+    tasks = models.Task.__table__
+    connection = db.connection()
+    task_ids = connection.execute(
+        insert(tasks).returning(tasks.c.id, sort_by_parameter_order=True), values
+    ).scalars().all()
+
+    links = [
+        {"task_id": task_id, "tag_id": tags[name].id}
+        for task_id, names in zip(task_ids, names_per_row)
+        for name in names
+    ]
+    if links:
+        connection.execute(insert(models.task_tags), links)
+
+    record_changes(db, [
+        TaskChange("created", task_id, None, {field: task[field] for field in TRACKED_FIELDS})
+        for task_id, task in zip(task_ids, values)
+    ])
+
+    usage = Counter(name for names in names_per_row for name in names)
+
+    by_delta: Dict[int, List[models.Tag]] = {}
+    for name, count in usage.items():
+        by_delta.setdefault(count, []).append(tags[name])
+    for count, delta_tags in by_delta.items():
+        crud._change_tag_counts(db, delta_tags, count)
+
+    db.commit()
+
+class ImportResult:
+    """Итог импорта: число сохраненных задач и ошибки по строкам."""
+
+    def __init__(self):
+        # Ошибки добавляются и при разборе, и при сохранении в пуле потоков
+        self._lock = threading.Lock()
+        self.imported = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors: List[dict] = []
+
+    def error(self, line: int, message: str) -> None:
+        with self._lock:
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "batches": self.batches,
+            # Ошибки разбора и проверки находятся на разных этапах - упорядочиваем по строкам
+            "errors": sorted(self.errors, key=lambda error: error["line"])
+        }
+
+def validate(data: dict) -> Tuple[Optional[schemas.TaskImport], Optional[str]]:
+    """Проверяет строку схемой TaskImport; возвращает (задача, ошибка)."""
+    try:
+        return schemas.TaskImport(**data), None
+    except ValidationError as e:
+        first = e.errors()[0]
+        field = ".".join(str(part) for part in first["loc"])
+        return None, f"{field}: {first['msg']}" if field else first["msg"]
+    except TypeError as e:
+        return None, str(e)
+
+def save_batch(db: Session, records: List[Tuple[int, dict]], result: ImportResult) -> None:
+    """
+    Проверяет и сохраняет порцию строк (выполняется в пуле потоков).
+    Если транзакция не прошла, строки сохраняются по одной, чтобы
+    ошибка была привязана к своей строке.
+
+    Args:
+        db: сессия базы данных
+        records: пары (номер строки, данные строки)
+        result: итог импорта, который дополняется
+    """
+    batch = []
+    for line, data in records:
+        row, error = validate(data)
+        if error:
+            result.error(line, error)
+        else:
+            batch.append((line, row))
+    if not batch:
+        return
+    result.batches += 1
+    try:
+        insert_batch(db, [row for _, row in batch])
+        result.imported += len(batch)
+        return
+    except Exception:
+        db.rollback()
+
+    for line, row in batch:
+        try:
+            insert_batch(db, [row])
+            result.imported += 1
+        except Exception as e:
+            db.rollback()
+            result.error(line, f"Ошибка сохранения: {e.__class__.__name__}")
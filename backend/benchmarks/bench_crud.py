@@ -0,0 +1,117 @@
+"""
+Бенчмарк CRUD эндпоинтов на разных базах данных.
+
+Запуск (из папки backend):
+    python -m benchmarks.bench_crud
+    BENCH_POSTGRES_URL=postgresql://postgres@localhost/taskplanner_bench python -m benchmarks.bench_crud
+
+Бенчмарк всегда запускается на временном файле SQLite и, если задана
+переменная BENCH_POSTGRES_URL, на локальном PostgreSQL. Запросы идут через
+эндпоинты app.main (TestClient), а сессия базы данных подменяется через
+dependency_overrides, поэтому измеряется тот же код, что и в продакшене.
+
+Фазы:
+- create: последовательное создание задач (POST /tasks);
+- list: чтение страниц (GET /tasks);
+- update / complete / delete: PUT, PATCH .../complete, DELETE;
+- parallel create: создание задач из нескольких потоков одновременно
+  (показывает, упирается ли запись в единственного писателя SQLite).
+
+Сравнение с групповым commit (app/group_commit.py):
+    APP_GROUP_COMMIT=true python -m benchmarks.bench_crud
+в этом режиме после фаз печатаются размер порций и время ожидания в очереди.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, make_engine
+from app import group_commit
+from app.config import get_settings
+from app.main import app
+from app.partitioning import USER_KEY, get_user_db
+
+TASKS = int(os.getenv("BENCH_TASKS", "500"))
+THREADS = int(os.getenv("BENCH_THREADS", "8"))
+
+def run_phase(name: str, count: int, func) -> None:
+    """Выполняет func(i) count раз и печатает ops/sec."""
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<16} {count:>6} оп. {count / elapsed:>10.1f} оп/с")
+
+def run_parallel_phase(name: str, count: int, func) -> None:
+    """Выполняет func(i) count раз в THREADS потоках и печатает ops/sec."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(func, range(count)))
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<16} {count:>6} оп. {count / elapsed:>10.1f} оп/с ({THREADS} потоков)")
+
+def bench(database_url: str) -> None:
+    """Запускает все фазы на одной базе данных."""
+    engine = make_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_user_db():
+        db = Session()
+        db.info[USER_KEY] = None
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_user_db] = override_get_user_db
+    print(f"\n📦 {engine.dialect.name}: {engine.url.render_as_string(hide_password=True)}")
+
+    try:
+        with TestClient(app) as client:
+            ids = []
+
+            def create(i):
+                response = client.post("/tasks", json={"title": f"Задача {i}", "description": "Описание"})
+                ids.append(response.json()["id"])
+
+            run_phase("create", TASKS, create)
+            run_phase("list", TASKS, lambda i: client.get("/tasks", params={"skip": i % 50, "limit": 50}))
+            run_phase("update", TASKS, lambda i: client.put(f"/tasks/{ids[i]}", json={"title": f"Задача {i}!"}))
+            run_phase("complete", TASKS, lambda i: client.patch(f"/tasks/{ids[i]}/complete"))
+            run_phase("delete", TASKS, lambda i: client.delete(f"/tasks/{ids[i]}"))
+            run_parallel_phase(
+                "parallel create", TASKS,
+                lambda i: client.post("/tasks", json={"title": f"Параллельная {i}"})
+            )
+            if get_settings().group_commit:
+                metrics = group_commit.get_metrics()
+                print(f"  групповой commit: порций {metrics['batches']}, "
+                      f"средний размер {metrics['batch_size']['avg']}, "
+                      f"ожидание p50 {metrics['queue_wait_ms']['p50']} мс, "
+                      f"p99 {metrics['queue_wait_ms']['p99']} мс")
+    finally:
+        app.dependency_overrides.pop(get_user_db, None)
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        bench(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+    postgres_url = os.getenv("BENCH_POSTGRES_URL")
+    if postgres_url:
+        bench(postgres_url)
+    else:
+        print("\nℹ️  BENCH_POSTGRES_URL не задан, PostgreSQL пропущен")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Бенчмарк поиска похожих задач (app/duplicates.py).
+
+Запуск (из папки backend):
+    python -m benchmarks.bench_duplicates
+    BENCH_TASKS=100000 BENCH_QUERIES=2000 python -m benchmarks.bench_duplicates
+
+Индекс строится в памяти (без базы данных) из BENCH_TASKS задач со
+случайными названиями из 3-5 слов словаря. Затем выполняется BENCH_QUERIES поисков:
+половина - измененные названия существующих задач (другое окончание,
+регистр, знаки препинания), половина - новые названия. Печатаются время
+вычисления сигнатуры, задержка поиска по индексу (p50/p99), доля найденных
+дубликатов и для сравнения - время полного перебора сигнатур.
+"""
+
+import os
+import random
+import sys
+import time
+
+from app import duplicates
+
+TASKS = int(os.getenv("BENCH_TASKS", "10000"))
+QUERIES = int(os.getenv("BENCH_QUERIES", "1000"))
+
+SYLLABLES = ["ка", "ло", "ми", "ре", "то", "на", "ску", "пра", "ви", "до", "ст", "ро",
+             "за", "ку", "пи", "ть", "ор", "ен", "ба", "ги", "мо", "ле", "шу", "ча"]
+
+def make_vocabulary(rng: random.Random, size: int):
+    """Слова из случайных слогов: названия задач почти не повторяют друг друга."""
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+def make_title(rng: random.Random, vocabulary) -> str:
+    return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(3, 5))).capitalize()
+
+def rephrase(rng: random.Random, title: str) -> str:
+    """Та же задача другими словами: регистр, окончание, знаки препинания."""
+    words = title.split()
+    position = rng.randrange(len(words))
+    words[position] = words[position][:-1] + "а" if len(words[position]) > 3 else words[position]
+    return " ".join(words).lower() + rng.choice(["!", "", ".", " !!"])
+
+def percentile(values, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+def main() -> int:
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng, 5000)
+    titles = [make_title(rng, vocabulary) for _ in range(TASKS)]
+
+    start = time.perf_counter()
+    signatures = [duplicates.task_signature(title, None) for title in titles]
+    signature_ms = (time.perf_counter() - start) / TASKS * 1000
+
+    index = duplicates.DuplicateIndex()
+    start = time.perf_counter()
+    for task_id, (title, signature) in enumerate(zip(titles, signatures), start=1):
+        index.add(task_id, title, signature)
+    build_seconds = time.perf_counter() - start
+
+    queries = []
+    for i in range(QUERIES):
+        if i % 2 == 0:
+            task_id = rng.randrange(TASKS) + 1
+            queries.append((task_id, rephrase(rng, titles[task_id - 1])))
+        else:
+            queries.append((None, make_title(rng, vocabulary)))
+
+    threshold = duplicates.get_settings().duplicate_threshold
+    latencies = []
+    found = 0
+    for expected, text in queries:
+        signature = duplicates.task_signature(text, None)
+        start = time.perf_counter()
+        matches = index.query(signature, threshold, duplicates.DUPLICATES_LIMIT)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if expected is not None and any(match["id"] == expected for match in matches):
+            found += 1
+
+    start = time.perf_counter()
+    for _, text in queries[:100]:
+        signature = duplicates.task_signature(text, None)
+        [duplicates.similarity(signature, other) for other in signatures]
+    scan_ms = (time.perf_counter() - start) / min(100, len(queries)) * 1000
+
+    print(f"🔎 Индекс из {TASKS} задач, {QUERIES} запросов, порог сходства {threshold}")
+    print(f"  сигнатура:          {signature_ms:.3f} мс на задачу")
+    print(f"  построение индекса: {build_seconds:.2f} с")
+    print(f"  поиск по индексу:   p50 {percentile(latencies, 0.5):.3f} мс, p99 {percentile(latencies, 0.99):.3f} мс")
+    print(f"  полный перебор:     {scan_ms:.1f} мс на запрос")
+    print(f"  найдено дубликатов: {found / max(1, (QUERIES + 1) // 2):.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
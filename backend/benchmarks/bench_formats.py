@@ -0,0 +1,102 @@
+"""
+Бенчмарк форматов ответа для страницы задач: JSON и MessagePack (app/columnar.py).
+
+Запуск (из папки backend):
+    python -m benchmarks.bench_formats
+    BENCH_PAGE=500 BENCH_REPEAT=200 python -m benchmarks.bench_formats
+
+Страница из BENCH_PAGE задач (по умолчанию 1000, как limit=1000 в GET /tasks)
+кодируется так же, как в эндпоинте:
+- json: task_to_dict + рендер JSONResponse FastAPI (текущий ответ);
+- msgpack rows: те же словари в MessagePack (без колоночной раскладки);
+- msgpack columnar: task_columns + MsgpackResponse (ответ с Accept: application/msgpack).
+
+Для каждого формата печатаются размер ответа, размер после gzip (если
+между сервером и клиентом включено сжатие) и время кодирования страницы,
+включая преобразование объектов задач.
+"""
+
+import gzip
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import msgpack
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import columnar, models
+from app.main import task_to_dict
+
+PAGE = int(os.getenv("BENCH_PAGE", "1000"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "100"))
+
+TAGS = ["работа", "дом", "учеба", "здоровье", "покупки", "проект", "встреча", "срочно"]
+PRIORITIES = ["high", "medium", "low"]
+
+def make_tasks(count: int):
+    """Задачи в памяти (без базы данных) с типичным заполнением полей."""
+    rng = random.Random(42)
+    tags = [models.Tag(id=i, name=name) for i, name in enumerate(TAGS, start=1)]
+    base = datetime(2026, 1, 1, 9, 0)
+    tasks = []
+    for i in range(count):
+        created = base + timedelta(minutes=rng.randint(0, 60 * 24 * 300), microseconds=rng.randint(0, 999999))
+        task = models.Task(
+            id=i + 1,
+            title=f"Задача номер {i}: подготовить отчет",
+            description="Собрать данные и отправить руководителю" if i % 3 == 0 else None,
+            is_completed=i % 4 == 0,
+            created_at=created,
+            updated_at=created + timedelta(hours=rng.randint(0, 48)),
+            due_date=created + timedelta(days=rng.randint(1, 30)) if i % 2 else None,
+            priority=rng.choice(PRIORITIES)
+        )
+        task.tags = rng.sample(tags, rng.randint(0, 2))
+        tasks.append(task)
+    return tasks
+
+def encode_json(tasks) -> bytes:
+    content = {"tasks": [task_to_dict(task) for task in tasks], "total": len(tasks)}
+    return JSONResponse(jsonable_encoder(content)).body
+
+def encode_msgpack_rows(tasks) -> bytes:
+    content = {"tasks": [task_to_dict(task) for task in tasks], "total": len(tasks)}
+    return msgpack.packb(content, use_bin_type=True)
+
+def encode_msgpack_columnar(tasks) -> bytes:
+    content = {"tasks": columnar.task_columns(tasks), "total": len(tasks)}
+    return columnar.response(content).body
+
+def measure(encode, tasks) -> float:
+    """Среднее время кодирования страницы в миллисекундах."""
+    encode(tasks)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        encode(tasks)
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+def main() -> int:
+    tasks = make_tasks(PAGE)
+    formats = [
+        ("json", encode_json),
+        ("msgpack rows", encode_msgpack_rows),
+        ("msgpack columnar", encode_msgpack_columnar),
+    ]
+
+    print(f"📦 Страница из {PAGE} задач, {REPEAT} повторов")
+    print(f"  {'формат':<18} {'байт':>9} {'gzip':>9} {'мс':>8}")
+    json_size = None
+    for name, encode in formats:
+        body = encode(tasks)
+        size = len(body)
+        compressed = len(gzip.compress(body))
+        elapsed = measure(encode, tasks)
+        json_size = json_size or size
+        print(f"  {name:<18} {size:>9} {compressed:>9} {elapsed:>8.2f}  ({size / json_size:.0%} от JSON)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
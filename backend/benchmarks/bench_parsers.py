@@ -0,0 +1,208 @@
+"""
+Точность и скорость парсеров текста задач на размеченном корпусе
+(benchmarks/parser_corpus.py).
+
+Запуск (из папки backend):
+    python -m benchmarks.bench_parsers
+    BENCH_PARSERS=manual BENCH_SHOW_ERRORS=5 python -m benchmarks.bench_parsers
+
+Все парсеры запускаются в одном процессе, без сети и с зафиксированной
+датой (parser_corpus.NOW): datetime в модулях парсеров подменяется на
+время замера. Для каждого парсера и каждого поля, которое он извлекает,
+печатаются precision и recall:
+
+- срок, повторение, приоритет: ответ парсера считается, если он есть
+  (для приоритета - отличается от medium), верный - если совпадает с
+  разметкой; precision = верные / данные ответы, recall = верные /
+  размеченные значения;
+- теги - по отдельным тегам всех фраз;
+- название - доля точных совпадений (без учета регистра);
+- число задач (только для /api/ai/process) - в каждой фразе корпуса одна
+  задача, поэтому ошибки здесь - лишние разбиения текста на задачи
+  (ai_client.split_clauses).
+
+Скорость - фраз в секунду (лучший из BENCH_REPEAT проходов по корпусу).
+BENCH_PARSERS - выбрать парсеры по части имени, BENCH_SHOW_ERRORS -
+напечатать примеры ошибок по каждому полю.
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import ai_client
+from app import recurrence
+from benchmarks import parser_corpus
+
+REPEAT = int(os.getenv("BENCH_REPEAT", "3"))
+SELECTED = os.getenv("BENCH_PARSERS", "")
+SHOW_ERRORS = int(os.getenv("BENCH_SHOW_ERRORS", "0"))
+
+FIELDS = ("title", "due_date", "priority", "tags", "recurrence", "tasks")
+
+class FrozenDatetime(datetime):
+    """datetime, у которого now() возвращает parser_corpus.NOW."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return parser_corpus.NOW
+
+# Модули, в которых парсеры берут текущее время
+FROZEN_MODULES = (ai_client, recurrence)
+
+class Parser(NamedTuple):
+    name: str
+    fields: Tuple[str, ...]
+    parse: Callable[[str], Dict]
+
+def _offline_client() -> ai_client.YandexGPTClient:
+    """Клиент в демо-режиме без чтения .env и без HTTP сессии."""
+    client = ai_client.YandexGPTClient.__new__(ai_client.YandexGPTClient)
+    client.is_demo = True
+    return client
+
+def _recurrence_value(found) -> Optional[str]:
+    """Повторение как строка "правило @ первый срок" для сравнения с разметкой."""
+    if not found:
+        return None
+    rule, first = found
+    return f"{rule} @ {first:%Y-%m-%d %H:%M:%S}"
+
+def _pipeline(client: ai_client.YandexGPTClient, text: str) -> Dict:
+    # Как extract_tasks_with_ai, но без кэша: каждая фраза разбирается заново
+    tasks = client._extract_tasks(text)
+    result = dict(tasks[0], tasks=len(tasks))
+    if result.get("recurrence"):
+        result["recurrence"] = _recurrence_value((result["recurrence"], datetime.strptime(result["due_date"], "%Y-%m-%d %H:%M:%S")))
+    return result
+
+def parsers() -> List[Parser]:
+    client = _offline_client()
+    return [
+        Parser(
+            "ai_client._manual_parse",
+            ("title", "due_date", "priority", "tags"),
+            client._manual_parse
+        ),
+        Parser(
+            "ai_client._parse_date_from_text",
+            ("due_date",),
+            lambda text: {"due_date": client._parse_date_from_text(text, text)}
+        ),
+        Parser(
+            "recurrence.parse_phrase",
+            ("recurrence",),
+            lambda text: {"recurrence": _recurrence_value(recurrence.parse_phrase(text))}
+        ),
+        Parser(
+            "ai_client (демо-режим, как /api/ai/process)",
+            FIELDS,
+            lambda text: _pipeline(client, text)
+        ),
+    ]
+
+def expected_value(item: dict, field: str):
+    if field == "tasks":
+        return 1
+    if field == "recurrence" and item["recurrence"]:
+        return f"{recurrence.format_rule(recurrence.parse_rule(item['recurrence'], parser_corpus.NOW))} @ {item['due_date']}"
+    return item[field]
+
+class Score:
+    """Счетчики одного поля: верные, данные и размеченные значения."""
+
+    def __init__(self):
+        self.correct = 0
+        self.predicted = 0
+        self.expected = 0
+        self.errors: List[Tuple[str, object, object]] = []
+
+    @property
+    def precision(self) -> float:
+        return self.correct / self.predicted if self.predicted else 0.0
+
+    @property
+    def recall(self) -> float:
+        return self.correct / self.expected if self.expected else 0.0
+
+    def add(self, text: str, field: str, got, expected) -> None:
+        if field == "tags":
+            got_tags, expected_tags = set(got or []), set(expected)
+            self.correct += len(got_tags & expected_tags)
+            self.predicted += len(got_tags)
+            self.expected += len(expected_tags)
+            ok = got_tags == expected_tags
+        elif field == "title":
+            ok = (got or "").strip().lower() == expected.lower()
+            self.correct += ok
+            self.predicted += 1
+            self.expected += 1
+        else:
+            given = got not in (None, "", "medium")
+            labelled = expected not in (None, "medium")
+            ok = got == expected
+            self.predicted += given
+            self.expected += labelled
+            self.correct += given and labelled and ok
+        if not ok and len(self.errors) < SHOW_ERRORS:
+            self.errors.append((text, got, expected))
+
+def safe_parse(parser: Parser, text: str) -> Tuple[Dict, Optional[Exception]]:
+    """Результат парсера; исключение считается отсутствием ответа."""
+    try:
+        return parser.parse(text) or {}, None
+    except Exception as e:
+        return {}, e
+
+def evaluate(parser: Parser, corpus: List[dict]) -> Tuple[Dict[str, Score], List[Tuple[str, Exception]]]:
+    """Счетчики по полям и фразы, на которых парсер упал с исключением."""
+    scores = {field: Score() for field in parser.fields}
+    failures = []
+    for item in corpus:
+        result, error = safe_parse(parser, item["text"])
+        if error is not None:
+            failures.append((item["text"], error))
+        for field in parser.fields:
+            scores[field].add(item["text"], field, result.get(field), expected_value(item, field))
+    return scores, failures
+
+def throughput(parser: Parser, texts: List[str]) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for text in texts:
+            safe_parse(parser, text)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+def main() -> int:
+    corpus = parser_corpus.load()
+    texts = [item["text"] for item in corpus]
+    originals = [module.datetime for module in FROZEN_MODULES]
+    for module in FROZEN_MODULES:
+        module.datetime = FrozenDatetime
+    try:
+        print(f"📝 Корпус: {len(corpus)} фраз, дата зафиксирована: {parser_corpus.NOW:%Y-%m-%d %H:%M} (среда)")
+        for parser in parsers():
+            if SELECTED and SELECTED not in parser.name:
+                continue
+            scores, failures = evaluate(parser, corpus)
+            speed = f"{throughput(parser, texts):,.0f}".replace(",", " ")
+            print(f"\n{parser.name}: {speed} фраз/с")
+            for field, score in scores.items():
+                print(f"  {field:<11} precision {score.precision:6.1%}  recall {score.recall:6.1%}")
+                for text, got, expected in score.errors:
+                    print(f"      {text!r}: {got!r}, ожидалось {expected!r}")
+            if failures:
+                print(f"  ❌ исключений: {len(failures)}")
+                for text, error in failures[:SHOW_ERRORS]:
+                    print(f"      {text!r}: {type(error).__name__}: {error}")
+    finally:
+        for module, original in zip(FROZEN_MODULES, originals):
+            module.datetime = original
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
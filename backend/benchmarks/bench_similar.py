@@ -0,0 +1,84 @@
+"""
+Бенчмарк поиска похожих задач по TF-IDF индексу (app/similar.py).
+
+Запуск (из папки backend):
+    python -m benchmarks.bench_similar
+    BENCH_TASKS=100000 python -m benchmarks.bench_similar
+
+Индекс строится в памяти (без базы данных) из BENCH_TASKS задач (по
+умолчанию 1 000 000) с названиями из словаря benchmarks.bench_duplicates.
+Печатаются время построения и размер матрицы, задержка поиска (p50/p99)
+до и после добавления BENCH_APPENDS задач в хвост индекса, время
+добавления одной задачи и время сжатия.
+"""
+
+import os
+import random
+import sys
+import time
+
+from app import similar
+from benchmarks.bench_duplicates import make_title, make_vocabulary, percentile, rephrase
+
+TASKS = int(os.getenv("BENCH_TASKS", "1000000"))
+QUERIES = int(os.getenv("BENCH_QUERIES", "500"))
+APPENDS = int(os.getenv("BENCH_APPENDS", "20000"))
+LIMIT = 10
+
+def measure(index: similar.SimilarIndex, queries) -> tuple:
+    latencies = []
+    for features in queries:
+        start = time.perf_counter()
+        index.query(features, LIMIT)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+def main() -> int:
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng, 20000)
+    titles = [make_title(rng, vocabulary) for _ in range(TASKS)]
+
+    start = time.perf_counter()
+    rows = [similar.text_features(title) for title in titles]
+    features_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index = similar.SimilarIndex(range(1, TASKS + 1), rows)
+    build_seconds = time.perf_counter() - start
+    matrix = index.matrix
+    size_mb = (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 1024 / 1024
+
+    print(f"🔎 Индекс из {TASKS} задач: признаки {features_seconds:.1f} с, матрица {build_seconds:.1f} с, "
+          f"{matrix.nnz} ненулевых значений, {size_mb:.0f} МБ")
+
+    queries = [similar.text_features(make_title(rng, vocabulary)) for _ in range(QUERIES)]
+    p50, p99 = measure(index, queries)
+    print(f"  поиск top-{LIMIT}:        p50 {p50:.2f} мс, p99 {p99:.2f} мс")
+
+    probes = rng.sample(range(TASKS), min(200, TASKS))
+    found = sum(
+        index.query(similar.text_features(rephrase(rng, titles[number])), 1)[0][0] == number + 1
+        for number in probes
+    )
+    print(f"  исходная задача первой: {found / len(probes):.0%} (для измененных названий)")
+
+    # Хвост не должен сжиматься во время замера
+    similar.COMPACT_MIN_ROWS = APPENDS + 1
+    start = time.perf_counter()
+    for number in range(APPENDS):
+        index.add(TASKS + number + 1, similar.text_features(make_title(rng, vocabulary)))
+    append_us = (time.perf_counter() - start) / max(1, APPENDS) * 1e6
+    for number in range(0, APPENDS, 2):
+        index.remove(number + 1)
+    p50, p99 = measure(index, queries)
+    print(f"  добавление задачи:      {append_us:.0f} мкс")
+    print(f"  поиск с хвостом {APPENDS}: p50 {p50:.2f} мс, p99 {p99:.2f} мс")
+
+    start = time.perf_counter()
+    index.compact()
+    print(f"  сжатие:                 {time.perf_counter() - start:.1f} с, задач {index.size}")
+    p50, p99 = measure(index, queries)
+    print(f"  поиск после сжатия:     p50 {p50:.2f} мс, p99 {p99:.2f} мс")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
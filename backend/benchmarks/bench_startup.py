@@ -0,0 +1,152 @@
+"""
+Бенчмарк времени импорта и холодного старта приложения.
+
+Запуск (из папки backend):
+    python -m benchmarks.bench_startup
+
+Что измеряется:
+1. python -X importtime -c "import app.main" - время импорта по модулям:
+   полное (вместе со всеми сторонними библиотеками, которые тянут модули
+   проекта), собственное время модулей проекта (app.*, ai_client) и самые
+   тяжелые пакеты - чтобы было видно, что именно загружается при импорте.
+2. Холодный старт - от запуска нового интерпретатора до ответа на первый
+   запрос (импорт + startup события + GET /).
+
+Оба замера работают с временной базой (APP_DATABASE_URL), которую бенчмарк
+создает сам, а не с ./database.db в папке backend.
+
+Цели:
+- импорт app.main целиком быстрее TOTAL_IMPORT_TARGET_MS;
+- собственные модули проекта импортируются быстрее IMPORT_TARGET_MS;
+- при импорте не загружаются LAZY_MODULES (AI клиент, numpy/scipy
+  индекса похожих задач загружаются при первом использовании);
+- холодный старт быстрее COLD_START_TARGET_MS.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TOTAL_IMPORT_TARGET_MS = 1000
+IMPORT_TARGET_MS = 50
+COLD_START_TARGET_MS = 1500
+RUNS = 5
+# Сколько самых тяжелых пакетов показывать в отчете
+TOP_PACKAGES = 8
+
+# Модули, которые не должны загружаться при импорте app.main
+LAZY_MODULES = ("requests", "numpy", "scipy")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_START_CODE = """
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    assert client.get("/").status_code == 200
+"""
+
+def parse_importtime(stderr: str) -> dict:
+    """Разбирает вывод -X importtime в словарь {модуль: (self_us, cumulative_us)}."""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = [
+            part.strip() for part in line[len("import time:"):].split("|")
+        ]
+        result[name] = (int(self_us), int(cumulative_us))
+    return result
+
+def package_times(modules: dict) -> dict:
+    """Собственное время импорта, сложенное по пакетам верхнего уровня, в мс."""
+    result = {}
+    for name, (self_us, _) in modules.items():
+        package = name.split(".")[0]
+        result[package] = result.get(package, 0) + self_us / 1000
+    return result
+
+def prepare_database(env: dict) -> None:
+    """Создает схему во временной базе (как python -m app.database)."""
+    subprocess.run(
+        [sys.executable, "-m", "app.database"],
+        cwd=BACKEND_DIR, capture_output=True, check=True, env=env,
+    )
+
+def measure_import(env: dict) -> dict:
+    """Один запуск python -X importtime для app.main."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True, env=env,
+    )
+    return parse_importtime(completed.stderr)
+
+def measure_cold_start(env: dict) -> float:
+    """Время от запуска интерпретатора до ответа на первый запрос, в мс."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", COLD_START_CODE],
+        cwd=BACKEND_DIR, capture_output=True, check=True,
+        env={**env, "APP_INIT_DB": "false"},
+    )
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    own_times = []
+    total_times = []
+    packages = {}
+    loaded_lazy = set()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            APP_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        )
+        prepare_database(env)
+
+        for _ in range(RUNS):
+            modules = measure_import(env)
+            own_us = sum(
+                self_us for name, (self_us, _) in modules.items()
+                if name == "ai_client" or name == "app" or name.startswith("app.")
+            )
+            own_times.append(own_us / 1000)
+            total_times.append(modules["app.main"][1] / 1000)
+            for package, ms in package_times(modules).items():
+                packages.setdefault(package, []).append(ms)
+            loaded_lazy.update(name for name in LAZY_MODULES if name in modules)
+
+        cold_starts = [measure_cold_start(env) for _ in range(RUNS)]
+
+    own_ms = statistics.median(own_times)
+    total_ms = statistics.median(total_times)
+    cold_ms = statistics.median(cold_starts)
+    heaviest = sorted(
+        ((statistics.median(times), package) for package, times in packages.items()),
+        reverse=True,
+    )[:TOP_PACKAGES]
+
+    print("=" * 50)
+    print("⏱️  Импорт app.main и холодный старт (медиана из %d)" % RUNS)
+    print("=" * 50)
+    print(f"Импорт app.main всего:        {total_ms:8.1f} мс (цель < {TOTAL_IMPORT_TARGET_MS} мс)")
+    print(f"Собственные модули проекта:   {own_ms:8.1f} мс (цель < {IMPORT_TARGET_MS} мс)")
+    print(f"Холодный старт до 1-го ответа: {cold_ms:7.1f} мс (цель < {COLD_START_TARGET_MS} мс)")
+    print(f"Загружены при импорте:        {', '.join(sorted(loaded_lazy)) or 'нет'} "
+          f"(цель: нет из {', '.join(LAZY_MODULES)})")
+    print("\nСамые тяжелые пакеты (собственное время модулей пакета):")
+    for ms, package in heaviest:
+        print(f"  {package:<26} {ms:8.1f} мс")
+
+    ok = (
+        total_ms < TOTAL_IMPORT_TARGET_MS and own_ms < IMPORT_TARGET_MS
+        and cold_ms < COLD_START_TARGET_MS and not loaded_lazy
+    )
+    print("✅ Цели достигнуты" if ok else "❌ Цели не достигнуты")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
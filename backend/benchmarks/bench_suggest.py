@@ -0,0 +1,94 @@
+"""
+Бенчмарк подсказок при вводе (app/suggest.py).
+
+Запуск (из папки backend):
+    python -m benchmarks.bench_suggest
+    BENCH_TASKS=100000 python -m benchmarks.bench_suggest
+
+Индекс строится в памяти (без базы данных) из BENCH_TASKS задач (по
+умолчанию 1 000 000). Названия - частые начала ("купить", "позвонить",
+...) и слова из словаря benchmarks.bench_duplicates, поэтому у коротких
+префиксов широкие диапазоны. Печатаются время построения, задержка
+подсказки (p50/p99) для префиксов длиной 1-8 символов, как при вводе по
+буквам, и время учета новой задачи.
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app import suggest
+from app.duplicates import normalize
+from benchmarks.bench_duplicates import make_title, make_vocabulary, percentile
+
+TASKS = int(os.getenv("BENCH_TASKS", "1000000"))
+QUERIES = int(os.getenv("BENCH_QUERIES", "2000"))
+UPDATES = int(os.getenv("BENCH_UPDATES", "20000"))
+LIMIT = 5
+
+STARTS = ["Купить", "Позвонить", "Написать", "Подготовить", "Отправить", "Проверить", "Сделать", "Забрать"]
+
+def make_task_title(rng: random.Random, vocabulary) -> str:
+    if rng.random() < 0.5:
+        return f"{rng.choice(STARTS)} {make_title(rng, vocabulary).lower()}"
+    return make_title(rng, vocabulary)
+
+def main() -> int:
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng, 20000)
+    now = datetime.now()
+    tasks = [
+        (make_task_title(rng, vocabulary), now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)))
+        for _ in range(TASKS)
+    ]
+
+    start = time.perf_counter()
+    titles = {}
+    for title, created_at in tasks:
+        key = normalize(title)
+        weight = suggest.recency_weight(created_at)
+        entry = titles.setdefault(key, [0.0, 0, 0.0, title])
+        entry[1] += 1
+        entry[2] = max(entry[2], weight)
+    for entry in titles.values():
+        entry[0] = entry[1] * entry[2]
+    index = suggest.SuggestIndex(suggest.PrefixIndex(titles), suggest.PrefixIndex({}))
+    print(f"🔎 Индекс подсказок из {TASKS} задач: {len(index.titles)} названий, "
+          f"построение {time.perf_counter() - start:.1f} с")
+
+    # Ввод по буквам: префиксы длиной 1-8 символов названий задач
+    queries = []
+    for _ in range(QUERIES // 8):
+        title = rng.choice(tasks)[0]
+        queries.extend(title[:length] for length in range(1, 9))
+
+    for label in ("первый проход", "повторный ввод"):
+        latencies = []
+        for prefix in queries:
+            started = time.perf_counter()
+            index.query(prefix, LIMIT)
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"  подсказка ({label}): p50 {percentile(latencies, 0.5):.3f} мс, "
+              f"p99 {percentile(latencies, 0.99):.3f} мс, max {max(latencies):.1f} мс")
+
+    weight = suggest.recency_weight(now)
+    started = time.perf_counter()
+    for _ in range(UPDATES):
+        title = make_task_title(rng, vocabulary)
+        index.titles.add(normalize(title), title, weight)
+    update_us = (time.perf_counter() - started) / max(1, UPDATES) * 1e6
+    print(f"  новая задача:      {update_us:.0f} мкс")
+
+    latencies = []
+    for prefix in queries:
+        started = time.perf_counter()
+        index.query(prefix, LIMIT)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"  подсказка после {UPDATES} новых задач: p50 {percentile(latencies, 0.5):.3f} мс, "
+          f"p99 {percentile(latencies, 0.99):.3f} мс")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
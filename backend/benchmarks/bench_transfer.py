@@ -0,0 +1,142 @@
+"""
+Бенчмарк потокового импорта и экспорта задач (app/transfer.py).
+
+Запуск (из папки backend):
+    python -m benchmarks.bench_transfer
+    BENCH_ROWS=100000 python -m benchmarks.bench_transfer
+
+Бенчмарк создает файл NDJSON на BENCH_ROWS задач (по умолчанию 1 000 000),
+запускает uvicorn в отдельном процессе на временной базе SQLite, загружает
+файл потоком в POST /tasks/import, затем скачивает GET /tasks/export в обоих
+форматах. Для каждой фазы печатаются строки в секунду, а в конце - пиковая
+память процесса сервера (VmHWM из /proc, только Linux): она не должна
+расти вместе с числом строк.
+"""
+
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+ROWS = int(os.getenv("BENCH_ROWS", "1000000"))
+CHUNK_SIZE = 64 * 1024
+
+TAGS = ["работа", "дом", "учеба", "здоровье", "покупки", "проект", "встреча", "срочно"]
+PRIORITIES = ["high", "medium", "low"]
+
+def write_file(path: str, rows: int) -> None:
+    """Создает файл NDJSON со случайными задачами."""
+    rng = random.Random(42)
+    base = datetime(2026, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(rows):
+            task = {
+                "title": f"Задача {i}",
+                "description": "Описание задачи" if i % 3 == 0 else None,
+                "priority": rng.choice(PRIORITIES),
+                "is_completed": i % 4 == 0,
+                "tags": rng.sample(TAGS, rng.randint(0, 2)),
+                "due_date": (base + timedelta(hours=rng.randint(0, 24 * 365))).isoformat() if i % 2 else None
+            }
+            f.write(json.dumps(task, ensure_ascii=False))
+            f.write("\n")
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for_server(url: str, process: subprocess.Popen) -> None:
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError("Сервер завершился при запуске")
+        try:
+            httpx.get(f"{url}/", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("Сервер не запустился")
+
+def peak_memory_mb(pid: int) -> float:
+    """Пиковая резидентная память процесса (0, если /proc недоступен)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def read_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+def report(name: str, rows: int, elapsed: float, size: int) -> None:
+    print(f"  {name:<16} {rows:>8} строк {rows / elapsed:>10.0f} строк/с "
+          f"{size / elapsed / 1024 / 1024:>7.1f} МБ/с ({elapsed:.1f} с)")
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "tasks.ndjson")
+        print(f"📝 Генерация файла на {ROWS} задач...")
+        write_file(source, ROWS)
+        size = os.path.getsize(source)
+        print(f"   {size / 1024 / 1024:.1f} МБ")
+
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        env = dict(
+            os.environ,
+            APP_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            APP_ARCHIVE_INTERVAL_SECONDS="0"
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            env=env, stdout=subprocess.DEVNULL
+        )
+        try:
+            wait_for_server(url, server)
+            print(f"\n🚀 Сервер: {url}, память после запуска {peak_memory_mb(server.pid):.0f} МБ")
+
+            start = time.perf_counter()
+            response = httpx.post(
+                f"{url}/tasks/import", content=read_chunks(source),
+                headers={"Content-Type": "application/x-ndjson"}, timeout=None
+            )
+            elapsed = time.perf_counter() - start
+            result = response.json()
+            report("import ndjson", result["imported"], elapsed, size)
+            if result["failed"]:
+                print(f"  ⚠️ Ошибок импорта: {result['failed']}")
+
+            for fmt in ("ndjson", "csv"):
+                rows = 0
+                received = 0
+                start = time.perf_counter()
+                with httpx.stream("GET", f"{url}/tasks/export", params={"format": fmt}, timeout=None) as stream:
+                    for chunk in stream.iter_bytes():
+                        rows += chunk.count(b"\n")
+                        received += len(chunk)
+                elapsed = time.perf_counter() - start
+                if fmt == "csv":
+                    # Строка заголовка
+                    rows -= 1
+                report(f"export {fmt}", rows, elapsed, received)
+
+            print(f"\n📈 Пиковая память сервера: {peak_memory_mb(server.pid):.0f} МБ")
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Размеченный корпус фраз для проверки парсеров текста задач
+(benchmarks/bench_parsers.py).
+
+Фразы собираются из шаблонов: действие (с ожидаемыми названием и тегами),
+дата, время, приоритет и правила повторения, в разном порядке. Разметка
+вычисляется из шаблонов по правилам ниже, а не запуском парсеров, и
+относится к зафиксированному моменту NOW (среда, 10:00):
+
+- дата без времени - 12:00, время без даты - сегодня, если оно еще не
+  прошло, иначе завтра;
+- день недели - ближайший следующий ("в среду" в среду - через неделю);
+- первое повторение - ближайшее, не раньше NOW;
+- приоритет без указаний - medium, теги - из словаря планировщика
+  (работа, учеба, покупки, личное, здоровье, общее).
+
+Корпус хранится в benchmarks/data/parser_corpus.jsonl. Пересоздать его
+(после изменения шаблонов):
+    python -m benchmarks.parser_corpus
+"""
+
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+NOW = datetime(2024, 1, 17, 10, 0)
+
+CORPUS_PATH = Path(__file__).parent / "data" / "parser_corpus.jsonl"
+
+PHRASES = 3000
+RECURRING_PHRASES = 500
+
+# Действие: (текст, теги)
+ACTIONS = [
+    ("подготовить отчет", ["работа"]),
+    ("отправить презентацию клиенту", ["работа"]),
+    ("совещание с командой", ["работа"]),
+    ("созвон с заказчиком", ["работа"]),
+    ("написать ТЗ по проекту", ["работа"]),
+    ("обновить документацию проекта", ["работа"]),
+    ("встреча с руководителем", ["работа"]),
+    ("разобрать почту в офисе", ["работа"]),
+    ("согласовать договор с юристом", ["работа"]),
+    ("сдать курсовую", ["учеба"]),
+    ("подготовиться к экзамену", ["учеба"]),
+    ("дописать главу диплома", ["учеба"]),
+    ("пройти урок на курсе английского", ["учеба"]),
+    ("решить задачи по математике", ["учеба"]),
+    ("сходить на лекцию", ["учеба"]),
+    ("купить продукты", ["покупки"]),
+    ("купить хлеб и молоко", ["покупки"]),
+    ("заказать корм для кота", ["покупки"]),
+    ("зайти в магазин за батарейками", ["покупки"]),
+    ("купить подарок маме", ["покупки", "личное"]),
+    ("позвонить маме", ["личное"]),
+    ("поздравить друга с днем рождения", ["личное"]),
+    ("убраться дома", ["личное"]),
+    ("забрать детей из сада", ["личное"]),
+    ("погулять с собакой", ["личное"]),
+    ("записаться к врачу", ["здоровье"]),
+    ("сходить в спортзал", ["здоровье"]),
+    ("сдать анализы", ["здоровье"]),
+    ("оплатить интернет", ["общее"]),
+    ("заменить лампочку в коридоре", ["общее"]),
+    ("продлить страховку машины", ["общее"]),
+]
+
+# Дата: (текст, смещение в днях от NOW или None)
+DATES = [
+    ("", None),
+    ("сегодня", 0),
+    ("завтра", 1),
+    ("послезавтра", 2),
+    ("в понедельник", 5),
+    ("во вторник", 6),
+    ("в среду", 7),
+    ("в четверг", 1),
+    ("в пятницу", 2),
+    ("в субботу", 3),
+    ("в воскресенье", 4),
+    ("к пятнице", 2),
+    ("через 3 дня", 3),
+    ("через неделю", 7),
+    ("25 января", 8),
+    ("1 февраля", 15),
+]
+
+# Время: (текст, (час, минута) или None)
+TIMES = [
+    ("", None),
+    ("в 15:00", (15, 0)),
+    ("в 9:30", (9, 30)),
+    ("в 10 утра", (10, 0)),
+    ("в 3 часа дня", (15, 0)),
+    ("в 7 вечера", (19, 0)),
+    ("в 8 часов", (8, 0)),
+    ("к 18 часам", (18, 0)),
+    ("утром", (9, 0)),
+    ("в обед", (13, 0)),
+    ("вечером", (19, 0)),
+]
+
+# Приоритет: (текст, приоритет)
+PRIORITIES = [
+    ("", "medium"),
+    ("", "medium"),
+    ("срочно", "high"),
+    ("важно", "high"),
+    ("очень важно", "high"),
+    ("критично", "high"),
+    ("не срочно", "low"),
+    ("когда будет время", "low"),
+    ("по возможности", "low"),
+]
+
+# Повторение: (текст, правило RRULE, дни недели (0 - пн) или None, число месяца или None)
+RECURRENCES = [
+    ("каждый понедельник", "FREQ=WEEKLY;BYDAY=MO", [0], None),
+    ("каждый вторник", "FREQ=WEEKLY;BYDAY=TU", [1], None),
+    ("каждую среду", "FREQ=WEEKLY;BYDAY=WE", [2], None),
+    ("каждый четверг", "FREQ=WEEKLY;BYDAY=TH", [3], None),
+    ("каждую пятницу", "FREQ=WEEKLY;BYDAY=FR", [4], None),
+    ("каждую субботу", "FREQ=WEEKLY;BYDAY=SA", [5], None),
+    ("каждое воскресенье", "FREQ=WEEKLY;BYDAY=SU", [6], None),
+    ("по будням", "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR", [0, 1, 2, 3, 4], None),
+    ("по выходным", "FREQ=WEEKLY;BYDAY=SA,SU", [5, 6], None),
+    ("каждый вторник и четверг", "FREQ=WEEKLY;BYDAY=TU,TH", [1, 3], None),
+    ("каждые 2 недели по понедельникам", "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO", [0], None),
+    ("каждый день", "FREQ=DAILY", None, None),
+    ("ежедневно", "FREQ=DAILY", None, None),
+    ("каждые 2 дня", "FREQ=DAILY;INTERVAL=2", None, None),
+    ("каждое 15 число", "FREQ=MONTHLY;BYMONTHDAY=15", None, 15),
+    ("ежемесячно 25 числа", "FREQ=MONTHLY;BYMONTHDAY=25", None, 25),
+]
+
+def _at(day: datetime, clock: Optional[Tuple[int, int]]) -> datetime:
+    hour, minute = clock or (12, 0)
+    return day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+def expected_due(offset: Optional[int], clock: Optional[Tuple[int, int]]) -> Optional[datetime]:
+    """Ожидаемый срок по смещению даты и времени."""
+    if offset is not None:
+        return _at(NOW + timedelta(days=offset), clock)
+    if clock is None:
+        return None
+    due = _at(NOW, clock)
+    return due if due >= NOW else due + timedelta(days=1)
+
+def first_occurrence(weekdays: Optional[List[int]], monthday: Optional[int], clock: Optional[Tuple[int, int]]) -> datetime:
+    """Первое повторение не раньше NOW."""
+    for days in range(62):
+        due = _at(NOW + timedelta(days=days), clock)
+        if due < NOW:
+            continue
+        if weekdays is not None and due.weekday() not in weekdays:
+            continue
+        if monthday is not None and due.day != monthday:
+            continue
+        return due
+    raise ValueError("нет повторения в ближайшие два месяца")
+
+def _phrase(rng: random.Random, parts: Dict[str, str]) -> str:
+    """Части фразы в одном из типичных порядков."""
+    order = rng.choice([
+        ("when", "action", "priority"),
+        ("action", "when", "priority"),
+        ("priority", "action", "when"),
+        ("when", "priority", "action"),
+    ])
+    words = [parts[name] for name in order if parts[name]]
+    text = " ".join(words)
+    if parts["priority"] and rng.random() < 0.3:
+        text = text.replace(f" {parts['priority']}", f", {parts['priority']}", 1)
+    return text[:1].upper() + text[1:]
+
+def _item(text: str, title: str, due: Optional[datetime], priority: str, tags: List[str], recurrence: Optional[str]) -> dict:
+    return {
+        "text": text,
+        "title": title[:1].upper() + title[1:],
+        "due_date": due.strftime("%Y-%m-%d %H:%M:%S") if due else None,
+        "priority": priority,
+        "tags": tags,
+        "recurrence": recurrence,
+    }
+
+def generate(seed: int = 42) -> Iterator[dict]:
+    """Фразы корпуса с разметкой (одинаковые для одного seed)."""
+    rng = random.Random(seed)
+    seen = set()
+    while len(seen) < PHRASES:
+        action, tags = rng.choice(ACTIONS)
+        date_text, offset = rng.choice(DATES)
+        time_text, clock = rng.choice(TIMES)
+        priority_text, priority = rng.choice(PRIORITIES)
+        when = " ".join(part for part in (date_text, time_text) if part)
+        text = _phrase(rng, {"when": when, "action": action, "priority": priority_text})
+        if text in seen:
+            continue
+        seen.add(text)
+        yield _item(text, action, expected_due(offset, clock), priority, tags, None)
+
+    recurring = 0
+    while recurring < RECURRING_PHRASES:
+        action, tags = rng.choice(ACTIONS)
+        rule_text, rule, weekdays, monthday = rng.choice(RECURRENCES)
+        time_text, clock = rng.choice(TIMES)
+        priority_text, priority = rng.choice(PRIORITIES[:4])
+        when = " ".join(part for part in (rule_text, time_text) if part)
+        text = _phrase(rng, {"when": when, "action": action, "priority": priority_text})
+        if text in seen:
+            continue
+        seen.add(text)
+        recurring += 1
+        yield _item(text, action, first_occurrence(weekdays, monthday, clock), priority, tags, rule)
+
+def load(path: Path = CORPUS_PATH) -> List[dict]:
+    with open(path, encoding="utf-8") as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+def main() -> int:
+    CORPUS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(CORPUS_PATH, "w", encoding="utf-8", newline="\n") as corpus:
+        for item in generate():
+            corpus.write(json.dumps(item, ensure_ascii=False) + "\n")
+            count += 1
+    print(f"✅ Корпус записан: {CORPUS_PATH} ({count} фраз)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 # backend/prompts.py
+import json
 from datetime import datetime
 
 class TaskPrompts:
@@ -36,6 +37,34 @@ class TaskPrompts:
     "tags": ["работа", "диплом"]
 }}"""
 
+    @staticmethod
+    def extract_tasks_prompt(user_text: str) -> str:
+        """
+        Промпт для извлечения всех задач из текста одним запросом.
+        
+        Ответ проверяется по схеме TaskCreate (ai_client._validate_tasks).
+        """
+        
+        now = datetime.now()
+        today = now.strftime('%Y-%m-%d')
+        
+        return f"""Ты - AI ассистент в планировщике задач. Сегодня {today} ({now.strftime('%A')}), сейчас {now.strftime('%H:%M')}.
+
+Текст пользователя: "{user_text}"
+
+В тексте может быть несколько задач ("завтра купить хлеб, в пятницу отчет и позвонить маме").
+Найди ВСЕ задачи и для каждой определи:
+- text: часть исходного текста, из которой взята задача
+- title: краткое название (5-7 слов), без даты и приоритета
+- due_date: дата и время "ГГГГ-ММ-ДД ЧЧ:ММ:СС" или null (дата без времени - 12:00:00)
+- priority: high/medium/low
+- tags: 1-3 тега (работа, учеба, личное, покупки, здоровье)
+
+Перечисление в одной задаче ("купить хлеб и молоко") - это одна задача.
+
+Верни ТОЛЬКО JSON массив, без пояснений:
+[{{"text": "...", "title": "...", "due_date": "ГГГГ-ММ-ДД ЧЧ:ММ:СС" или null, "priority": "medium", "tags": ["тег"]}}]"""
+
     @staticmethod
     def chat_prompt(user_message: str, context: str = "") -> str:
         """Промпт для чата с AI ассистентом"""
@@ -55,25 +84,54 @@ class TaskPrompts:
 Ответь кратко, по делу и дружелюбно. Используй эмодзи где уместно."""
 
     @staticmethod
-    def analyze_productivity_prompt(tasks_data: list) -> str:
-        """Промпт для анализа продуктивности"""
+    def analyze_productivity_prompt(summary: dict) -> str:
+        """
+        Промпт для анализа продуктивности.
         
-        total = len(tasks_data)
-        completed = len([t for t in tasks_data if t.get('completed')])
+        Принимает сводку из app.analytics.productivity_summary, а не список
+        задач: размер промпта не зависит от количества задач.
+        """
+        
+        weekdays = ", ".join(f"{day}: {count}" for day, count in summary['completed_per_weekday'].items())
         
         return f"""Проанализируй продуктивность пользователя на основе его задач.
 
 Статистика:
-- Всего задач: {total}
-- Выполнено: {completed}
-- Процент выполнения: {completed/total*100 if total > 0 else 0:.1f}%
+- Всего задач: {summary['total']}
+- Выполнено: {summary['completed']}
+- Процент выполнения: {summary['completion_rate']:.1f}%
+- Просрочено невыполненных: {summary['overdue_open']}
+- Выполнено в срок: {summary['completed_on_time']}, с опозданием: {summary['completed_late']} (в среднем на {summary['average_lateness_hours']} ч)
+- Выполнено по дням недели: {weekdays}
+- Текущая серия: {summary['current_streak_days']} дн., лучшая серия: {summary['longest_streak_days']} дн.
 
-Список задач:
-{json.dumps(tasks_data[:10], indent=2, ensure_ascii=False)}
+Последние открытые задачи:
+{json.dumps(summary['recent_open_tasks'], indent=2, ensure_ascii=False)}
 
 Дай:
 1. Оценку продуктивности (от 1 до 10)
 2. 2-3 конкретных совета по улучшению
 3. Позитивную мотивацию
 
-Ответь кратко и дружелюбно."""
\ No newline at end of file
+Ответь кратко и дружелюбно."""
+
+    @staticmethod
+    def summarize_chat_prompt(summary: str, turns: list) -> str:
+        """
+        Промпт для сворачивания старых сообщений чата в краткое содержание.
+        
+        Вместо всей переписки в следующие запросы передается только оно
+        (см. app/chat_context.py).
+        """
+        
+        transcript = "\n".join(f"Пользователь: {user_message}\nАссистент: {reply}" for user_message, reply in turns)
+        
+        return f"""Кратко (2-4 предложения) перескажи разговор пользователя с ассистентом планировщика задач.
+Сохрани упомянутые задачи, даты, договоренности и предпочтения пользователя.
+
+Предыдущее краткое содержание: {summary or "нет"}
+
+Новые сообщения:
+{transcript}
+
+Верни только краткое содержание, без пояснений."""
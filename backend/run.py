@@ -1,5 +1,6 @@
 """
-Простой скрипт для запуска FastAPI приложения.
+Простой скрипт для запуска FastAPI приложения в режиме разработки.
+Для продакшена (несколько воркеров, без reload) используйте serve.py.
 """
 
 import uvicorn
@@ -0,0 +1,106 @@
+"""
+Продакшен запуск FastAPI приложения.
+
+В отличие от run.py (один процесс с reload=True для разработки), здесь:
+- несколько процессов-воркеров (по умолчанию по числу ядер);
+- uvloop и httptools, если они установлены;
+- приложение загружается в мастер-процессе до fork (preload);
+- плавная остановка с ожиданием активных запросов;
+- перезапуск воркера после заданного числа запросов.
+
+Все параметры задаются через переменные окружения APP_* (см. app/config.py).
+Если установлен gunicorn, он используется как менеджер процессов с
+воркерами uvicorn. Иначе (например, на Windows) воркерами управляет
+сам uvicorn, но без preload.
+
+Пример:
+    APP_WORKERS=4 APP_MAX_REQUESTS=5000 python serve.py
+"""
+
+import importlib.util
+
+import uvicorn
+
+from app.auth import check_workers_secret_key
+from app.config import Settings, get_settings
+
+def _available(module: str, fallback: str, name: str) -> str:
+    """Возвращает name, если модуль установлен, иначе fallback."""
+    if name == module and importlib.util.find_spec(module) is None:
+        print(f"⚠️ {module} не установлен, используем {fallback}")
+        return fallback
+    return name
+
+def _loop_and_http(settings: Settings):
+    """Реализации event loop и HTTP парсера с учетом установленных пакетов."""
+    return (
+        _available("uvloop", "asyncio", settings.loop),
+        _available("httptools", "h11", settings.http),
+    )
+
+if importlib.util.find_spec("gunicorn") is not None:
+    from uvicorn.workers import UvicornWorker
+
+    class ProductionWorker(UvicornWorker):
+        """Воркер uvicorn для gunicorn с loop/http из настроек."""
+        _loop, _http = _loop_and_http(get_settings())
+        CONFIG_KWARGS = {"loop": _loop, "http": _http}
+
+def run_gunicorn(settings: Settings):
+    """Запуск через gunicorn с воркерами uvicorn."""
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{settings.host}:{settings.port}",
+                "workers": settings.worker_count,
+                "worker_class": "serve.ProductionWorker",
+                "preload_app": settings.preload,
+                "graceful_timeout": settings.graceful_timeout,
+                "max_requests": settings.max_requests,
+                "max_requests_jitter": settings.max_requests_jitter,
+                "keepalive": settings.keepalive,
+                "loglevel": settings.log_level,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Application().run()
+
+def run_uvicorn(settings: Settings):
+    """Запуск через встроенный менеджер процессов uvicorn."""
+    loop, http = _loop_and_http(settings)
+    # limit_max_requests в uvicorn не поддерживает jitter, поэтому
+    # добавка не используется; preload недоступен
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.worker_count,
+        loop=loop,
+        http=http,
+        limit_max_requests=settings.max_requests or None,
+        timeout_graceful_shutdown=settings.graceful_timeout,
+        timeout_keep_alive=settings.keepalive,
+        log_level=settings.log_level,
+    )
+
+def main():
+    settings = get_settings()
+    gunicorn = importlib.util.find_spec("gunicorn") is not None
+    # Случайный ключ подписи токенов общий для воркеров только при preload
+    check_workers_secret_key(settings.worker_count, gunicorn and settings.preload)
+    print(f"🚀 Запуск: {settings.worker_count} воркеров, порт {settings.port}")
+
+    if gunicorn:
+        run_gunicorn(settings)
+    else:
+        run_uvicorn(settings)
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,11 @@ apiClient.interceptors.response.use(
   
   // Интерцептор для ошибок
   (error) => {
+    // Отмененные запросы (например, устаревшие подсказки) - не ошибка
+    if (axios.isCancel(error)) {
+      return Promise.reject(error);
+    }
+    
     console.error(`❌ API Error:`, {
       url: error.config?.url,
       method: error.config?.method,
@@ -86,6 +91,56 @@ apiClient.interceptors.response.use(
 );
 
 // Методы API
+// Отложенный запрос подсказок (suggestTasks): таймер, отмена запроса и
+// Promise, который ждет результат
+const suggestState = { timer: null, controller: null, resolve: null };
+
+// Пауза перед повторным подключением к потоку событий, мс
+const EVENTS_RECONNECT_DELAY = 5000;
+
+// Адрес потока событий. EventSource не отправляет заголовки, поэтому при
+// авторизации (заголовок Authorization в apiClient) короткоживущий токен
+// потока передается в параметре ?token=
+async function eventsUrl(path) {
+  const url = `${apiClient.defaults.baseURL}${path}`;
+  if (!apiClient.defaults.headers.common?.Authorization) {
+    return url;
+  }
+  const response = await apiClient.get('/api/auth/stream-token');
+  return `${url}?token=${encodeURIComponent(response.data.token)}`;
+}
+
+// Подключение к потоку событий: setup(source) добавляет обработчики.
+// Токен потока действует недолго, и переподключение EventSource со старым
+// токеном получает 401 - тогда подключаемся заново с новым токеном.
+// Возвращает функцию отписки
+function openEvents(path, setup) {
+  let source = null;
+  let closed = false;
+  const connect = async () => {
+    let url;
+    try {
+      url = await eventsUrl(path);
+    } catch (error) {
+      if (!closed) setTimeout(connect, EVENTS_RECONNECT_DELAY);
+      return;
+    }
+    if (closed) return;
+    source = new EventSource(url);
+    setup(source);
+    source.addEventListener('error', () => {
+      if (source.readyState === EventSource.CLOSED && !closed) {
+        setTimeout(connect, EVENTS_RECONNECT_DELAY);
+      }
+    });
+  };
+  connect();
+  return () => {
+    closed = true;
+    if (source) source.close();
+  };
+}
+
 export default {
   getTasks(skip = 0, limit = 100, completed = null) {
     const params = { skip, limit };
@@ -109,7 +164,95 @@ export default {
     return apiClient.delete(`/tasks/${id}`);
   },
   
-  completeTask(id) {
-    return apiClient.patch(`/tasks/${id}/complete`);
+  // Для повторяющейся задачи occurrence - срок выполненного повторения
+  completeTask(id, occurrence = null) {
+    const params = occurrence ? { occurrence } : {};
+    return apiClient.patch(`/tasks/${id}/complete`, null, { params });
+  },
+  
+  // Изменения после курсора: { tasks, deleted, cursor, has_more, full_resync }
+  getChanges(since = 0, limit = 500) {
+    return apiClient.get('/tasks/changes', { params: { since, limit } });
+  },
+  
+  // Похожие задачи и предлагаемые теги для вводимого текста:
+  // { tasks: [... с полем similarity], suggested_tags: [...] }
+  getSimilarTasks(text, limit = 10) {
+    return apiClient.get('/tasks/similar', { params: { text, limit } });
+  },
+  
+  // Подсказки названий и тегов при вводе: запрос уходит через delay мс
+  // после последнего нажатия клавиши, предыдущий незавершенный запрос
+  // отменяется. Возвращает Promise с { prefix, titles, tags } или null,
+  // если его сменил более новый ввод
+  suggestTasks(prefix, limit = 5, delay = 150) {
+    clearTimeout(suggestState.timer);
+    if (suggestState.controller) {
+      suggestState.controller.abort();
+      suggestState.controller = null;
+    }
+    if (suggestState.resolve) {
+      suggestState.resolve(null);
+    }
+    return new Promise((resolve) => {
+      suggestState.resolve = resolve;
+      suggestState.timer = setTimeout(async () => {
+        const controller = new AbortController();
+        suggestState.controller = controller;
+        try {
+          const response = await apiClient.get('/tasks/suggest', {
+            params: { prefix, limit },
+            signal: controller.signal
+          });
+          resolve(response.data);
+        } catch (error) {
+          resolve(null);
+        } finally {
+          if (suggestState.controller === controller) {
+            suggestState.controller = null;
+            suggestState.resolve = null;
+          }
+        }
+      }, delay);
+    });
+  },
+  
+  // Задачи, похожие на задачу id, и теги, которых у нее еще нет
+  getSimilarToTask(id, limit = 10) {
+    return apiClient.get(`/tasks/${id}/similar`, { params: { limit } });
+  },
+  
+  // Фоновое извлечение задач из текста (в result.tasks - все задачи текста):
+  // ответ { job_id, status_url, events_url }
+  // приходит сразу, не дожидаясь AI (таймаут 10 секунд не мешает)
+  processTextAsync(text, priority = 'normal') {
+    return apiClient.post('/api/ai/process', { text }, { params: { mode: 'async', priority } });
+  },
+  
+  // Статус задания: { status: queued | running | done | failed, result, error }
+  getAIJob(jobId) {
+    return apiClient.get(`/api/ai/jobs/${jobId}`);
+  },
+  
+  // Подписка на изменения статуса задания (Server-Sent Events).
+  // onUpdate получает задание при каждом изменении; возвращает функцию отписки
+  subscribeAIJob(jobId, onUpdate) {
+    const unsubscribe = openEvents(`/api/ai/jobs/${jobId}/events`, (source) => {
+      source.addEventListener('status', (event) => {
+        const job = JSON.parse(event.data);
+        onUpdate(job);
+        if (job.status === 'done' || job.status === 'failed') {
+          unsubscribe();
+        }
+      });
+    });
+    return unsubscribe;
+  },
+
+  // Напоминания о сроках задач: onReminder({task_id, title, due_date, remind_at})
+  subscribeReminders(onReminder) {
+    return openEvents('/tasks/reminders/events', (source) => {
+      source.addEventListener('reminder', (event) => onReminder(JSON.parse(event.data)));
+    });
   }
 };
\ No newline at end of file